@@ -0,0 +1,7 @@
+"""
+性能基准测试
+
+    python -m benchmarks.run [--output PATH] [--compare BASELINE] [--threshold 0.2]
+    python -m benchmarks.bench_fleet_ingest [--agents 2000] [--udp]
+    python -m benchmarks.bench_overlay [--iterations 2000]
+"""
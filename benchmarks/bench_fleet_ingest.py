@@ -0,0 +1,218 @@
+"""
+多机收集服务的接收基准测试
+
+在本机上模拟大量代理，通过 TCP（或 UDP）向收集服务发送读数帧，
+统计接收吞吐量、每台主机的内存占用，以及索引查询与全量遍历的耗时对比：
+
+    python -m benchmarks.bench_fleet_ingest --agents 5000 --frames 20
+    python -m benchmarks.bench_fleet_ingest --agents 2000 --udp
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import sys
+import time
+import tracemalloc
+from benchmarks.harness import measure, format_table, environment
+from fleet.collector import FleetCollector
+from fleet.protocol import LENGTH, encode_frame
+
+
+def make_frames(agents: int, frames: int, batch: int, seed: int = 1) -> list:
+    """
+    预先生成每个代理的读数帧
+
+    Returns:
+        [[帧, ...], ...]，每个代理一个列表
+    """
+    rng = random.Random(seed)
+    start = time.time()
+    result = []
+    for agent in range(agents):
+        host = f"laptop-{agent:05d}"
+        percent = rng.uniform(5, 100)
+        plugged = rng.random() < 0.3
+        rate = rng.uniform(2, 40) / 3600 * (1 if plugged else -1)
+        timestamp = start
+        agent_frames = []
+        for _ in range(frames):
+            records = []
+            for _ in range(batch):
+                timestamp += 60
+                percent = min(100.0, max(0.0, percent + rate * 60 * rng.uniform(0.8, 1.2)))
+                records.append((timestamp, percent, plugged, -2 if plugged else -1))
+            agent_frames.append(encode_frame(host, records))
+        result.append(agent_frames)
+    return result
+
+
+async def _send_tcp(writer, frames: list):
+    for frame in frames:
+        writer.write(LENGTH.pack(len(frame)) + frame)
+    await writer.drain()
+
+
+async def ingest_tcp(collector: FleetCollector, agent_frames: list, connections: int) -> float:
+    """
+    多个连接并发发送，直到收集服务处理完所有帧
+
+    每个连接按轮转方式承载多个代理的帧，连接数受限时模拟经过汇聚的代理。
+
+    Returns:
+        耗时(秒)
+    """
+    await collector.start(tcp='127.0.0.1:0')
+    address = collector.addresses[0][1]
+    total = sum(len(frames) for frames in agent_frames)
+    connections = max(1, min(connections, len(agent_frames)))
+    per_connection = [[] for _ in range(connections)]
+    # 按轮次交错，使同一代理的帧按时间顺序到达
+    rounds = max(len(frames) for frames in agent_frames)
+    for round_index in range(rounds):
+        for agent, frames in enumerate(agent_frames):
+            if round_index < len(frames):
+                per_connection[agent % connections].append(frames[round_index])
+
+    # 先分批建立所有连接，计时只包含发送和处理
+    writers = []
+    for i in range(0, connections, 100):
+        opened = await asyncio.gather(*(asyncio.open_connection(*address)
+                                        for _ in range(min(100, connections - i))))
+        writers.extend(writer for _, writer in opened)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_send_tcp(writer, frames)
+                           for writer, frames in zip(writers, per_connection)))
+    while collector.frame_count + collector.error_count < total:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    for writer in writers:
+        writer.close()
+    await collector.stop()
+    return elapsed
+
+
+async def ingest_udp(collector: FleetCollector, agent_frames: list) -> float:
+    """通过 UDP 发送，每发送一轮让出一次事件循环；UDP 可能丢包"""
+    await collector.start(udp='127.0.0.1:0')
+    address = collector.addresses[0][1]
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+    total = sum(len(frames) for frames in agent_frames)
+    rounds = max(len(frames) for frames in agent_frames)
+
+    started = time.perf_counter()
+    for round_index in range(rounds):
+        for agent, frames in enumerate(agent_frames):
+            if round_index < len(frames):
+                sender.sendto(frames[round_index], address)
+                if agent % 64 == 63:
+                    await asyncio.sleep(0)
+    # 等待剩余的数据报被处理
+    idle_since, last = time.perf_counter(), -1
+    while collector.frame_count < total and time.perf_counter() - idle_since < 0.5:
+        if collector.frame_count != last:
+            last, idle_since = collector.frame_count, time.perf_counter()
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    sender.close()
+    await collector.stop()
+    return elapsed
+
+
+def bench_queries(collector: FleetCollector, iterations: int) -> dict:
+    """索引查询与全量遍历的对比"""
+    hosts = list(collector.hosts.values())
+    results = {}
+    results['query.hosts_below(15)[index]'] = measure(
+        lambda i: collector.hosts_below(15), iterations)
+    results['query.hosts_below(15)[scan]'] = measure(
+        lambda i: sorted((h.percent, h.name) for h in hosts if h.percent is not None and h.percent < 15),
+        max(1, iterations // 10))
+    results['query.fastest_draining(10)[index]'] = measure(
+        lambda i: collector.fastest_draining(10), iterations)
+    results['query.fastest_draining(10)[scan]'] = measure(
+        lambda i: sorted((h.rate, h.name) for h in hosts if h.rate is not None)[:10],
+        max(1, iterations // 10))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多机收集服务接收基准测试")
+    parser.add_argument("--agents", type=int, default=2000, help="模拟的代理数")
+    parser.add_argument("--frames", type=int, default=10, help="每个代理发送的帧数")
+    parser.add_argument("--batch", type=int, default=10, help="每帧的读数条数")
+    parser.add_argument("--connections", type=int, default=1000,
+                        help="TCP 连接数上限（超过时多个代理共用连接）")
+    parser.add_argument("--udp", action="store_true", help="使用 UDP 代替 TCP")
+    parser.add_argument("--history", type=int, default=120, help="每台主机保留的读数条数")
+    parser.add_argument("--iterations", type=int, default=2000, help="查询的迭代次数")
+    parser.add_argument("--output", help="结果JSON文件")
+    args = parser.parse_args(argv)
+
+    agent_frames = make_frames(args.agents, args.frames, args.batch)
+    total_frames = args.agents * args.frames
+    frame_bytes = sum(len(frame) for frames in agent_frames for frame in frames)
+
+    encode_records = [(time.time() + i * 60, 50.0, False, -1) for i in range(args.batch)]
+    results = {'protocol.encode_frame': measure(
+        lambda i: encode_frame("laptop-00000", encode_records), args.iterations)}
+    probe = FleetCollector(history=args.history)
+    sample_frame = agent_frames[0][0]
+    results['collector.ingest_frame'] = measure(
+        lambda i: probe.ingest_frame(sample_frame), args.iterations)
+
+    collector = FleetCollector(history=args.history)
+    if args.udp:
+        elapsed = asyncio.run(ingest_udp(collector, agent_frames))
+    else:
+        elapsed = asyncio.run(ingest_tcp(collector, agent_frames, args.connections))
+
+    # 单独统计每台主机的内存占用，避免 tracemalloc 拖慢吞吐量测试
+    sample_agents = agent_frames[:min(500, len(agent_frames))]
+    tracemalloc.start()
+    sized = FleetCollector(history=args.history)
+    for frames in sample_agents:
+        for frame in frames:
+            sized.ingest_frame(frame)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results.update(bench_queries(collector, args.iterations))
+    print(format_table(results))
+
+    received = collector.frame_count
+    summary = {
+        'transport': 'udp' if args.udp else 'tcp',
+        'agents': args.agents,
+        'hosts': len(collector.hosts),
+        'frames_sent': total_frames,
+        'frames_received': received,
+        'bad_frames': collector.error_count,
+        'records_received': collector.record_count,
+        'wire_bytes_per_record': frame_bytes / (total_frames * args.batch),
+        'seconds': elapsed,
+        'frames_per_second': received / elapsed if elapsed else 0.0,
+        'records_per_second': collector.record_count / elapsed if elapsed else 0.0,
+        'bytes_per_host': memory / max(1, len(sized.hosts)),
+    }
+    print()
+    print(f"{summary['transport'].upper()} 接收 {received}/{total_frames} 帧，"
+          f"{collector.record_count} 条读数，用时 {elapsed:.2f} 秒")
+    print(f"  {summary['frames_per_second']:.0f} 帧/秒，{summary['records_per_second']:.0f} 读数/秒，"
+          f"每条读数 {summary['wire_bytes_per_record']:.1f} 字节（压缩后），"
+          f"每台主机约 {summary['bytes_per_host'] / 1024:.1f} KiB 内存")
+    print()
+    print(collector.format_report(top=5))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'results': results, 'ingest': summary}, f, indent=2)
+    return 0 if received + collector.error_count >= total_frames or args.udp else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+标签悬浮窗与自绘悬浮窗的内存和绘制耗时对比
+
+每种模式在单独的子进程中运行（Qt offscreen 平台），比较创建并显示悬浮窗后
+进程常驻内存(RSS)的增量，以及读数变化后更新并绘制一帧的耗时：
+
+    python -m benchmarks.bench_overlay --iterations 2000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# 必须在导入 PyQt5 之前设置
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from benchmarks.harness import measure, format_table, environment
+
+MODES = ('widget', 'painted')
+
+
+def rss_kb() -> int:
+    """当前进程的常驻内存(KB)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_mode(mode: str, iterations: int) -> dict:
+    """在当前进程中测量一种悬浮窗模式"""
+    from PyQt5.QtWidgets import QApplication
+    from config.settings import settings
+    from benchmarks.run import make_samples, sim_backend
+
+    settings.history_file = None
+    os.chdir(tempfile.mkdtemp(prefix="battery-bench-"))
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    from core.battery_reader import battery_reader
+    battery_reader.set_backend(sim_backend())
+    from config_manager import ConfigManager
+    from ui.qt_overlay import BatteryOverlay
+    from ui.painted_overlay import PaintedOverlay
+    from utils.diagnostics import diagnostics
+
+    samples = make_samples()
+    config_manager = ConfigManager()
+    app.processEvents()
+    baseline = rss_kb()
+
+    overlay_class = PaintedOverlay if mode == 'painted' else BatteryOverlay
+    overlay = overlay_class(config_manager)
+    overlay.stop_monitoring()
+    overlay.show()
+    for sample in samples:
+        overlay.update_display(sample)
+        app.processEvents()
+    rss = rss_kb() - baseline
+
+    # 与实际运行相同：更新显示后由事件循环重绘失效区域
+    def update_and_paint(i):
+        overlay.update_display(samples[i % len(samples)])
+        app.processEvents()
+
+    diagnostics.reset()
+    results = {
+        f'{mode}.update_display+paint': measure(update_and_paint, iterations),
+        f'{mode}.full_repaint': measure(lambda i: overlay.repaint(), iterations),
+    }
+    paint = diagnostics.stages['display.paint'].snapshot()
+    overlay.close()
+    return {
+        'mode': mode,
+        'rss_kb': rss,
+        'window': [overlay.width(), overlay.height()],
+        'paint_events': paint['count'],
+        'paint_mean_us': paint['mean_ms'] * 1e3,
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="悬浮窗模式对比基准测试")
+    parser.add_argument("--iterations", type=int, default=2000, help="每个操作的迭代次数")
+    parser.add_argument("--output", help="结果JSON文件")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.mode:
+        # 子进程：只测量一种模式，结果以JSON输出到标准输出的最后一行
+        print(json.dumps(run_mode(args.mode, args.iterations)))
+        return 0
+
+    try:
+        import PyQt5  # noqa: F401
+    except ImportError:
+        print("未安装 PyQt5，无法运行悬浮窗基准测试", file=sys.stderr)
+        return 1
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    reports = []
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_overlay', '--mode', mode,
+             '--iterations', str(args.iterations)],
+            cwd=root, check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+
+    results = {}
+    for report in reports:
+        results.update(report['results'])
+    print(format_table(results))
+    print()
+    print(f"{'模式':<10}{'窗口':>12}{'RSS增量(KB)':>14}{'绘制次数':>10}{'平均绘制(us)':>14}")
+    for report in reports:
+        window = "x".join(str(value) for value in report['window'])
+        print(f"{report['mode']:<12}{window:>12}{report['rss_kb']:>14}"
+              f"{report['paint_events']:>12}{report['paint_mean_us']:>14.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'modes': reports}, f, indent=2)
+        print(f"结果已保存到 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
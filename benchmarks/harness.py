@@ -0,0 +1,166 @@
+"""
+基准测试工具：计时、分位数、每次操作的内存分配统计、结果保存与对比
+"""
+
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """已排序数据的分位数（线性插值）"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+def measure(fn: Callable[[int], None], iterations: int = 1000, warmup: int = 50,
+            alloc_iterations: Optional[int] = None) -> Dict[str, float]:
+    """
+    测量单个操作的耗时分位数和内存分配
+
+    Args:
+        fn: 被测操作，参数为迭代序号
+        iterations: 计时迭代次数
+        warmup: 预热次数（不计入结果）
+        alloc_iterations: 统计内存分配时的迭代次数，默认与 iterations 相同
+
+    Returns:
+        以微秒为单位的分位数；每次操作期间新分配内存的峰值(alloc_bytes_per_op，
+        包括操作结束前已释放的临时对象)，以及循环结束后仍保留的净增内存(retained_*)
+    """
+    for i in range(warmup):
+        fn(i)
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        perf_counter_ns = time.perf_counter_ns
+        for i in range(iterations):
+            start = perf_counter_ns()
+            fn(i)
+            samples.append(perf_counter_ns() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    samples.sort()
+    to_us = 1e-3
+
+    # 单独一轮统计内存分配，避免 tracemalloc 的开销影响计时。
+    # 每次调用前重置峰值，调用期间的峰值减去调用前的占用即为这次操作分配的内存
+    alloc_iterations = alloc_iterations or iterations
+    get_traced_memory, reset_peak = tracemalloc.get_traced_memory, tracemalloc.reset_peak
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    allocated = 0
+    peak = 0
+    for i in range(alloc_iterations):
+        current, _ = get_traced_memory()
+        reset_peak()
+        fn(i)
+        _, call_peak = get_traced_memory()
+        allocated += call_peak - current
+        peak = max(peak, call_peak)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    retained_bytes = sum(stat.size_diff for stat in stats)
+    retained_blocks = sum(stat.count_diff for stat in stats)
+
+    return {
+        'iterations': iterations,
+        'p50_us': percentile(samples, 0.50) * to_us,
+        'p90_us': percentile(samples, 0.90) * to_us,
+        'p99_us': percentile(samples, 0.99) * to_us,
+        'max_us': samples[-1] * to_us,
+        'mean_us': sum(samples) / len(samples) * to_us,
+        'alloc_bytes_per_op': allocated / alloc_iterations,
+        'retained_bytes_per_op': retained_bytes / alloc_iterations,
+        'retained_blocks_per_op': retained_blocks / alloc_iterations,
+        'peak_traced_bytes': peak,
+    }
+
+
+def environment() -> Dict[str, str]:
+    """记录运行环境，便于对比不同机器上的结果"""
+    info = {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    try:
+        from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+        info['qt'] = QT_VERSION_STR
+        info['pyqt'] = PYQT_VERSION_STR
+    except ImportError:
+        pass
+    return info
+
+
+def save_results(path: str, results: Dict[str, Dict[str, float]]):
+    """保存结果为JSON"""
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+
+
+# 每次操作分配内存的增加量小于该字节数时不视为回归（避免小整数、缓存命中等噪声）
+ALLOC_NOISE_BYTES = 64
+
+
+def compare_results(baseline_path: str, results: Dict[str, Dict[str, float]],
+                    threshold: float = 0.2, metric: str = 'p50_us',
+                    alloc_threshold: Optional[float] = None) -> List[str]:
+    """
+    与基线结果对比
+
+    Args:
+        threshold: metric 超过基线 (1 + threshold) 倍视为回归
+        alloc_threshold: alloc_bytes_per_op 超过基线的比例，默认与 threshold 相同
+
+    Returns:
+        回归描述列表
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    if alloc_threshold is None:
+        alloc_threshold = threshold
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        if old.get(metric):
+            ratio = result[metric] / old[metric]
+            if ratio > 1 + threshold:
+                regressions.append(f"{name}: {metric} {old[metric]:.2f} -> {result[metric]:.2f} "
+                                   f"(+{(ratio - 1) * 100:.0f}%)")
+        # 旧版本的基线没有该字段
+        old_alloc = old.get('alloc_bytes_per_op')
+        new_alloc = result.get('alloc_bytes_per_op')
+        if old_alloc is not None and new_alloc is not None:
+            if (new_alloc - old_alloc >= ALLOC_NOISE_BYTES
+                    and new_alloc > old_alloc * (1 + alloc_threshold)):
+                regressions.append(f"{name}: alloc_bytes_per_op {old_alloc:.0f} -> {new_alloc:.0f}")
+    return regressions
+
+
+def format_table(results: Dict[str, Dict[str, float]]) -> str:
+    """格式化为文本表格"""
+    lines = [f"{'操作':<36}{'p50(us)':>10}{'p90(us)':>10}{'p99(us)':>10}{'max(us)':>10}"
+             f"{'分配B/op':>10}{'保留B/op':>10}"]
+    for name, r in results.items():
+        lines.append(f"{name:<38}{r['p50_us']:>10.2f}{r['p90_us']:>10.2f}{r['p99_us']:>10.2f}"
+                     f"{r['max_us']:>10.1f}{r['alloc_bytes_per_op']:>10.1f}"
+                     f"{r['retained_bytes_per_op']:>10.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,220 @@
+"""
+采样 → 处理 → 渲染 流程的基准测试
+
+使用模拟电池后端和 Qt offscreen 平台，可以在没有电池、没有显示器的 Linux 机器上运行：
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --compare bench.json --threshold 0.2
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+# 必须在导入 PyQt5 之前设置
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from config.settings import settings
+from core.battery_backends import SysfsBackend
+from core.battery_reader import BatteryReader
+from core.cadence import AdaptiveCadence
+from core.data_processor import DataProcessor
+from core.downsample import HistorySource
+from core.history import HistoryStore
+from core.simulated_backends import SimulatedBackend
+from benchmarks.harness import measure, save_results, compare_results, format_table
+
+
+def sim_backend(step: float = 60.0) -> SimulatedBackend:
+    """步进模式的模拟电池：每次读取前进 step 秒，覆盖放电、充电和充满各个阶段"""
+    return SimulatedBackend(step=step, start=100, seed=1, full_hold=600)
+
+
+def make_samples(count: int = 256) -> list:
+    """预先生成处理后的样本，避免把数据生成的开销计入渲染测试"""
+    reader = BatteryReader(sim_backend(step=300))
+    processor = DataProcessor()
+    return [processor.process_battery_data(reader.get_battery_info()) for _ in range(count)]
+
+
+def bench_core(results: dict, iterations: int):
+    """不依赖 Qt 的部分"""
+    reader = BatteryReader(sim_backend())
+    results['reader.get_battery_info[sim]'] = measure(
+        lambda i: reader.get_battery_info(), iterations)
+
+    if SysfsBackend.is_supported():
+        sysfs_reader = BatteryReader(SysfsBackend())
+        sysfs_reader.cache_duration = 0
+        results['reader.get_battery_info[sysfs]'] = measure(
+            lambda i: sysfs_reader.get_battery_info(), iterations)
+
+    try:
+        from core.battery_backends import PsutilBackend
+        psutil_reader = BatteryReader(PsutilBackend())
+        psutil_reader.cache_duration = 0
+        if psutil_reader.get_battery_info() is not None:
+            results['reader.get_battery_info[psutil]'] = measure(
+                lambda i: psutil_reader.get_battery_info(), iterations)
+    except ImportError:
+        pass
+
+    processor = DataProcessor()
+    raw = [reader.get_battery_info() for _ in range(256)]
+    results['processor.process_battery_data'] = measure(
+        lambda i: processor.process_battery_data(raw[i % len(raw)]), iterations)
+
+    # 完整的一次采样：读取、处理、计算下一次间隔
+    pipeline_reader = BatteryReader(sim_backend(step=5))
+    pipeline_processor = DataProcessor()
+    cadence = AdaptiveCadence(pipeline_reader)
+
+    def pipeline(i):
+        data = pipeline_processor.process_battery_data(pipeline_reader.get_battery_info())
+        cadence.next_interval(data)
+    results['pipeline.sample[sim]'] = measure(pipeline, iterations)
+
+    # 历史曲线降采样：构建开销与记录条数成正比，缓存后的查询和增量更新与记录条数无关
+    history = HistoryStore(50000)
+    start = time.time() - 50000 * 5
+    for i in range(50000):
+        history.append(start + i * 5, 50 + 50 * math.sin(i / 2000), i % 5000 < 800, 0)
+    results['downsample.build[50k->300px]'] = measure(
+        lambda i: HistorySource(history).get(24 * 3600 * 3, 300), max(1, iterations // 50))
+    source = HistorySource(history)
+    source.get(24 * 3600 * 3, 300)
+    results['downsample.get[cached]'] = measure(
+        lambda i: source.get(24 * 3600 * 3, 300), iterations)
+    results['downsample.add'] = measure(
+        lambda i: source.add(time.time() + i, 50.0, False), iterations)
+
+    # 长时间范围查询：读取汇总层级与遍历全部磁盘原始记录对比
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.bin')
+        stores = {
+            'raw': HistoryStore(1024, path),
+            'rollup': HistoryStore(1024, path + '.tiered', rollups=settings.history_rollups),
+        }
+        span = 30 * 86400
+        start = time.time() - span
+        for store in stores.values():
+            for i in range(span // 5):
+                store.append(start + i * 5, 50 + 50 * math.sin(i / 2000), i % 5000 < 800, 0)
+        results['history.append[rollup]'] = measure(
+            lambda i: stores['rollup'].append(time.time() + i, 50.0, False, 0), iterations)
+        for name, store in stores.items():
+            results[f'downsample.build[30d->300px,{name}]'] = measure(
+                lambda i: HistorySource(store).get(span, 300), max(1, iterations // 200))
+            store.close()
+
+
+def bench_qt(results: dict, iterations: int):
+    """界面部分（offscreen 平台）"""
+    try:
+        from PyQt5.QtWidgets import QApplication
+        from PyQt5.QtCore import QPoint
+    except ImportError:
+        print("未安装 PyQt5，跳过界面基准测试", file=sys.stderr)
+        return
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    from core.battery_reader import battery_reader
+    battery_reader.set_backend(sim_backend())
+    from config_manager import ConfigManager
+    from ui.qt_overlay import BatteryOverlay
+    from ui.painted_overlay import PaintedOverlay
+    from ui.tray_icon import TrayIconRenderer
+
+    config_manager = ConfigManager()
+    overlay = BatteryOverlay(config_manager)
+    overlay.stop_monitoring()
+    overlay.show()
+    app.processEvents()
+
+    samples = make_samples()
+    fixed = samples[0]
+    results['overlay.update_display[unchanged]'] = measure(
+        lambda i: overlay.update_display(fixed), iterations)
+    results['overlay.update_display[changing]'] = measure(
+        lambda i: overlay.update_display(samples[i % len(samples)]), iterations)
+
+    def paint(i):
+        overlay.update_display(samples[i % len(samples)])
+        overlay.percentage_label.repaint()
+    results['overlay.update_display+repaint'] = measure(paint, max(1, iterations // 4))
+
+    style = overlay.style_cache.get('high', True, overlay.percentage_label.height())
+    results['overlay.apply_gradient_text'] = measure(
+        lambda i: overlay.apply_gradient_text(style.brush), iterations)
+
+    painted = PaintedOverlay(config_manager)
+    painted.stop_monitoring()
+    painted.show()
+    app.processEvents()
+
+    def paint_painted(i):
+        painted.update_display(samples[i % len(samples)])
+        painted.repaint(painted._text_rect)
+    results['painted.update_display+repaint'] = measure(paint_painted, max(1, iterations // 4))
+    painted.close()
+
+    renderer = TrayIconRenderer()
+    keys = [renderer.bucket(sample) for sample in samples]
+    results['tray.render_icon[cold]'] = measure(
+        lambda i: renderer._render(*keys[i % len(keys)]), max(1, iterations // 4))
+    results['tray.get_icon[cached]'] = measure(
+        lambda i: renderer.get_icon(keys[i % len(keys)]), iterations)
+
+    positions = [QPoint(i % 500, i % 300) for i in range(64)]
+    results['config.set_window_position'] = measure(
+        lambda i: config_manager.set_window_position(positions[i % len(positions)]), iterations)
+    results['config.flush[disk write]'] = measure(
+        lambda i: (config_manager.set_transparency(10 + i % 90), config_manager.flush()),
+        max(1, iterations // 10))
+
+    overlay.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="电池监控基准测试")
+    parser.add_argument("--iterations", type=int, default=2000, help="每个操作的迭代次数")
+    parser.add_argument("--output", default="bench_results.json", help="结果JSON文件")
+    parser.add_argument("--compare", metavar="BASELINE", help="与基线结果JSON对比")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="p50 或每次操作分配的内存超过基线多少比例视为回归（默认0.2）")
+    parser.add_argument("--no-qt", action="store_true", help="只运行不依赖 Qt 的部分")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    # 不写入真实的历史记录和配置文件
+    settings.history_file = None
+    workdir = tempfile.mkdtemp(prefix="battery-bench-")
+    os.chdir(workdir)
+
+    results = {}
+    bench_core(results, args.iterations)
+    if not args.no_qt:
+        bench_qt(results, args.iterations)
+
+    print(format_table(results))
+    save_results(output, results)
+    print(f"结果已保存到 {output}")
+
+    if baseline:
+        regressions = compare_results(baseline, results, args.threshold)
+        if regressions:
+            print("性能回归:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("与基线相比没有性能回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
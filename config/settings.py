@@ -2,6 +2,8 @@
 配置设置模块
 """
 
+import os
+
 class Settings:
     """程序配置类"""
     
@@ -16,6 +18,34 @@ class Settings:
         
         # 更新设置
         self.update_interval = 5  # 更新间隔(秒)
+        self.adaptive_sampling = True   # 根据电量变化速率自动调整采样间隔
+        self.min_update_interval = 1    # 自适应模式下的最短间隔(秒)
+        self.max_update_interval = 300  # 自适应模式下的最长间隔(秒)
+        self.event_driven = True        # Linux 下监听内核电源事件，事件到达时立即采样
+        self.event_safety_interval = 120  # 监听电源事件时的兜底采样间隔(秒)
+        self.idle_sampling = True       # 没有可见的读数使用者时放慢采样，锁屏时暂停
+        self.idle_update_interval = 300   # 悬浮窗隐藏、只有托盘图标时的采样间隔(秒)
+        self.timer_slack = 0.1          # 采样线程的定时器松弛时间(秒)，让内核合并定时唤醒
+        self.battery_view = None        # 显示的电池设备名，None表示所有系统电池的合计
+        self.metrics_address = None     # Prometheus 指标服务地址("port" 或 "host:port")，None表示不启用
+        self.fleet_address = None       # 多机汇总收集服务地址("host:port" 或 "udp://host:port")
+        self.overlay_mode = None        # 悬浮窗模式("widget"/"painted")，None表示使用用户配置
+        
+        # 电池数据后端: "auto"(Linux优先使用sysfs) / "sysfs" / "psutil"，
+        # 以及用于测试的 "sim:..." / "replay:..."，可用环境变量 BATTERY_BACKEND 覆盖
+        self.battery_backend = os.environ.get("BATTERY_BACKEND", "auto")
+        
+        # 历史记录设置
+        self.history_capacity = 4096                 # 内存中保留的记录条数
+        self.history_file = "battery_history.bin"    # 磁盘记录文件，None表示不保存
+        self.history_retention = 7 * 86400           # 磁盘原始记录保留时长(秒)，None表示不删除
+        # 汇总层级: 桶宽(秒) -> 保留时长(秒，None表示不删除)，保存在记录文件旁的 .1m/.1h/.1d 文件中
+        self.history_rollups = {
+            60: 90 * 86400,
+            3600: 730 * 86400,
+            86400: None,
+        }
+        self.history_compact_interval = 86400        # 后台删除过期记录的间隔(秒)
         
         # 颜色设置
         self.colors = {
@@ -42,6 +72,24 @@ class Settings:
             'medium': 30,
             'low': 15,
         }
+        
+        # 颜色、阈值或字体修改后递增，用于让查找表和样式缓存失效
+        self.revision = 0
+    
+    def set_battery_levels(self, **levels):
+        """修改电池级别阈值"""
+        self.battery_levels.update(levels)
+        self.revision += 1
+    
+    def set_colors(self, **colors):
+        """修改颜色设置"""
+        self.colors.update(colors)
+        self.revision += 1
+    
+    def set_fonts(self, **fonts):
+        """修改字体设置"""
+        self.fonts.update(fonts)
+        self.revision += 1
 
 
 # 全局配置实例
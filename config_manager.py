@@ -2,14 +2,43 @@
 配置管理器
 """
 
+import atexit
 import json
 import os
-from PyQt5.QtCore import QObject, pyqtSignal
+import time
+from contextlib import contextmanager
+from PyQt5.QtCore import Qt, QObject, QFileSystemWatcher, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
+from utils.diagnostics import diagnostics
+from utils.persistence import DebouncedJsonWriter
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+# 各配置项的校验函数，不合法的值在加载时替换为默认值
+VALIDATORS = {
+    "font_family": lambda value: isinstance(value, str) and bool(value),
+    "font_size": lambda value: _is_int(value) and 1 <= value <= 200,
+    "font_bold": lambda value: isinstance(value, bool),
+    "font_italic": lambda value: isinstance(value, bool),
+    "show_overlay": lambda value: isinstance(value, bool),
+    "transparency": lambda value: _is_int(value) and 10 <= value <= 100,
+    "window_position": lambda value: (isinstance(value, list) and len(value) == 2
+                                      and all(_is_int(item) for item in value)),
+    "battery_view": lambda value: value is None or isinstance(value, str),
+    "overlay_mode": lambda value: value in ("widget", "painted"),
+}
 
 
 class ConfigManager(QObject):
-    config_changed = pyqtSignal()
+    # 携带发生变化的配置项名称(frozenset)，订阅者只处理自己关心的配置项
+    config_changed = pyqtSignal(object)
+    
+    FONT_KEYS = frozenset(("font_family", "font_size", "font_bold", "font_italic"))
+    # 外部修改配置文件后，等待写入静止多少毫秒再重新加载
+    RELOAD_DELAY = 200
     
     def __init__(self):
         super().__init__()
@@ -21,54 +50,214 @@ class ConfigManager(QObject):
             "font_italic": False,
             "show_overlay": True,
             "transparency": 100,  # 默认透明度100%
-            "window_position": [100, 50]
+            "window_position": [100, 50],
+            "battery_view": None,  # 显示的电池设备名，None表示系统电池合计
+            "overlay_mode": "widget"  # 悬浮窗模式: "widget"(标签) / "painted"(自绘，占用更低)
         }
+        self._file_signature = None
         self.config = self.load_config()
+        # 由配置派生的对象，相关配置项变化时才重新构建
+        self._font = None
+        
+        # 后台延迟写入：短时间内的多次修改只落盘一次
+        self.writer = DebouncedJsonWriter(self.config_file, delay=0.5)
+        atexit.register(self.writer.close)
+        
+        # 批量更新嵌套深度，以及尚未通知的配置项
+        self._batch_depth = 0
+        self._changed_keys = set()
+        
+        # 监视配置文件，手动编辑或由其他程序下发的配置无需重启即可生效
+        self.setup_watcher()
     
     def load_config(self):
-        if os.path.exists(self.config_file):
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        else:
+        data = self.read_config_file()
+        if data is None:
             return self.default_config.copy()
+        return self.validate_config(data)
+    
+    def read_config_file(self):
+        """
+        读取配置文件
+        
+        Returns:
+            解析后的数据，文件不存在或无法解析时为None
+        """
+        path = os.path.abspath(self.config_file)
+        try:
+            stat = os.stat(path)
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"读取配置文件时出错: {e}")
+            return None
+        self._file_signature = (stat.st_mtime_ns, stat.st_size)
+        return data
+    
+    def validate_config(self, data):
+        """与默认配置合并并校验，不合法的配置项使用默认值"""
+        config = self.default_config.copy()
+        if not isinstance(data, dict):
+            print("配置文件格式错误，使用默认配置")
+            return config
+        for key, value in data.items():
+            validator = VALIDATORS.get(key)
+            if validator is not None and not validator(value):
+                print(f"配置项 {key} 的值无效: {value!r}，使用默认值 {config[key]!r}")
+                continue
+            config[key] = value
+        return config
+    
+    def setup_watcher(self):
+        """监视配置文件及其所在目录（原子写入会替换文件）"""
+        path = os.path.abspath(self.config_file)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.addPath(os.path.dirname(path))
+        if os.path.exists(path):
+            self.watcher.addPath(path)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.watcher.directoryChanged.connect(self.on_file_changed)
+        
+        # 合并短时间内的多次文件事件
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setTimerType(Qt.CoarseTimer)
+        self.reload_timer.setInterval(self.RELOAD_DELAY)
+        self.reload_timer.timeout.connect(self.reload)
+    
+    def on_file_changed(self, path):
+        self.reload_timer.start()
+    
+    def reload(self):
+        """
+        重新加载配置文件中的外部修改
+        
+        Returns:
+            bool: 是否有配置项发生变化
+        """
+        path = os.path.abspath(self.config_file)
+        if os.path.exists(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+        # 本程序还有未落盘的修改时以内存中的配置为准，写入后会再次触发检查；
+        # 写入失败、等待重试时不算，文件中的外部修改照常加载
+        if self.writer.has_pending():
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if (stat.st_mtime_ns, stat.st_size) == self._file_signature:
+            return False
+        data = self.read_config_file()
+        if data is None:
+            return False
+        
+        config = self.validate_config(data)
+        changed = frozenset(key for key in config.keys() | self.config.keys()
+                            if config.get(key) != self.config.get(key))
+        if not changed:
+            return False
+        # 外部修改比等待重试写入的快照新，放弃快照，避免重试时覆盖外部修改
+        self.writer.discard()
+        self.config = config
+        self._invalidate(changed)
+        diagnostics.count('config.reloads')
+        self.config_changed.emit(changed)
+        return True
+    
+    def _invalidate(self, keys):
+        """丢弃依赖于已变化配置项的派生对象"""
+        if not self.FONT_KEYS.isdisjoint(keys):
+            self._font = None
     
     def save_config(self):
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=4)
-        self.config_changed.emit()
+        """提交配置：安排后台写入并通知变更"""
+        if self._batch_depth:
+            return
+        # 未记录具体配置项时视为全部变化
+        keys = frozenset(self._changed_keys) or frozenset(self.config)
+        self._changed_keys.clear()
+        # 包括变更通知触发的界面更新
+        started = time.perf_counter()
+        self.writer.schedule(self.config)
+        self.config_changed.emit(keys)
+        diagnostics.record('config.save', time.perf_counter() - started)
+    
+    def flush(self):
+        """立即写入尚未落盘的配置"""
+        self.writer.flush()
+    
+    @contextmanager
+    def transaction(self):
+        """批量更新：期间的所有修改合并为一次写入和一次变更通知"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._changed_keys:
+                self.save_config()
+    
+    def update(self, **keys):
+        """
+        批量修改配置项，值未变化时不写入也不通知
+        
+        Returns:
+            bool: 是否有配置项发生变化
+        """
+        changed = {key: value for key, value in keys.items()
+                   if self.config.get(key) != value}
+        if not changed:
+            return False
+        self.config.update(changed)
+        self._changed_keys.update(changed)
+        self._invalidate(changed)
+        self.save_config()
+        return True
     
     def get_font(self):
-        font = QFont()
-        font.setFamily(self.config["font_family"])
-        font.setPointSize(self.config["font_size"])
-        font.setBold(self.config["font_bold"])
-        font.setItalic(self.config["font_italic"])
-        return font
+        """获取字体（缓存的对象，调用方不要修改）"""
+        if self._font is None:
+            font = QFont()
+            font.setFamily(self.config["font_family"])
+            font.setPointSize(self.config["font_size"])
+            font.setBold(self.config["font_bold"])
+            font.setItalic(self.config["font_italic"])
+            self._font = font
+        return self._font
     
     def set_font(self, font_family, font_size, bold, italic):
-        self.config["font_family"] = font_family
-        self.config["font_size"] = font_size
-        self.config["font_bold"] = bold
-        self.config["font_italic"] = italic
-        self.save_config()
+        self.update(font_family=font_family, font_size=font_size,
+                    font_bold=bold, font_italic=italic)
     
     def set_show_overlay(self, show):
-        self.config["show_overlay"] = show
-        self.save_config()
+        self.update(show_overlay=show)
     
     def get_show_overlay(self):
         return self.config["show_overlay"]
     
     def set_transparency(self, transparency):
-        self.config["transparency"] = transparency
-        self.save_config()
+        self.update(transparency=transparency)
     
     def get_transparency(self):
         return self.config.get("transparency", 100)
     
     def set_window_position(self, pos):
-        self.config["window_position"] = [pos.x(), pos.y()]
-        self.save_config()
+        self.update(window_position=[pos.x(), pos.y()])
     
     def get_window_position(self):
-        return self.config["window_position"]
\ No newline at end of file
+        return self.config["window_position"]
+    
+    def set_battery_view(self, name):
+        self.update(battery_view=name)
+    
+    def get_battery_view(self):
+        return self.config.get("battery_view")
+    
+    def set_overlay_mode(self, mode):
+        self.update(overlay_mode=mode)
+    
+    def get_overlay_mode(self):
+        return self.config.get("overlay_mode", "widget")
\ No newline at end of file
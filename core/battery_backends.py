@@ -0,0 +1,414 @@
+"""
+电池数据后端模块
+"""
+
+import os
+import sys
+import time
+from collections import namedtuple
+from typing import Optional
+from config.settings import settings
+
+# 与 psutil 的常量取值保持一致
+POWER_TIME_UNKNOWN = -1
+POWER_TIME_UNLIMITED = -2
+
+# 与 psutil.sensors_battery() 返回值字段一致
+BatteryStatus = namedtuple('BatteryStatus', ['percent', 'secsleft', 'power_plugged'])
+
+# 单个电池设备的读数，能量单位为 µWh，功率单位为 µW
+DeviceStatus = namedtuple('DeviceStatus', ['name', 'model', 'scope', 'percent', 'secsleft',
+                                           'power_plugged', 'energy_now', 'energy_full',
+                                           'power_now', 'status'])
+
+
+class BatteryBackend:
+    """电池数据后端接口"""
+
+    name = "base"
+    # 后端时钟相对真实时间的倍速，模拟后端可以大于1
+    speed = 1.0
+    # 读数是否来自模拟/回放（时间戳与真实时间无关，不写入磁盘历史记录）
+    simulated = False
+    # 最近一次 read() 中读到的各个电池设备(DeviceStatus)，不支持时为空
+    devices = ()
+
+    def now(self) -> float:
+        """后端时钟的当前时间(秒)，读数的时间戳以此为准"""
+        return time.time()
+
+    def read(self) -> Optional[BatteryStatus]:
+        """
+        读取一次电池状态
+
+        Returns:
+            BatteryStatus，没有电池时返回None
+        """
+        raise NotImplementedError
+
+    def devices_changed(self):
+        """电源设备被添加或移除时调用"""
+
+    def close(self):
+        """释放后端持有的资源"""
+
+
+class PsutilBackend(BatteryBackend):
+    """基于 psutil.sensors_battery() 的通用后端"""
+
+    name = "psutil"
+
+    def __init__(self):
+        import psutil
+        self._sensors_battery = psutil.sensors_battery
+
+    def read(self) -> Optional[BatteryStatus]:
+        return self._sensors_battery()
+
+
+class SysfsAttribute:
+    """常驻打开的 sysfs 属性文件，每次用 pread 从头重新读取"""
+
+    __slots__ = ('path', 'fd')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self) -> str:
+        return os.pread(self.fd, 64, 0).decode('ascii', 'replace').strip()
+
+    def read_int(self) -> int:
+        return int(self.read())
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class SysfsSupply:
+    """
+    一个电池设备（系统电池或外设电池）
+
+    创建时确定读数来源：有 energy_* 时直接使用能量(µWh)；只有 charge_* 时
+    按设计最低电压（没有时按当前电压）换算为能量，以便多块电池按能量加权，
+    电压都读不到时不提供能量，合计时改为按百分比平均；都没有时读取 capacity，
+    外设常见的只有 capacity_level 时按级别估算百分比。
+    """
+
+    __slots__ = ('name', 'model', 'scope', 'status', 'capacity', 'capacity_level',
+                 'now', 'full', 'rate', 'scale', 'voltage')
+
+    # capacity_level 对应的估算百分比
+    CAPACITY_LEVELS = {'full': 100.0, 'high': 80.0, 'normal': 60.0,
+                       'low': 20.0, 'critical': 5.0}
+
+    def __init__(self, path: str, open_attr, read_file):
+        self.name = os.path.basename(path)
+        self.model = read_file(os.path.join(path, 'model_name')) or self.name
+        self.scope = read_file(os.path.join(path, 'scope')) or 'System'
+        self.status = open_attr(os.path.join(path, 'status'))
+        self.capacity = open_attr(os.path.join(path, 'capacity'))
+        self.capacity_level = None
+        # µAh -> µWh 的换算系数，为None时每次按 voltage_now 换算
+        self.scale = 1.0
+        self.voltage = None
+
+        self.now = open_attr(os.path.join(path, 'energy_now'))
+        self.full = open_attr(os.path.join(path, 'energy_full'))
+        self.rate = open_attr(os.path.join(path, 'power_now'))
+        if self.now is None:
+            self.now = open_attr(os.path.join(path, 'charge_now'))
+            self.full = open_attr(os.path.join(path, 'charge_full'))
+            self.rate = open_attr(os.path.join(path, 'current_now'))
+            voltage = read_file(os.path.join(path, 'voltage_min_design'))
+            if voltage and voltage.isdigit() and int(voltage):
+                # µAh × µV / 10^6 = µWh
+                self.scale = int(voltage) / 1e6
+            else:
+                self.scale = None
+                self.voltage = open_attr(os.path.join(path, 'voltage_now'))
+        if self.now is None or self.full is None:
+            self._close(self.now, self.full, self.rate, self.voltage)
+            self.now = self.full = self.rate = self.voltage = None
+        if self.now is None and self.capacity is None:
+            self.capacity_level = open_attr(os.path.join(path, 'capacity_level'))
+
+    @property
+    def usable(self) -> bool:
+        """是否有可用的电量来源"""
+        return (self.now is not None or self.capacity is not None
+                or self.capacity_level is not None)
+
+    @staticmethod
+    def _int(handle: Optional[SysfsAttribute]) -> Optional[int]:
+        if handle is None:
+            return None
+        try:
+            return handle.read_int()
+        except ValueError:
+            return None
+
+    def read(self):
+        """
+        读取一次设备状态
+
+        Returns:
+            (百分比, 状态, 当前能量, 满电能量, 功率)，能量和功率不可用时为None
+        """
+        status = self.status.read().lower() if self.status is not None else ''
+        energy_now = energy_full = power_now = None
+        percent = None
+        if self.now is not None:
+            energy_now = self._int(self.now)
+            energy_full = self._int(self.full)
+            if energy_now is not None and energy_full:
+                percent = min(100.0, 100.0 * energy_now / energy_full)
+                scale = self.scale
+                if scale is None:
+                    voltage = self._int(self.voltage)
+                    scale = voltage / 1e6 if voltage else None
+                if scale is not None:
+                    energy_now *= scale
+                    energy_full *= scale
+                    rate = self._int(self.rate)
+                    power_now = abs(rate) * scale if rate is not None else None
+                else:
+                    # 无法换算为能量，不能与其他电池的 µWh 相加
+                    energy_now = energy_full = None
+            else:
+                energy_now = energy_full = None
+        if percent is None and self.capacity is not None:
+            value = self._int(self.capacity)
+            percent = float(value) if value is not None else None
+        if percent is None and self.capacity_level is not None:
+            percent = self.CAPACITY_LEVELS.get(self.capacity_level.read().lower())
+        return percent, status, energy_now, energy_full, power_now
+
+    @staticmethod
+    def _close(*handles):
+        for handle in handles:
+            if handle is not None:
+                handle.close()
+
+    def close(self):
+        self._close(self.status, self.capacity, self.capacity_level,
+                    self.now, self.full, self.rate, self.voltage)
+
+
+class SysfsBackend(BatteryBackend):
+    """
+    Linux sysfs 后端
+
+    只在创建时扫描一次 /sys/class/power_supply，之后保持属性文件打开，
+    每次采样对每个设备只做几次 pread，不再重复遍历目录和打开文件。
+    系统电池(可能有多块)按能量加权合并为一个读数，外设电池只出现在 devices 中；
+    只有外设电池时 read() 返回None，devices 中仍有各个外设的读数。
+    """
+
+    name = "sysfs"
+    ROOT = "/sys/class/power_supply"
+
+    def __init__(self, root: str = ROOT):
+        self.root = root
+        self.supplies = []  # SysfsSupply，系统电池在前
+        self.mains = []     # 外接电源的 online 属性
+        self.devices = ()
+        self._stale = False
+        self._discover()
+
+    @classmethod
+    def is_supported(cls, root: str = ROOT) -> bool:
+        """检查当前系统是否存在可用的 sysfs 电池"""
+        if not sys.platform.startswith('linux') or not hasattr(os, 'pread'):
+            return False
+        try:
+            return any(cls._read_file(os.path.join(root, name, 'type')) == 'Battery'
+                       for name in os.listdir(root))
+        except OSError:
+            return False
+
+    @staticmethod
+    def _read_file(path: str) -> Optional[str]:
+        try:
+            with open(path) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _open(self, path: str) -> Optional[SysfsAttribute]:
+        try:
+            return SysfsAttribute(path)
+        except OSError:
+            return None
+
+    def _discover(self):
+        """扫描电源设备并打开需要的属性文件"""
+        self.close()
+        supplies = []
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            supply_type = self._read_file(os.path.join(path, 'type'))
+            if supply_type == 'Battery':
+                supply = SysfsSupply(path, self._open, self._read_file)
+                if supply.usable:
+                    supplies.append(supply)
+                else:
+                    supply.close()
+            elif supply_type in ('Mains', 'USB'):
+                handle = self._open(os.path.join(path, 'online'))
+                if handle is not None:
+                    self.mains.append(handle)
+        supplies.sort(key=lambda supply: supply.scope == 'Device')
+        self.supplies = supplies
+        self._stale = False
+
+    def devices_changed(self):
+        self._stale = True
+
+    def read(self) -> Optional[BatteryStatus]:
+        if self._stale:
+            self._discover()
+        if not self.supplies:
+            self.devices = ()
+            return None
+        try:
+            return self._read_status()
+        except OSError:
+            # 设备被移除或驱动重新加载，下次重新扫描
+            self._stale = True
+            return None
+
+    def _read_status(self) -> Optional[BatteryStatus]:
+        mains_online = any(handle.read() == '1' for handle in self.mains) if self.mains else None
+        devices = []
+        system = []
+        for supply in self.supplies:
+            try:
+                percent, status, energy_now, energy_full, power_now = supply.read()
+            except OSError:
+                if supply.scope != 'Device':
+                    raise
+                # 外设断开：跳过，下次重新扫描
+                self._stale = True
+                continue
+            if percent is None:
+                continue
+            if supply.scope == 'Device':
+                plugged = status in ('charging', 'full')
+            elif mains_online is not None:
+                plugged = mains_online
+            else:
+                plugged = status != 'discharging'
+            devices.append(DeviceStatus(
+                supply.name, supply.model, supply.scope, percent,
+                self._secsleft(plugged, energy_now, power_now), plugged,
+                energy_now, energy_full, power_now, status))
+            if supply.scope != 'Device':
+                system.append(devices[-1])
+        self.devices = tuple(devices)
+        if not system:
+            return None
+        return self._aggregate(system, mains_online)
+
+    @staticmethod
+    def _secsleft(plugged: bool, energy_now, power_now) -> int:
+        if plugged:
+            return POWER_TIME_UNLIMITED
+        if energy_now is not None and power_now:
+            return int(energy_now / power_now * 3600)
+        return POWER_TIME_UNKNOWN
+
+    def _aggregate(self, system: list, mains_online: Optional[bool]) -> BatteryStatus:
+        """把多块系统电池合并为一个读数"""
+        if len(system) == 1:
+            device = system[0]
+            return BatteryStatus(device.percent, device.secsleft, device.power_plugged)
+
+        if all(device.energy_full for device in system):
+            # 按能量加权：容量大的电池占比大
+            energy_now = sum(device.energy_now for device in system)
+            energy_full = sum(device.energy_full for device in system)
+            percent = min(100.0, 100.0 * energy_now / energy_full)
+        else:
+            energy_now = None
+            percent = sum(device.percent for device in system) / len(system)
+
+        if mains_online is not None:
+            plugged = mains_online
+        else:
+            # 任意一块在放电即视为使用电池（另一块可能处于空闲状态）
+            plugged = not any(device.status == 'discharging' for device in system)
+        power_now = sum(device.power_now or 0 for device in system)
+        return BatteryStatus(percent, self._secsleft(plugged, energy_now, power_now), plugged)
+
+    def close(self):
+        for supply in self.supplies:
+            supply.close()
+        for handle in self.mains:
+            handle.close()
+        self.supplies = []
+        self.mains = []
+
+
+def parse_backend_spec(spec: str):
+    """
+    解析后端描述字符串
+
+    格式为 "名称[:参数,参数,...]"，参数可以是位置参数或 key=value，例如
+    "sim:speed=1000,start=80" 或 "replay:trace.jsonl,speed=3600"。
+
+    Returns:
+        (名称, 位置参数列表, 关键字参数字典)
+    """
+    name, _, rest = spec.partition(':')
+    args, kwargs = [], {}
+    for part in filter(None, rest.split(',')):
+        key, sep, value = part.partition('=')
+        if sep:
+            kwargs[key.strip()] = _parse_value(value.strip())
+        else:
+            args.append(part.strip())
+    return name.strip(), args, kwargs
+
+
+def is_simulated_spec(spec: str) -> bool:
+    """后端描述是否为模拟或回放后端"""
+    return parse_backend_spec(spec)[0] in ("sim", "replay")
+
+
+def _parse_value(value: str):
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    if value.lower() in ('true', 'false'):
+        return value.lower() == 'true'
+    return value
+
+
+def create_backend(spec: str = None) -> BatteryBackend:
+    """
+    创建电池数据后端
+
+    Args:
+        spec: 后端描述("auto"/"sysfs"/"psutil"/"sim:..."/"replay:...")，
+              默认取 settings.battery_backend
+
+    Returns:
+        BatteryBackend实例
+    """
+    name, args, kwargs = parse_backend_spec(spec or settings.battery_backend)
+    if name == "sim":
+        from core.simulated_backends import SimulatedBackend
+        return SimulatedBackend(*args, **kwargs)
+    if name == "replay":
+        from core.simulated_backends import TraceReplayBackend
+        return TraceReplayBackend(*args, **kwargs)
+    if name == "sysfs" or (name == "auto" and SysfsBackend.is_supported()):
+        return SysfsBackend(*args)
+    if name not in ("auto", "psutil"):
+        raise ValueError(f"未知的电池数据后端: {name}")
+    return PsutilBackend()
@@ -2,48 +2,92 @@
 电池数据读取模块
 """
 
-import psutil
-from typing import Optional, Dict, Any
-import time
+from typing import Optional
+from config.settings import settings
+from core.battery_backends import (POWER_TIME_UNKNOWN, BatteryBackend, create_backend,
+                                   is_simulated_spec)
+from core.history import HistoryStore
+from core.reading import BatteryReading
 
 
 class BatteryReader:
-    """电池数据读取器"""
+    """
+    电池数据读取器
     
-    def __init__(self):
-        self.last_read_time = None
+    最近一次读数作为不可修改的 BatteryReading 缓存在 cached_data 中，
+    更新时整体替换引用，其他线程读取到的总是完整的一条读数。
+    """
+    
+    def __init__(self, backend: Optional[BatteryBackend] = None):
+        self._backend = backend  # 为None时在第一次读取时自动选择
         self.cached_data = None
         self.cache_duration = 2  # 缓存时间(秒)
+        # 每次实际读取的记录：内存环形缓冲区 + 磁盘记录文件 + 汇总层级
+        # 模拟/回放后端的时间戳不是真实时间，只保存在内存中，不混入磁盘上的真实记录
+        simulated = (backend.simulated if backend is not None
+                     else is_simulated_spec(settings.battery_backend))
+        self.history = HistoryStore(settings.history_capacity,
+                                    None if simulated else settings.history_file,
+                                    settings.history_retention, settings.history_rollups)
+    
+    @property
+    def backend(self) -> BatteryBackend:
+        """当前使用的电池数据后端"""
+        if self._backend is None:
+            self._backend = create_backend()
+        return self._backend
+    
+    def set_backend(self, backend: BatteryBackend):
+        """切换电池数据后端，并清空缓存和历史"""
+        if self._backend is not None:
+            self._backend.close()
+        self._backend = backend
+        self.cached_data = None
+        self.history.clear()
+        if backend.simulated:
+            self.history.detach_file()
+    
+    def invalidate_cache(self):
+        """使缓存失效，下一次读取一定会访问硬件（例如收到电源事件后）"""
+        self.cached_data = None
     
-    def get_battery_info(self) -> Optional[Dict[str, Any]]:
+    def get_battery_info(self, use_cache: bool = True) -> Optional[BatteryReading]:
         """
         获取电池信息
         
+        Args:
+            use_cache: 为False时跳过缓存，一定访问硬件
+        
         Returns:
-            Dict包含电池信息，如果无法获取返回None
+            BatteryReading，如果无法获取返回None
         """
         try:
             # 检查缓存
-            current_time = time.time()
-            if (self.cached_data and self.last_read_time and 
-                current_time - self.last_read_time < self.cache_duration):
-                return self.cached_data
+            current_time = self.backend.now()
+            cached = self.cached_data
+            if (use_cache and cached is not None
+                    and current_time - cached.timestamp < self.cache_duration):
+                return cached
             
-            battery = psutil.sensors_battery()
+            battery = self.backend.read()
+            # devices 为同一次读取中得到的各个电池设备（系统电池和外设）
+            devices = self.backend.devices
             
             if battery is None:
-                return None
+                if not devices:
+                    return None
+                # 只有外设电池：没有系统电量，读数中只有各个外设
+                data = BatteryReading(None, False, POWER_TIME_UNKNOWN, current_time, devices)
+                self.cached_data = data
+                return data
             
-            data = {
-                'percent': round(battery.percent),
-                'plugged': battery.power_plugged,
-                'secsleft': battery.secsleft,
-                'timestamp': current_time
-            }
+            data = BatteryReading(round(battery.percent), battery.power_plugged,
+                                  battery.secsleft, current_time, devices, battery.percent)
             
             # 更新缓存
             self.cached_data = data
-            self.last_read_time = current_time
+            self.history.append(current_time, battery.percent,
+                                battery.power_plugged, battery.secsleft)
             
             return data
             
@@ -51,10 +95,46 @@ class BatteryReader:
             print(f"读取电池信息时出错: {e}")
             return None
     
+    def get_recent_slope(self, window: float = 600) -> Optional[float]:
+        """
+        计算最近一段时间内电量的变化速率
+        
+        只使用最近一次充电状态切换之后的读数，避免插拔电源前后的数据混在一起。
+        
+        Args:
+            window: 时间窗口(秒)
+            
+        Returns:
+            电量变化速率(百分比/秒)，读数不足时返回None
+        """
+        ring = self.history.ring
+        if len(ring) < 2:
+            return None
+        
+        latest_time, _, latest_plugged, _ = ring[-1]
+        points = []
+        for timestamp, percent, plugged, _ in ring.iter_reversed():
+            if plugged != latest_plugged or latest_time - timestamp > window:
+                break
+            points.append((timestamp, percent))
+        
+        if len(points) < 2:
+            return None
+        
+        # 最小二乘拟合斜率
+        n = len(points)
+        mean_t = sum(t for t, _ in points) / n
+        mean_p = sum(p for _, p in points) / n
+        var_t = sum((t - mean_t) ** 2 for t, _ in points)
+        if var_t == 0:
+            return None
+        cov = sum((t - mean_t) * (p - mean_p) for t, p in points)
+        return cov / var_t
+    
     def is_battery_available(self) -> bool:
         """检查电池是否可用"""
         try:
-            battery = psutil.sensors_battery()
+            battery = self.backend.read()
             return battery is not None
         except:
             return False
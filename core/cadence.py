@@ -0,0 +1,97 @@
+"""
+自适应采样节奏模块
+"""
+
+from typing import Optional
+from config.settings import settings
+from core.reading import ProcessedReading
+
+
+class AdaptiveCadence:
+    """
+    自适应采样节奏
+
+    电量稳定或已充满时逐步放慢采样；接近颜色阈值、
+    或充电状态刚切换时加快采样，保证阈值跨越能及时显示。
+    """
+
+    # 充电状态切换后保持最短间隔的采样次数
+    FLIP_FAST_TICKS = 3
+    # 稳定状态下每次放慢的倍数
+    BACKOFF_FACTOR = 1.5
+    # 预计到达阈值前希望采样的次数
+    SAMPLES_PER_CROSSING = 4
+    # 低于该速率(百分比/秒)视为电量稳定
+    STABLE_SLOPE = 0.5 / 3600
+
+    def __init__(self, reader, base_interval: float = None,
+                 min_interval: float = None, max_interval: float = None):
+        """
+        Args:
+            reader: 电池读取器，提供 get_recent_slope() 和 backend
+            base_interval: 读数不足时使用的默认间隔(秒)
+            min_interval: 最短间隔(秒)
+            max_interval: 最长间隔(秒)
+        """
+        self.reader = reader
+        self.base_interval = base_interval or settings.update_interval
+        self.min_interval = min_interval or settings.min_update_interval
+        self.max_interval = max_interval or settings.max_update_interval
+
+        self.current_interval = self.base_interval
+        self._last_plugged = None
+        self._fast_ticks = 0
+
+    def next_interval(self, data: Optional[ProcessedReading]) -> float:
+        """
+        根据最新的读数计算下一次采样间隔
+
+        Args:
+            data: 最新的电池数据，None表示本次读取失败
+
+        Returns:
+            下一次采样间隔(秒)
+        """
+        if not data or data.percent is None:
+            interval = self.base_interval
+        else:
+            interval = self._compute(data.percent, data.plugged)
+        self.current_interval = max(self.min_interval, min(self.max_interval, interval))
+        # 间隔按电池时钟计算，模拟后端加速运行时按倍速换算为真实时间
+        return self.current_interval / self.reader.backend.speed
+
+    def _compute(self, percent: float, plugged: bool) -> float:
+        # 充电状态刚切换
+        if self._last_plugged is not None and plugged != self._last_plugged:
+            self._fast_ticks = self.FLIP_FAST_TICKS
+        self._last_plugged = plugged
+        if self._fast_ticks:
+            self._fast_ticks -= 1
+            return self.min_interval
+
+        # 已接电源并充满
+        if plugged and percent >= 100:
+            return self.max_interval
+
+        slope = self.reader.get_recent_slope()
+        if slope is None:
+            return self.base_interval
+
+        # 电量稳定：逐步放慢
+        if abs(slope) < self.STABLE_SLOPE:
+            return self.current_interval * self.BACKOFF_FACTOR
+
+        # 按预计到达下一个阈值的时间安排采样
+        distance = self._distance_to_threshold(percent, slope)
+        time_to_cross = distance / abs(slope)
+        return time_to_cross / self.SAMPLES_PER_CROSSING
+
+    def _distance_to_threshold(self, percent: float, slope: float) -> float:
+        """沿电量变化方向到下一个颜色阈值的距离(百分比)"""
+        thresholds = settings.battery_levels.values()
+        if slope < 0:
+            # 颜色在 percent <= 阈值 时切换
+            below = [percent - level for level in thresholds if level < percent]
+            return min(below) if below else percent
+        above = [level + 1 - percent for level in thresholds if level + 1 > percent]
+        return min(above) if above else max(100 - percent, 1)
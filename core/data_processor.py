@@ -2,14 +2,32 @@
 电池数据处理模块
 """
 
-from typing import Dict, Any, Tuple
+from typing import Optional, Tuple
 from config.settings import settings
-import psutil
+from core.battery_backends import POWER_TIME_UNKNOWN, POWER_TIME_UNLIMITED
+from core.estimator import ChargeRateEstimator
+from core.reading import BatteryReading, ProcessedReading
 
 class DataProcessor:
     """电池数据处理器"""
     
-    def process_battery_data(self, battery_data: Dict[str, Any]) -> Dict[str, Any]:
+    def __init__(self):
+        # 0-100% 对应的 (级别, 颜色) 查找表，随 settings.revision 重建
+        self._level_table = None
+        self._table_revision = None
+        
+        # 剩余时间估算器，每次读数O(1)更新；合计视图使用 estimator，各设备各自一个
+        self.estimator = ChargeRateEstimator()
+        self._device_estimators = {}
+        
+        # 显示的电池设备名，None表示合计
+        self.view = settings.battery_view
+    
+    def set_view(self, name: Optional[str]):
+        """切换显示的电池设备，None表示所有系统电池的合计"""
+        self.view = name or None
+    
+    def process_battery_data(self, battery_data: Optional[BatteryReading]) -> ProcessedReading:
         """
         处理电池数据
         
@@ -19,62 +37,112 @@ class DataProcessor:
         Returns:
             处理后的电池数据
         """
-        if not battery_data:
+        if battery_data is None:
             return self._get_default_data()
         
-        percent = battery_data['percent']
-        plugged = battery_data['plugged']
-        secsleft = battery_data['secsleft']
+        device = self._find_device(battery_data.devices)
+        if device is None and battery_data.percent is None:
+            # 只有外设电池且没有选择其中之一：保留读数，以便界面列出可选的设备
+            return self._get_no_system_data(battery_data)
+        if device is None:
+            percent = battery_data.percent
+            exact_percent = battery_data.exact_percent
+            if exact_percent is None:
+                exact_percent = percent
+            plugged = battery_data.plugged
+            secsleft = battery_data.secsleft
+            estimator = self.estimator
+            label = ""
+        else:
+            percent = round(device.percent)
+            exact_percent = device.percent
+            plugged = device.power_plugged
+            secsleft = device.secsleft
+            estimator = self._device_estimators.get(device.name)
+            if estimator is None:
+                estimator = self._device_estimators[device.name] = ChargeRateEstimator()
+            label = device.model
         
         # 获取颜色级别
-        color_level = self._get_battery_color(percent)
+        level, color_level = self._lookup_level(percent)
         
-        # 获取状态文本
-        status_text, time_text = self._get_status_texts(percent, plugged, secsleft)
+        # 更新剩余时间估算：使用未取整的百分比，避免整数跳变造成估算值锯齿状波动
+        estimator.update(battery_data.timestamp, exact_percent, plugged)
+        time_to_empty = estimator.time_to_empty(exact_percent)
+        time_to_full = estimator.time_to_full(exact_percent)
+        if time_to_empty is None and not plugged and secsleft not in (POWER_TIME_UNKNOWN, POWER_TIME_UNLIMITED):
+            # 估算尚不可信时退回系统提供的剩余时间
+            time_to_empty = secsleft
         
-        return {
-            'percent': percent,
-            'plugged': plugged,
-            'secsleft': secsleft,
-            'color': color_level,
-            'status_text': status_text,
-            'time_text': time_text,
-            'raw_data': battery_data
-        }
+        # 状态文本在第一次访问时才生成
+        return ProcessedReading(
+            battery_data, percent, plugged, secsleft, level, color_level,
+            time_to_empty, time_to_full, estimator.confidence,
+            device.name if device is not None else None, label
+        )
     
-    def _get_battery_color(self, percent: int) -> str:
-        """根据电量百分比获取对应的颜色"""
+    def _find_device(self, devices):
+        """查找当前视图对应的设备，设备不存在（例如外设已断开）时回到合计"""
+        if self.view is None:
+            return None
+        for device in devices:
+            if device.name == self.view:
+                return device
+        return None
+    
+    def _get_battery_level(self, percent: int) -> str:
+        """根据电量百分比获取对应的级别（逐级比较阈值）"""
         if percent > settings.battery_levels['high']:
-            return settings.colors['level_high']
+            return 'high'
         elif percent > settings.battery_levels['medium']:
-            return settings.colors['level_medium']
+            return 'medium'
         elif percent > settings.battery_levels['low']:
-            return settings.colors['level_low']
+            return 'low'
         else:
-            return settings.colors['level_critical']
+            return 'critical'
     
-    def _get_status_texts(self, percent: int, plugged: bool, secsleft: int) -> Tuple[str, str]:
-        """获取状态文本和时间文本"""
-        # 状态文本 - 简化为空字符串，因为我们不再显示状态
-        status_text = ""
-        
-        # 时间文本 - 简化为空字符串，因为我们不再显示时间
-        time_text = ""
-        
-        return status_text, time_text
+    def _build_level_table(self):
+        """预先计算 0-100% 每个整数百分比对应的级别和颜色"""
+        table = []
+        for percent in range(101):
+            level = self._get_battery_level(percent)
+            table.append((level, settings.colors['level_' + level]))
+        self._level_table = table
+        self._table_revision = settings.revision
+    
+    def _lookup_level(self, percent: int) -> Tuple[str, str]:
+        """查表获取级别和颜色"""
+        if self._table_revision != settings.revision:
+            self._build_level_table()
+        index = int(percent)
+        if index < 0:
+            index = 0
+        elif index > 100:
+            index = 100
+        return self._level_table[index]
+    
+    def _get_battery_color(self, percent: int) -> str:
+        """根据电量百分比获取对应的颜色"""
+        return self._lookup_level(percent)[1]
     
-    def _get_default_data(self) -> Dict[str, Any]:
+    def _get_default_data(self) -> ProcessedReading:
         """获取默认数据（当无法读取电池信息时）"""
-        return {
-            'percent': 0,
-            'plugged': False,
-            'secsleft': psutil.POWER_TIME_UNKNOWN,
-            'color': settings.colors['level_critical'],
-            'status_text': "❌ 无法检测",
-            'time_text': "检查电池状态",
-            'raw_data': None
-        }
+        return ProcessedReading(
+            None, 0, False, POWER_TIME_UNKNOWN, 'critical', settings.colors['level_critical'],
+            None, None, 0.0, texts=("❌ 无法检测", "检查电池状态")
+        )
+    
+    def _get_no_system_data(self, battery_data: BatteryReading) -> ProcessedReading:
+        """
+        只有外设电池且未选择设备时的数据
 
+        没有系统电量：百分比、充电状态和级别都为None，各输出显示为空值而不是0%，
+        原始读数保留，界面可以列出可选的外设。
+        """
+        return ProcessedReading(
+            battery_data, None, None, POWER_TIME_UNKNOWN, None, settings.colors['text_secondary'],
+            None, None, 0.0, texts=("🔋 无系统电池", "可在菜单中选择外设电池")
+        )
 
 # 全局数据处理器实例
 data_processor = DataProcessor()
\ No newline at end of file
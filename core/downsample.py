@@ -0,0 +1,163 @@
+"""
+曲线降采样模块 - 按像素宽度把历史记录压缩为最小/最大值桶
+
+桶按绝对时间划分（桶宽 = 时间范围 / 像素宽度），每个像素列最多一个桶，
+绘制开销只与控件宽度有关，与记录条数无关。新记录只会更新最后一个桶或追加新桶，
+时间窗口前移时从头部丢弃过期的桶，因此可以随读数到达增量更新。
+"""
+
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Iterable, List, Optional
+from core.history import HistoryStore, Sample, iter_records
+
+
+class MinMaxBuckets:
+    """
+    一个 (时间范围, 像素宽度) 的降采样结果
+
+    每个桶为 [桶序号, 最小值, 最大值, 最后一个值, 是否接通过电源]，
+    桶序号 = floor(时间戳 / 桶宽)。
+    """
+
+    __slots__ = ('span', 'width', 'bucket_seconds', 'buckets', 'last_timestamp', 'sample_count')
+
+    def __init__(self, span: float, width: int):
+        """
+        Args:
+            span: 时间范围(秒)
+            width: 像素宽度
+        """
+        self.span = span
+        self.width = max(1, int(width))
+        self.bucket_seconds = span / self.width
+        self.buckets = deque()
+        self.last_timestamp = None
+        self.sample_count = 0
+
+    def add(self, timestamp: float, value: float, plugged: bool):
+        """加入一条记录，早于已加入记录的忽略"""
+        self.merge(timestamp, value, value, value, plugged)
+
+    def merge(self, timestamp: float, low: float, high: float, last: float, plugged: bool,
+              count: int = 1):
+        """加入一段已汇总的记录（汇总层级的一个桶），早于已加入记录的忽略"""
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return
+        self.last_timestamp = timestamp
+        self.sample_count += count
+        index = int(timestamp // self.bucket_seconds)
+        buckets = self.buckets
+        if buckets and buckets[-1][0] == index:
+            bucket = buckets[-1]
+            if low < bucket[1]:
+                bucket[1] = low
+            if high > bucket[2]:
+                bucket[2] = high
+            bucket[3] = last
+            if plugged:
+                bucket[4] = True
+        else:
+            buckets.append([index, low, high, last, bool(plugged)])
+
+    def extend(self, samples: Iterable[Sample]):
+        """按时间顺序加入多条记录"""
+        add = self.add
+        for timestamp, percent, plugged, _ in samples:
+            add(timestamp, percent, plugged)
+
+    def trim(self, now: float):
+        """丢弃时间窗口 [now - span, now] 之前的桶"""
+        first = int((now - self.span) // self.bucket_seconds)
+        buckets = self.buckets
+        while buckets and buckets[0][0] < first:
+            buckets.popleft()
+
+    def x_of(self, index: int, now: float) -> float:
+        """桶在窗口中的横坐标(0 ~ width)"""
+        return (index * self.bucket_seconds - (now - self.span)) / self.bucket_seconds
+
+    def __len__(self):
+        return len(self.buckets)
+
+
+class HistorySource:
+    """
+    为图表提供降采样后的电池历史
+
+    每个 (时间范围, 像素宽度) 第一次请求时从汇总层级、内存环形缓冲区或磁盘记录文件构建一次，
+    之后随 add() 增量更新；最近使用的若干个结果保留在缓存中。
+    """
+
+    MAX_CACHED = 8
+
+    def __init__(self, history: Optional[HistoryStore]):
+        self.history = history
+        self._cache = OrderedDict()
+        self._listeners: List[Callable[[], None]] = []
+        self.build_count = 0
+
+    def get(self, span: float, width: int, now: Optional[float] = None) -> MinMaxBuckets:
+        """获取时间范围 [now - span, now] 按 width 个像素列降采样的结果"""
+        now = time.time() if now is None else now
+        key = (span, max(1, int(width)))
+        buckets = self._cache.get(key)
+        if buckets is None:
+            buckets = MinMaxBuckets(span, width)
+            self._load(buckets, now - span)
+            self.build_count += 1
+            self._cache[key] = buckets
+            if len(self._cache) > self.MAX_CACHED:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        buckets.trim(now)
+        return buckets
+
+    def add(self, timestamp: float, percent: float, plugged: bool):
+        """新读数到达：更新所有缓存的结果并通知图表"""
+        for buckets in self._cache.values():
+            buckets.add(timestamp, percent, plugged)
+        for listener in self._listeners:
+            listener()
+
+    def add_listener(self, listener: Callable[[], None]):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _load(self, buckets: MinMaxBuckets, start: float):
+        """
+        加入 start 之后的记录：优先读取桶宽不超过一个像素列的最粗汇总层级，
+        没有合适的层级且内存中的记录覆盖不到时直接遍历磁盘记录文件
+        """
+        if self.history is None:
+            return
+        tier = self.history.select_tier(start, buckets.bucket_seconds)
+        if tier is not None:
+            try:
+                merge = buckets.merge
+                for begin, count, low, high, _, last, plugged in tier.records(start):
+                    merge(begin, low, high, last, plugged > 0, count)
+                return
+            except (OSError, ValueError) as e:
+                print(f"读取电池历史汇总记录时出错: {e}")
+        ring = self.history.ring
+        history_file = self.history.file
+        if history_file is not None and (not len(ring) or ring[0][0] > start):
+            try:
+                with history_file.map() as view, view.range(start) as records:
+                    buckets.extend(iter_records(records))
+                return
+            except (OSError, ValueError) as e:
+                print(f"读取电池历史记录时出错: {e}")
+        samples = []
+        for sample in ring.iter_reversed():
+            if sample[0] < start:
+                break
+            samples.append(sample)
+        samples.reverse()
+        buckets.extend(samples)
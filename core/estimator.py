@@ -0,0 +1,81 @@
+"""
+剩余时间估算模块
+"""
+
+import math
+from typing import Optional
+
+
+class ChargeRateEstimator:
+    """
+    电量变化速率的在线估算器
+
+    对相邻读数之间的变化速率做指数加权平均(EWMA)，同时跟踪加权方差，
+    每次更新为O(1)。插拔电源时重置，避免切换前后的速率混在一起。
+    """
+
+    def __init__(self, time_constant: float = 600, min_span: float = 60):
+        """
+        Args:
+            time_constant: 加权平均的时间常数(秒)，越大越平稳
+            min_span: 重置后至少观察多长时间(秒)才给出估算
+        """
+        self.time_constant = time_constant
+        self.min_span = min_span
+        self.reset()
+
+    def reset(self, plugged: Optional[bool] = None):
+        """清空估算状态"""
+        self.plugged = plugged
+        self.rate = 0.0        # 百分比/秒
+        self.variance = 0.0
+        self._mean = 0.0       # 未做偏差修正的加权平均
+        self._weight = 0.0     # 已累计的权重，用于修正从0开始的偏差
+        self.span = 0.0        # 重置后累计观察时间(秒)
+        self._alpha = 1.0
+        self._last_time = None
+        self._last_percent = None
+
+    def update(self, timestamp: float, percent: float, plugged: bool):
+        """加入一条读数"""
+        if plugged != self.plugged:
+            self.reset(plugged)
+        if self._last_time is not None:
+            dt = timestamp - self._last_time
+            if dt <= 0:
+                # 重复的读数（例如读取缓存）
+                return
+            sample_rate = (percent - self._last_percent) / dt
+            alpha = 1.0 - math.exp(-dt / self.time_constant)
+            self._alpha = alpha
+            delta = sample_rate - self.rate
+            self._mean += alpha * (sample_rate - self._mean)
+            self._weight += alpha * (1.0 - self._weight)
+            self.rate = self._mean / self._weight
+            self.variance = (1.0 - alpha) * (self.variance + alpha * delta * delta)
+            self.span += dt
+        self._last_time = timestamp
+        self._last_percent = percent
+
+    @property
+    def confidence(self) -> float:
+        """估算可信度(0-1)：观察时间越长、速率越稳定越高"""
+        if self.span < self.min_span or self.rate == 0:
+            return 0.0
+        coverage = min(1.0, self.span / self.time_constant)
+        # 加权平均值本身的标准误差，而不是单次读数速率的离散程度
+        error = math.sqrt(self.variance * self._alpha / (2.0 - self._alpha))
+        spread = error / abs(self.rate)
+        return coverage / (1.0 + spread)
+
+    def time_to_empty(self, percent: float) -> Optional[float]:
+        """预计耗尽时间(秒)，无法估算时返回None"""
+        if self.plugged or self.rate >= 0 or self.confidence == 0:
+            return None
+        return percent / -self.rate
+
+    def time_to_full(self, percent: float) -> Optional[float]:
+        """预计充满时间(秒)，无法估算时返回None"""
+        if not self.plugged or self.rate <= 0 or self.confidence == 0:
+            return None
+        return max(0.0, 100 - percent) / self.rate
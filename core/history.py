@@ -0,0 +1,339 @@
+"""
+电池历史记录模块
+
+内存中使用定长数组实现的环形缓冲区，磁盘上使用只追加的定长二进制记录文件，
+读取方可以直接内存映射文件，按时间范围获取零拷贝的记录视图。
+记录文件旁边保存分钟/小时/天汇总层级（见 core/rollup.py），长时间范围的查询读取汇总记录。
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from typing import Dict, Iterator, Optional, Tuple
+from core.rollup import ROLLUP, ROLLUP_HEADER, RollupTier, compact_file, first_timestamp
+
+# 文件头: 魔数, 版本, 记录长度, 保留
+HEADER = struct.Struct('<4sHH8x')
+MAGIC = b'BATH'
+VERSION = 1
+# 记录: 时间戳(秒), 电量百分比, 剩余秒数, 是否接通电源
+RECORD = struct.Struct('<dfiB3x')
+
+# 单条记录: (时间戳, 电量百分比, 是否接通电源, 剩余秒数)
+Sample = Tuple[float, float, bool, int]
+
+
+class SampleRing:
+    """定长环形缓冲区，按列存储，追加为O(1)且不分配新的存储空间"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.percents = array('f', bytes(4 * capacity))
+        self.secsleft = array('i', bytes(4 * capacity))
+        self.plugged = bytearray(capacity)
+        self._next = 0    # 下一次写入的位置
+        self.count = 0
+
+    def append(self, timestamp: float, percent: float, plugged: bool, secsleft: int):
+        """追加一条记录，缓冲区满时覆盖最旧的记录"""
+        i = self._next
+        self.timestamps[i] = timestamp
+        self.percents[i] = percent
+        self.secsleft[i] = secsleft
+        self.plugged[i] = 1 if plugged else 0
+        self._next = i + 1 if i + 1 < self.capacity else 0
+        if self.count < self.capacity:
+            self.count += 1
+
+    def clear(self):
+        self._next = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _index(self, i: int) -> int:
+        """第i条记录(0为最旧，负数从最新开始)在数组中的位置"""
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("history index out of range")
+        return (self._next - self.count + i) % self.capacity
+
+    def __getitem__(self, i: int) -> Sample:
+        j = self._index(i)
+        return (self.timestamps[j], self.percents[j], bool(self.plugged[j]), self.secsleft[j])
+
+    def iter_reversed(self) -> Iterator[Sample]:
+        """从最新到最旧遍历记录"""
+        j = self._next
+        for _ in range(self.count):
+            j = j - 1 if j else self.capacity - 1
+            yield (self.timestamps[j], self.percents[j], bool(self.plugged[j]), self.secsleft[j])
+
+    def segments(self, column: array) -> Tuple[memoryview, memoryview]:
+        """
+        按时间顺序返回某一列的两个零拷贝片段（缓冲区回绕时第二段非空）
+
+        Args:
+            column: timestamps / percents / secsleft / plugged 之一
+        """
+        view = memoryview(column)
+        start = (self._next - self.count) % self.capacity if self.count else 0
+        if start + self.count <= self.capacity:
+            return view[start:start + self.count], view[0:0]
+        return view[start:], view[:self._next]
+
+
+class HistoryFile:
+    """只追加的定长记录文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._buffer = bytearray(RECORD.size)
+
+    def _open(self):
+        """打开文件，校验文件头并截掉不完整的尾部记录"""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        f = os.fdopen(fd, 'r+b', buffering=0)
+        header = f.read(HEADER.size)
+        if not header:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        else:
+            if len(header) < HEADER.size or HEADER.unpack(header) != (MAGIC, VERSION, RECORD.size):
+                f.close()
+                raise ValueError(f"不支持的历史记录文件格式: {self.path}")
+            size = os.fstat(fd).st_size
+            whole = HEADER.size + (size - HEADER.size) // RECORD.size * RECORD.size
+            if whole != size:
+                f.truncate(whole)
+        f.seek(0, os.SEEK_END)
+        self._file = f
+
+    def append(self, timestamp: float, percent: float, plugged: bool, secsleft: int):
+        """追加一条记录（单次 write 系统调用，复用同一个缓冲区）"""
+        if self._file is None:
+            self._open()
+        RECORD.pack_into(self._buffer, 0, timestamp, percent, secsleft, plugged)
+        self._file.write(self._buffer)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def map(self) -> 'HistoryView':
+        """内存映射当前文件内容，用于只读查询"""
+        return HistoryView(self.path)
+
+
+class HistoryView:
+    """历史记录文件的只读内存映射视图"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self.count = max(0, size - HEADER.size) // RECORD.size
+            self._mmap = (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                          if size >= HEADER.size else None)
+        if self._mmap is not None and HEADER.unpack_from(self._mmap, 0) != (MAGIC, VERSION, RECORD.size):
+            self.close()
+            raise ValueError(f"不支持的历史记录文件格式: {path}")
+        self._view = memoryview(self._mmap) if self._mmap is not None else memoryview(b'')
+
+    def timestamp_at(self, i: int) -> float:
+        return struct.unpack_from('<d', self._view, HEADER.size + i * RECORD.size)[0]
+
+    def __getitem__(self, i: int) -> Sample:
+        timestamp, percent, secsleft, plugged = RECORD.unpack_from(
+            self._view, HEADER.size + i * RECORD.size)
+        return (timestamp, percent, bool(plugged), secsleft)
+
+    def __len__(self):
+        return self.count
+
+    def bisect(self, timestamp: float) -> int:
+        """返回第一条时间戳不小于 timestamp 的记录序号"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamp_at(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(self, start: float = None, end: float = None) -> memoryview:
+        """
+        获取时间范围 [start, end) 内记录的零拷贝视图
+
+        Returns:
+            记录字节的 memoryview，可用 iter_records() 逐条解析
+        """
+        first = self.bisect(start) if start is not None else 0
+        last = self.bisect(end) if end is not None else self.count
+        offset = HEADER.size
+        return self._view[offset + first * RECORD.size:offset + max(first, last) * RECORD.size]
+
+    def close(self):
+        self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_records(view: memoryview) -> Iterator[Sample]:
+    """逐条解析 HistoryView.range() 返回的记录视图"""
+    for timestamp, percent, secsleft, plugged in RECORD.iter_unpack(view):
+        yield (timestamp, percent, bool(plugged), secsleft)
+
+
+def tier_suffix(seconds: float) -> str:
+    """汇总层级文件的后缀，例如 60 -> 1m、3600 -> 1h"""
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds % size == 0:
+            return f"{int(seconds // size)}{unit}"
+    return f"{int(seconds)}s"
+
+
+class HistoryStore:
+    """电池历史记录：内存环形缓冲区 + 可选的磁盘记录文件和汇总层级"""
+
+    def __init__(self, capacity: int, path: Optional[str] = None,
+                 retention: Optional[float] = None,
+                 rollups: Optional[Dict[float, Optional[float]]] = None):
+        """
+        Args:
+            capacity: 内存中保留的记录条数
+            path: 磁盘记录文件路径，为None时只保存在内存中
+            retention: 磁盘原始记录保留时长(秒)，None表示不删除
+            rollups: 汇总层级 {桶宽(秒): 保留时长(秒)或None}，只在有记录文件时使用
+        """
+        self.ring = SampleRing(capacity)
+        self.file = HistoryFile(path) if path else None
+        self.retention = retention
+        self.tiers = []
+        # 追加方(采样线程)和后台压缩线程之间的锁，保护文件写入和替换
+        self._lock = threading.Lock()
+        if path:
+            has_records = first_timestamp(path, HEADER.size) is not None
+            for seconds, tier_retention in sorted((rollups or {}).items()):
+                tier = RollupTier(f"{path}.{tier_suffix(seconds)}", seconds, tier_retention)
+                # 新增的层级先由后台线程从原始记录补建
+                tier.ready = tier.exists() or not has_records
+                self.tiers.append(tier)
+
+    def append(self, timestamp: float, percent: float, plugged: bool, secsleft: int):
+        secsleft = int(secsleft)
+        self.ring.append(timestamp, percent, plugged, secsleft)
+        if self.file is not None:
+            with self._lock:
+                try:
+                    self.file.append(timestamp, percent, plugged, secsleft)
+                    for tier in self.tiers:
+                        if tier.ready:
+                            tier.add(timestamp, percent, plugged)
+                except (OSError, ValueError) as e:
+                    print(f"写入电池历史记录时出错: {e}")
+                    self.file = None
+
+    def clear(self):
+        """清空内存中的记录（磁盘文件保持不变）"""
+        self.ring.clear()
+
+    def close(self):
+        with self._lock:
+            if self.file is not None:
+                self.file.close()
+            for tier in self.tiers:
+                tier.close()
+
+    def detach_file(self):
+        """不再写入磁盘记录文件和汇总层级（切换到模拟/回放后端时调用）"""
+        self.close()
+        self.file = None
+        self.tiers = []
+
+    def rebuild_rollups(self):
+        """从原始记录补建尚未就绪的汇总层级（在后台线程中调用）"""
+        pending = [tier for tier in self.tiers if not tier.ready]
+        if not pending or self.file is None:
+            return
+        # 锁外处理已有的记录，锁内只补上期间追加的记录
+        with self.file.map() as view, view.range() as records:
+            count = len(view)
+            for timestamp, percent, plugged, _ in iter_records(records):
+                for tier in pending:
+                    tier.add(timestamp, percent, plugged)
+        with self._lock:
+            with self.file.map() as view, view.range() as records, \
+                    records[count * RECORD.size:] as tail:
+                for timestamp, percent, plugged, _ in iter_records(tail):
+                    for tier in pending:
+                        tier.add(timestamp, percent, plugged)
+            for tier in pending:
+                tier.ready = True
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """
+        删除超过保留时长的原始记录和汇总记录（在后台线程中调用）
+
+        Returns:
+            删除的记录条数
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        history_file = self.file
+        # 汇总层级补建完成之前保留全部原始记录
+        if (history_file is not None and self.retention is not None
+                and all(tier.ready for tier in self.tiers) and os.path.exists(history_file.path)):
+            removed += compact_file(history_file.path, HEADER.size, RECORD.size,
+                                    now - self.retention, self._lock, history_file.close)
+        for tier in self.tiers:
+            if tier.ready and tier.retention is not None and os.path.exists(tier.path):
+                removed += compact_file(tier.path, ROLLUP_HEADER.size, ROLLUP.size,
+                                        now - tier.retention, self._lock, tier.release)
+        return removed
+
+    def select_tier(self, start: float, resolution: float) -> Optional[RollupTier]:
+        """
+        选择查询 start 之后的记录时应读取的汇总层级
+
+        在桶宽不超过 resolution(秒) 且覆盖 start 之后所有记录的层级中选最粗的一个；
+        都不满足时，原始记录能覆盖就读原始记录(返回None)，否则读覆盖范围内最细的层级。
+        """
+        raw_first = None
+        if self.file is not None:
+            raw_first = first_timestamp(self.file.path, HEADER.size)
+        if raw_first is None and len(self.ring):
+            raw_first = self.ring[0][0]
+        # 原始记录比 start 晚开始时，层级只需要覆盖到原始记录的开头
+        needed = start if raw_first is None else max(start, raw_first)
+
+        covering = []
+        for tier in self.tiers:
+            if not tier.ready:
+                continue
+            tier_first = tier.first_timestamp()
+            if tier_first is not None and tier_first <= needed:
+                covering.append(tier)
+        usable = [tier for tier in covering if tier.seconds <= resolution]
+        if usable:
+            return max(usable, key=lambda tier: tier.seconds)
+        if (raw_first is not None and raw_first <= start) or not covering:
+            return None
+        return min(covering, key=lambda tier: tier.seconds)
+
+    def __len__(self):
+        return len(self.ring)
@@ -0,0 +1,193 @@
+"""
+Prometheus 指标模块 - 在本地 HTTP 端口上以文本格式输出电池指标
+
+响应内容在每次采样后生成一次，抓取请求只返回缓存的字节，
+不会触发硬件读取，也不会访问 BatteryReader。
+"""
+
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+from core.reading import ProcessedReading
+from utils.power import cpu_seconds
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def parse_address(address: str, default_host: str = '127.0.0.1'):
+    """解析 "port" 或 "host:port" 形式的地址"""
+    host, sep, port = str(address).rpartition(':')
+    return (host if sep and host else default_host), int(port)
+
+
+def _value(value: Optional[float]) -> str:
+    if value is None:
+        return 'NaN'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float) and not math.isfinite(value):
+        return 'NaN'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _label(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class _Metrics:
+    """按 Prometheus 文本格式拼接指标"""
+
+    def __init__(self):
+        self.lines = []
+
+    def add(self, name: str, kind: str, help_text: str, samples):
+        """
+        Args:
+            samples: 单个数值，或 [(标签字典, 数值), ...]
+        """
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        if not isinstance(samples, list):
+            samples = [({}, samples)]
+        for labels, value in samples:
+            if labels:
+                text = ','.join(f'{key}="{_label(val)}"' for key, val in labels.items())
+                self.lines.append(f"{name}{{{text}}} {_value(value)}")
+            else:
+                self.lines.append(f"{name} {_value(value)}")
+
+    def render(self) -> bytes:
+        return ('\n'.join(self.lines) + '\n').encode('utf-8')
+
+
+def render_metrics(data: ProcessedReading, stats: Dict[str, Any], events: int = 0) -> bytes:
+    """
+    生成指标文本
+
+    Args:
+        data: DataProcessor 处理后的电池数据
+        stats: SamplingScheduler.get_stats() 的结果
+        events: 已收到的电源事件数
+
+    Returns:
+        UTF-8 编码的响应内容
+    """
+    metrics = _Metrics()
+    # 没有系统电池时 percent/plugged 为None，输出 NaN，不会触发低电量告警
+    metrics.add('battery_percent', 'gauge', 'Battery charge in percent.', data.percent)
+    metrics.add('battery_power_plugged', 'gauge', 'Whether external power is connected.',
+                data.plugged)
+    metrics.add('battery_time_to_empty_seconds', 'gauge',
+                'Estimated time until the battery is empty.', data.time_to_empty)
+    metrics.add('battery_time_to_full_seconds', 'gauge',
+                'Estimated time until the battery is full.', data.time_to_full)
+    metrics.add('battery_estimate_confidence', 'gauge',
+                'Confidence of the time estimates (0-1).', data.confidence)
+    metrics.add('battery_sample_timestamp_seconds', 'gauge',
+                'Timestamp of the latest reading.', data.timestamp)
+
+    devices = data.devices
+    if devices:
+        metrics.add('battery_device_percent', 'gauge', 'Charge of each battery device in percent.', [
+            ({'device': device.name, 'model': device.model, 'scope': device.scope}, device.percent)
+            for device in devices
+        ])
+        metrics.add('battery_device_power_plugged', 'gauge',
+                    'Whether each battery device is charging or on external power.', [
+                        ({'device': device.name}, device.power_plugged) for device in devices
+                    ])
+
+    metrics.add('battery_samples_total', 'counter', 'Hardware reads performed.', stats['ticks'])
+    metrics.add('battery_sample_failures_total', 'counter', 'Reads that returned no data.',
+                stats['failures'])
+    metrics.add('battery_refreshes_total', 'counter', 'Reads requested out of schedule.',
+                stats['refreshes'])
+    metrics.add('battery_power_events_total', 'counter', 'Kernel power supply events received.',
+                events)
+    metrics.add('battery_sample_duration_seconds', 'gauge', 'Duration of the latest read.',
+                stats['last_sample_duration'])
+    metrics.add('battery_sample_duration_seconds_total', 'counter', 'Total time spent reading.',
+                stats['total_sample_duration'])
+    metrics.add('battery_sample_interval_seconds', 'gauge', 'Current sampling interval.',
+                stats['interval'])
+    metrics.add('battery_sampler_wakeups_total', 'counter', 'Wakeups of the sampling thread.',
+                stats['wakeups'])
+    metrics.add('process_cpu_seconds_total', 'counter', 'Total user and system CPU time spent.',
+                cpu_seconds())
+    return metrics.render()
+
+
+class MetricsServer:
+    """后台线程中的 HTTP 服务器，GET /metrics 返回最近一次生成的指标"""
+
+    def __init__(self, address: str, stats_fn: Callable[[], Dict[str, Any]],
+                 events_fn: Callable[[], int] = None):
+        """
+        Args:
+            address: 监听地址，"port" 或 "host:port"，默认只监听本机
+            stats_fn: 返回采样统计信息的函数
+            events_fn: 返回已收到电源事件数的函数
+        """
+        self.address = parse_address(address)
+        self.stats_fn = stats_fn
+        self.events_fn = events_fn
+        # 只在采样线程中整体替换，处理请求的线程读取引用即可，不需要加锁
+        self.body = b"# no reading yet\n"
+        self.render_count = 0
+        self.request_count = 0
+        self.httpd = None
+        self._thread = None
+
+    def start(self) -> bool:
+        """
+        开始监听
+
+        Returns:
+            是否成功绑定端口
+        """
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = server.body
+                server.request_count += 1
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.httpd = ThreadingHTTPServer(self.address, Handler)
+        except OSError as e:
+            print(f"无法启动指标服务 {self.address[0]}:{self.address[1]}: {e}")
+            return False
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever,
+                                        name="metrics-server", daemon=True)
+        self._thread.start()
+        return True
+
+    @property
+    def port(self) -> Optional[int]:
+        """实际监听的端口（地址中端口为0时由系统分配）"""
+        return self.httpd.server_address[1] if self.httpd else None
+
+    def publish(self, data: ProcessedReading):
+        """新读数到达时重新生成响应（在采样线程中调用）"""
+        events = self.events_fn() if self.events_fn else 0
+        self.body = render_metrics(data, self.stats_fn(), events)
+        self.render_count += 1
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
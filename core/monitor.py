@@ -0,0 +1,234 @@
+"""
+电池监控模块 - 把读取、处理、采样调度和电源事件组合在一起
+"""
+
+import socket
+import time
+from typing import Callable, Dict, Optional
+from config.settings import settings
+from core.battery_reader import BatteryReader, battery_reader
+from core.cadence import AdaptiveCadence
+from core.data_processor import DataProcessor, data_processor
+from core.reading import ProcessedReading
+from core.sampler import SamplingScheduler
+from core.uevent import UeventListener
+from utils.diagnostics import diagnostics
+
+# 会产生内核电源事件的后端（模拟后端不会）
+UEVENT_BACKENDS = ('sysfs', 'psutil')
+
+# 读数需求：有可见的使用者时正常采样；只有托盘等不常看的使用者时放慢采样；
+# 锁屏且没有后台服务时暂停采样
+DEMAND_ACTIVE = 'active'
+DEMAND_IDLE = 'idle'
+DEMAND_PAUSED = 'paused'
+
+
+class BatteryMonitor:
+    """
+    电池监控
+
+    由采样调度器统一发起读取，每条处理后的读数交给所有订阅者。
+    Linux 下同时监听内核电源事件：事件到达时立即采样，定时采样退为长间隔兜底。
+    没有人看读数时（悬浮窗隐藏、锁屏）放慢或暂停采样，恢复时立即采样一次。
+    """
+
+    def __init__(self, reader: BatteryReader = None, processor: DataProcessor = None,
+                 interval: Optional[float] = None, event_driven: Optional[bool] = None,
+                 uevent_socket: Optional[socket.socket] = None):
+        """
+        Args:
+            reader: 电池读取器，默认使用全局实例
+            processor: 数据处理器，默认使用全局实例
+            interval: 固定采样间隔(秒)，为None时按 settings 决定是否自适应
+            event_driven: 是否监听电源事件，默认取 settings.event_driven
+            uevent_socket: 接收 uevent 的数据报套接字，默认创建内核 netlink 套接字（测试时传入模拟的套接字）
+        """
+        self.reader = reader or battery_reader
+        self.processor = processor or data_processor
+        self.subscribers = []
+        self.cadence = None
+        if interval is None and settings.adaptive_sampling:
+            self.cadence = AdaptiveCadence(self.reader)
+        self.sampler = SamplingScheduler(
+            self.read_sample, self._publish, interval or settings.update_interval,
+            interval_fn=self._next_interval, timer_slack=settings.timer_slack
+        )
+        self._fixed_interval = interval or settings.update_interval
+        self._event_driven = settings.event_driven if event_driven is None else event_driven
+        self.uevents = None
+        self._uevent_socket = uevent_socket
+        self.metrics = None
+        self.fleet = None
+        self.compactor = None
+        # 各读数使用者当前是否需要实时读数，没有声明过的使用者时视为需要
+        self._consumers: Dict[str, bool] = {}
+        self._session_locked = False
+        self.demand = DEMAND_ACTIVE
+
+    def subscribe(self, callback: Callable[[ProcessedReading], None]):
+        """订阅读数（回调在采样线程中调用）"""
+        self.subscribers.append(callback)
+
+    def start(self):
+        """在后台线程中开始监控"""
+        self._start_services()
+        self._start_events()
+        self.sampler.start()
+
+    def run(self):
+        """在当前线程中运行监控，直到 stop() 被调用"""
+        self._start_services()
+        self._start_events()
+        try:
+            self.sampler.run()
+        finally:
+            self._stop_events()
+            self._stop_services()
+
+    def stop(self):
+        self.sampler.stop()
+        self._stop_events()
+        self._stop_services()
+
+    def refresh(self):
+        """请求尽快采样一次（合并到下一次节拍）"""
+        self.sampler.request_refresh()
+
+    def set_consumer(self, name: str, active: bool):
+        """
+        声明读数使用者当前是否需要实时读数
+
+        Args:
+            name: 使用者名称，例如 "overlay"
+            active: 是否需要实时读数（例如悬浮窗是否可见）
+        """
+        self._consumers[name] = active
+        self._update_demand()
+
+    def set_session_locked(self, locked: bool):
+        """会话锁定或解锁"""
+        self._session_locked = locked
+        self._update_demand()
+
+    def _compute_demand(self) -> str:
+        if not settings.idle_sampling or self.metrics is not None or self.fleet is not None:
+            # 后台服务随时可能被访问，始终正常采样
+            return DEMAND_ACTIVE
+        if self._session_locked:
+            return DEMAND_PAUSED
+        if not self._consumers or any(self._consumers.values()):
+            return DEMAND_ACTIVE
+        return DEMAND_IDLE
+
+    def _update_demand(self):
+        demand = self._compute_demand()
+        previous, self.demand = self.demand, demand
+        if demand == previous:
+            return
+        diagnostics.count('demand.' + demand)
+        if demand == DEMAND_PAUSED:
+            self.sampler.pause()
+        elif previous == DEMAND_PAUSED:
+            # 恢复时立即采样一次
+            self.sampler.resume()
+        if demand == DEMAND_ACTIVE and previous == DEMAND_IDLE:
+            # 使用者重新出现时读数可能已经过时
+            self.sampler.request_refresh()
+
+    def read_sample(self):
+        """读取并处理一次电池数据（在采样线程中调用）"""
+        started = time.perf_counter()
+        # 自适应采样加快到短于读取缓存时间时（例如刚插拔电源），缓存中只会是上一次的读数
+        use_cache = (self.cadence is None
+                     or self.cadence.current_interval >= self.reader.cache_duration)
+        battery_data = self.reader.get_battery_info(use_cache)
+        read = time.perf_counter()
+        diagnostics.record('sample.read', read - started)
+        if battery_data is None:
+            diagnostics.count('sample.failures')
+            return None
+        data = self.processor.process_battery_data(battery_data)
+        diagnostics.record('sample.process', time.perf_counter() - read)
+        return data
+
+    def _publish(self, data: ProcessedReading):
+        started = time.perf_counter()
+        for callback in self.subscribers:
+            callback(data)
+        diagnostics.record('sample.publish', time.perf_counter() - started)
+
+    def _next_interval(self, data: Optional[ProcessedReading]) -> float:
+        if self.cadence is not None:
+            interval = self.cadence.next_interval(data)
+        else:
+            interval = self._fixed_interval
+        if self.uevents is not None and self.uevents.active:
+            # 电源变化会以事件形式到达，定时采样只作为兜底
+            interval = max(interval, settings.event_safety_interval / self.reader.backend.speed)
+        if self.demand == DEMAND_IDLE:
+            interval = max(interval, settings.idle_update_interval / self.reader.backend.speed)
+        return interval
+
+    def _start_events(self):
+        if self.uevents is not None or not self._event_driven:
+            return
+        # 传入的套接字交给监听器后由监听器关闭，只使用一次
+        sock, self._uevent_socket = self._uevent_socket, None
+        if sock is None and (not UeventListener.is_supported()
+                             or self.reader.backend.name not in UEVENT_BACKENDS):
+            return
+        listener = UeventListener(self._on_uevent, sock=sock)
+        if listener.start():
+            self.uevents = listener
+
+    def _stop_events(self):
+        if self.uevents is not None:
+            self.uevents.stop()
+            self.uevents = None
+
+    def _start_services(self):
+        """
+        按 settings 启动指标服务和多机汇总代理，它们都作为订阅者接收读数；
+        有磁盘记录文件时启动历史记录的后台压缩线程
+        """
+        if self.metrics is None and settings.metrics_address is not None:
+            from core.metrics_server import MetricsServer
+            server = MetricsServer(settings.metrics_address, self.sampler.get_stats,
+                                   lambda: self.uevents.event_count if self.uevents else 0)
+            if server.start():
+                self.metrics = server
+                self.subscribe(server.publish)
+        if self.fleet is None and settings.fleet_address is not None:
+            from fleet.agent import FleetAgent
+            self.fleet = FleetAgent(settings.fleet_address)
+            self.subscribe(self.fleet.publish)
+        history = self.reader.history
+        if self.compactor is None and history.file is not None:
+            from core.rollup import HistoryCompactor
+            self.compactor = HistoryCompactor(history, settings.history_compact_interval)
+            self.compactor.start()
+        self._update_demand()
+
+    def _stop_services(self):
+        for service in (self.metrics, self.fleet):
+            if service is not None:
+                self.subscribers = [callback for callback in self.subscribers
+                                    if callback != service.publish]
+                service.stop()
+        self.metrics = None
+        self.fleet = None
+        if self.compactor is not None:
+            self.compactor.stop()
+            self.compactor = None
+        # 写入汇总层级中尚未结束的桶
+        self.reader.history.close()
+
+    def _on_uevent(self, event: Dict[str, str]):
+        """收到电源事件：跳过读取缓存，立即采样（暂停期间推迟到恢复时）"""
+        diagnostics.count('uevent.' + event.get('ACTION', 'unknown'))
+        if event.get('ACTION') in ('add', 'remove'):
+            # 外设电池接入或断开，重新扫描设备
+            self.reader.backend.devices_changed()
+        self.reader.invalidate_cache()
+        self.sampler.request_refresh()
@@ -0,0 +1,115 @@
+"""
+电池读数类型模块
+
+BatteryReading 是 BatteryReader 每次实际读取硬件得到的原始读数，
+ProcessedReading 是 DataProcessor 处理后交给界面和各个输出的读数。
+两者创建后都不可修改，可以在线程之间直接传递引用，不需要复制或加锁。
+"""
+
+from collections import namedtuple
+from typing import Optional, Tuple
+
+# 原始读数: 百分比(整数，只有外设电池时为None), 是否接通电源, 系统提供的剩余秒数, 时间戳,
+# 各电池设备(DeviceStatus), 未取整的百分比（用于估算剩余时间，只有显示时才取整）
+BatteryReading = namedtuple('BatteryReading', ['percent', 'plugged', 'secsleft', 'timestamp', 'devices',
+                                               'exact_percent'], defaults=(None,))
+
+
+def format_duration(seconds: float) -> str:
+    """格式化时长，例如 2小时05分"""
+    minutes = int(seconds // 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}小时{minutes:02d}分"
+    return f"{minutes}分钟"
+
+
+def status_texts(percent: int, plugged: bool, time_to_empty: Optional[float],
+                 time_to_full: Optional[float]) -> Tuple[str, str]:
+    """获取状态文本和时间文本"""
+    if plugged:
+        if percent >= 100:
+            return "🔌 已充满", ""
+        status_text = "⚡ 充电中"
+        time_text = f"充满还需 {format_duration(time_to_full)}" if time_to_full is not None else "估算中..."
+    else:
+        status_text = "🔋 使用电池"
+        time_text = f"剩余 {format_duration(time_to_empty)}" if time_to_empty is not None else "估算中..."
+    return status_text, time_text
+
+
+class ProcessedReading:
+    """
+    处理后的读数
+
+    渲染需要的字段在创建时计算；状态文本等只在界面提示中使用的字段
+    在第一次访问时才生成并缓存。
+    """
+
+    __slots__ = ('reading', 'percent', 'plugged', 'secsleft', 'level', 'color',
+                 'time_to_empty', 'time_to_full', 'confidence', 'view', 'label', '_texts')
+
+    def __init__(self, reading: Optional[BatteryReading], percent: int, plugged: bool,
+                 secsleft: int, level: str, color: str, time_to_empty: Optional[float],
+                 time_to_full: Optional[float], confidence: float, view: Optional[str] = None,
+                 label: str = "", texts: Optional[Tuple[str, str]] = None):
+        """
+        Args:
+            reading: 对应的原始读数，无法读取电池时为None
+            percent/plugged/level: 只有外设电池且未选择设备时为None（没有系统电量）
+            view: 显示的电池设备名，None表示合计
+            label: 设备名称，显示合计时为空
+            texts: 预先确定的 (状态文本, 时间文本)，为None时按需生成
+        """
+        setattr_ = object.__setattr__
+        setattr_(self, 'reading', reading)
+        setattr_(self, 'percent', percent)
+        setattr_(self, 'plugged', plugged)
+        setattr_(self, 'secsleft', secsleft)
+        setattr_(self, 'level', level)
+        setattr_(self, 'color', color)
+        setattr_(self, 'time_to_empty', time_to_empty)
+        setattr_(self, 'time_to_full', time_to_full)
+        setattr_(self, 'confidence', confidence)
+        setattr_(self, 'view', view)
+        setattr_(self, 'label', label)
+        setattr_(self, '_texts', texts)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} 不可修改")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} 不可修改")
+
+    def __repr__(self):
+        return (f"ProcessedReading(percent={self.percent}, plugged={self.plugged}, "
+                f"level={self.level!r}, view={self.view!r})")
+
+    @property
+    def percent_text(self) -> str:
+        """显示用的百分比文字，没有系统电池时为破折号"""
+        return f"{self.percent}%" if self.percent is not None else "—"
+
+    @property
+    def timestamp(self) -> Optional[float]:
+        return self.reading.timestamp if self.reading is not None else None
+
+    @property
+    def devices(self) -> tuple:
+        return self.reading.devices if self.reading is not None else ()
+
+    def _get_texts(self) -> Tuple[str, str]:
+        texts = self._texts
+        if texts is None:
+            texts = status_texts(self.percent, self.plugged, self.time_to_empty, self.time_to_full)
+            # 重复计算的结果相同，并发访问时无需加锁
+            object.__setattr__(self, '_texts', texts)
+        return texts
+
+    @property
+    def status_text(self) -> str:
+        return self._get_texts()[0]
+
+    @property
+    def time_text(self) -> str:
+        return self._get_texts()[1]
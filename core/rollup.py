@@ -0,0 +1,284 @@
+"""
+电池历史汇总模块 - 分钟/小时/天汇总层级，以及过期记录的后台压缩
+
+每个层级把一个时间桶内的读数汇总为一条定长记录：条数、最小值、最大值、平均值、
+最后一个值和接通电源的比例。每次追加读数只更新各层级当前未结束的桶，
+桶结束时向层级文件追加一条记录，长时间范围的查询只需要读取汇总记录。
+"""
+
+import mmap
+import os
+import struct
+import threading
+from typing import Callable, Iterator, Optional, Tuple
+
+# 汇总文件头: 魔数, 版本, 记录长度, 桶宽(秒)
+ROLLUP_HEADER = struct.Struct('<4sHHd')
+ROLLUP_MAGIC = b'BATR'
+ROLLUP_VERSION = 1
+# 汇总记录: 桶开始时间, 条数, 最小值, 最大值, 平均值, 最后一个值, 接通电源的比例
+ROLLUP = struct.Struct('<dIfffff')
+
+# 单条汇总记录，字段同 ROLLUP
+Rollup = Tuple[float, int, float, float, float, float, float]
+
+# 原始记录和汇总记录都以 double 类型的时间戳开头
+TIMESTAMP = struct.Struct('<d')
+
+
+def _bisect(view, header_size: int, record_size: int, count: int, timestamp: float) -> int:
+    """返回定长记录文件中第一条时间戳不小于 timestamp 的记录序号"""
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if TIMESTAMP.unpack_from(view, header_size + mid * record_size)[0] < timestamp:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def first_timestamp(path: str, header_size: int) -> Optional[float]:
+    """定长记录文件中第一条记录的时间戳，没有记录时返回None"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(header_size)
+            data = f.read(TIMESTAMP.size)
+    except OSError:
+        return None
+    return TIMESTAMP.unpack(data)[0] if len(data) == TIMESTAMP.size else None
+
+
+class RollupTier:
+    """一个汇总层级：当前桶保存在内存中，结束的桶追加到文件"""
+
+    def __init__(self, path: str, seconds: float, retention: Optional[float] = None):
+        """
+        Args:
+            path: 汇总文件路径
+            seconds: 桶宽(秒)
+            retention: 汇总记录保留时长(秒)，None表示不删除
+        """
+        self.path = path
+        self.seconds = seconds
+        self.retention = retention
+        # 没有汇总文件但已有原始记录时，需要由后台线程补建后才能使用
+        self.ready = True
+        self._file = None
+        self._last_start = None
+        # 当前桶: [开始时间, 条数, 最小值, 最大值, 总和, 最后一个值, 接通电源的条数]
+        self._bucket = None
+        self._buffer = bytearray(ROLLUP.size)
+
+    def exists(self) -> bool:
+        try:
+            return os.path.getsize(self.path) > ROLLUP_HEADER.size
+        except OSError:
+            return False
+
+    def first_timestamp(self) -> Optional[float]:
+        """最早的桶的开始时间"""
+        first = first_timestamp(self.path, ROLLUP_HEADER.size)
+        bucket = self._bucket
+        if first is None and bucket is not None:
+            return bucket[0]
+        return first
+
+    def _open(self):
+        """打开文件，校验文件头并截掉不完整的尾部记录"""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        f = os.fdopen(fd, 'r+b', buffering=0)
+        header = f.read(ROLLUP_HEADER.size)
+        expected = (ROLLUP_MAGIC, ROLLUP_VERSION, ROLLUP.size, float(self.seconds))
+        if not header:
+            f.write(ROLLUP_HEADER.pack(*expected))
+        elif len(header) < ROLLUP_HEADER.size or ROLLUP_HEADER.unpack(header) != expected:
+            f.close()
+            raise ValueError(f"不支持的汇总记录文件格式: {self.path}")
+        size = os.fstat(fd).st_size
+        count = max(0, size - ROLLUP_HEADER.size) // ROLLUP.size
+        whole = ROLLUP_HEADER.size + count * ROLLUP.size
+        if whole != size:
+            f.truncate(whole)
+        self._last_start = None
+        if count:
+            f.seek(whole - ROLLUP.size)
+            self._last_start = TIMESTAMP.unpack(f.read(TIMESTAMP.size))[0]
+        f.seek(0, os.SEEK_END)
+        self._file = f
+
+    def _resume(self, start: float):
+        """上次关闭时写入的最后一个桶尚未结束，读回内存继续累加"""
+        f = self._file
+        offset = f.seek(-ROLLUP.size, os.SEEK_END)
+        _, count, low, high, mean, last, plugged = ROLLUP.unpack(f.read(ROLLUP.size))
+        f.truncate(offset)
+        f.seek(offset)
+        self._last_start = None
+        self._bucket = [start, count, low, high, mean * count, last, round(plugged * count)]
+
+    def add(self, timestamp: float, percent: float, plugged: bool):
+        """加入一条读数"""
+        start = timestamp - timestamp % self.seconds
+        bucket = self._bucket
+        if bucket is not None and bucket[0] == start:
+            bucket[1] += 1
+            if percent < bucket[2]:
+                bucket[2] = percent
+            if percent > bucket[3]:
+                bucket[3] = percent
+            bucket[4] += percent
+            bucket[5] = percent
+            if plugged:
+                bucket[6] += 1
+            return
+        if bucket is not None:
+            if start < bucket[0]:
+                return
+            self._write(bucket)
+        if self._file is None:
+            self._open()
+        if self._last_start is not None and start <= self._last_start:
+            if start < self._last_start:
+                # 已经汇总过的时间
+                return
+            self._resume(start)
+            self.add(timestamp, percent, plugged)
+            return
+        self._bucket = [start, 1, percent, percent, percent, percent, 1 if plugged else 0]
+
+    def _write(self, bucket: list):
+        if self._file is None:
+            self._open()
+        start, count, low, high, total, last, plugged = bucket
+        ROLLUP.pack_into(self._buffer, 0, start, count, low, high, total / count, last,
+                         plugged / count)
+        self._file.write(self._buffer)
+        self._last_start = start
+        self._bucket = None
+
+    def release(self):
+        """只关闭文件，当前桶留在内存中（压缩替换文件前调用）"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """写入当前桶（下次打开后同一个桶的读数会继续累加）"""
+        if self._file is not None:
+            if self._bucket is not None:
+                self._write(self._bucket)
+            self._file.close()
+            self._file = None
+
+    def records(self, start: Optional[float] = None) -> Iterator[Rollup]:
+        """按时间顺序遍历 start 所在的桶及之后的汇总记录，包括尚未结束的当前桶"""
+        try:
+            with open(self.path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        except (FileNotFoundError, ValueError):
+            mapped = None
+        if mapped is not None:
+            try:
+                count = max(0, len(mapped) - ROLLUP_HEADER.size) // ROLLUP.size
+                first = 0
+                if start is not None:
+                    first = _bisect(mapped, ROLLUP_HEADER.size, ROLLUP.size, count,
+                                    start - start % self.seconds)
+                offset = ROLLUP_HEADER.size
+                with memoryview(mapped) as view:
+                    for record in ROLLUP.iter_unpack(view[offset + first * ROLLUP.size:
+                                                          offset + count * ROLLUP.size]):
+                        yield record
+            finally:
+                mapped.close()
+        bucket = self._bucket
+        if bucket is not None and (start is None or bucket[0] + self.seconds > start):
+            begin, count, low, high, total, last, plugged = bucket
+            yield (begin, count, low, high, total / count, last, plugged / count)
+
+
+def compact_file(path: str, header_size: int, record_size: int, cutoff: float,
+                 lock: threading.Lock, release: Callable[[], None]) -> int:
+    """
+    删除定长记录文件中时间戳早于 cutoff 的记录
+
+    先在锁外把保留的记录复制到临时文件，再在锁内补上期间追加的记录并替换原文件，
+    追加方只在替换的瞬间被阻塞。
+
+    Args:
+        lock: 追加方写入文件时持有的锁
+        release: 在锁内调用，关闭追加方打开的文件（下次追加时重新打开）
+
+    Returns:
+        删除的记录条数
+    """
+    tmp_path = path + '.compact'
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < header_size + record_size:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            count = (len(mapped) - header_size) // record_size
+            first = _bisect(mapped, header_size, record_size, count, cutoff)
+            if first == 0:
+                return 0
+            end = header_size + count * record_size
+            with open(tmp_path, 'wb') as out:
+                out.write(mapped[:header_size])
+                out.write(mapped[header_size + first * record_size:end])
+
+    try:
+        with lock:
+            # 锁内只复制期间新追加的记录
+            with open(path, 'rb') as f, open(tmp_path, 'ab') as out:
+                f.seek(end)
+                tail = f.read()
+                out.write(tail[:len(tail) // record_size * record_size])
+                out.flush()
+                os.fsync(out.fileno())
+            release()
+            os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return first
+
+
+class HistoryCompactor:
+    """后台线程：补建缺失的汇总层级，并按保留时长删除过期的原始记录和汇总记录"""
+
+    def __init__(self, store, interval: float = 86400.0, delay: float = 60.0):
+        """
+        Args:
+            store: HistoryStore
+            interval: 两次压缩之间的间隔(秒)
+            delay: 启动后第一次压缩前的等待时间(秒)，避开启动阶段
+        """
+        self.store = store
+        self.interval = interval
+        self.delay = delay
+        self.run_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="history-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        if self._stop.wait(self.delay):
+            return
+        while True:
+            try:
+                self.store.rebuild_rollups()
+                self.store.compact()
+            except (OSError, ValueError) as e:
+                print(f"压缩电池历史记录时出错: {e}")
+            self.run_count += 1
+            if self._stop.wait(self.interval):
+                return
@@ -0,0 +1,194 @@
+"""
+电池采样调度模块
+"""
+
+import threading
+import time
+from typing import Any, Callable, Optional
+from utils.power import set_timer_slack
+
+
+class SamplingScheduler:
+    """
+    采样调度器 - 统一负责所有硬件读取
+
+    使用单调时钟按固定节拍采样，并按计划时间推进下一次节拍以修正漂移。
+    每次采样结果只通过 callback 交付一次。暂停期间采样线程不设超时地等待，
+    不产生任何定时唤醒。
+    """
+
+    def __init__(self, sample_fn: Callable[[], Optional[Any]],
+                 callback: Callable[[Any], None], interval: float,
+                 interval_fn: Optional[Callable[[Optional[Any]], float]] = None,
+                 timer_slack: float = 0.0):
+        """
+        Args:
+            sample_fn: 采样函数，返回None表示本次没有可用数据
+            callback: 采样结果回调（在采样线程中调用）
+            interval: 采样间隔(秒)
+            interval_fn: 可选，根据本次采样结果返回下一次采样间隔(秒)
+            timer_slack: 采样线程的定时器松弛时间(秒)，允许内核推迟并合并定时唤醒（仅 Linux）
+        """
+        self.sample_fn = sample_fn
+        self.callback = callback
+        self.interval = interval
+        self.interval_fn = interval_fn
+        self.timer_slack = timer_slack
+
+        self._cond = threading.Condition()
+        self._running = False
+        self._paused = False
+        self._refresh_requested = False
+        self._thread = None
+
+        # 统计信息
+        self.tick_count = 0
+        self.refresh_count = 0
+        self.wakeup_count = 0
+        self.pause_count = 0
+        self.last_drift = 0.0
+        self.max_drift = 0.0
+        self.total_drift = 0.0
+        self.failure_count = 0
+        self.last_sample_duration = 0.0
+        self.total_sample_duration = 0.0
+
+    def start(self):
+        """启动采样线程，第一次采样立即进行"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._loop, name="battery-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止采样线程"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def pause(self):
+        """暂停定时采样，期间的刷新请求推迟到恢复时处理"""
+        with self._cond:
+            if not self._paused:
+                self._paused = True
+                self.pause_count += 1
+                self._cond.notify()
+
+    def resume(self):
+        """恢复定时采样，并立即采样一次"""
+        with self._cond:
+            if self._paused:
+                self._paused = False
+                self._refresh_requested = True
+                self._cond.notify()
+
+    def is_paused(self) -> bool:
+        return self._paused
+
+    def request_refresh(self):
+        """
+        请求立即刷新
+
+        刷新请求会把下一次节拍提前到现在，而不是额外增加一次读取；
+        多个尚未处理的请求合并为一次。
+        """
+        with self._cond:
+            self._refresh_requested = True
+            self._cond.notify()
+
+    def run(self):
+        """在当前线程中运行采样循环，直到 stop() 被调用"""
+        with self._cond:
+            self._running = True
+        self._loop()
+
+    def _loop(self):
+        if self.timer_slack:
+            set_timer_slack(self.timer_slack)
+        next_deadline = time.monotonic()
+
+        while True:
+            with self._cond:
+                while self._running:
+                    if self._paused:
+                        self._cond.wait()
+                        self.wakeup_count += 1
+                        continue
+                    if self._refresh_requested:
+                        break
+                    remaining = next_deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                    self.wakeup_count += 1
+                if not self._running:
+                    return
+                forced = self._refresh_requested
+                self._refresh_requested = False
+
+            now = time.monotonic()
+            if forced:
+                self.refresh_count += 1
+            else:
+                self._record_drift(now - next_deadline)
+
+            data = self._tick()
+            if self.interval_fn is not None:
+                self.interval = self.interval_fn(data)
+
+            # 按计划时间推进以抵消漂移；落后超过一个周期（如系统休眠）时重新对齐
+            if forced:
+                next_deadline = now + self.interval
+            else:
+                next_deadline += self.interval
+                if next_deadline <= time.monotonic():
+                    next_deadline = time.monotonic() + self.interval
+
+    def _tick(self):
+        """执行一次采样并交付结果"""
+        self.tick_count += 1
+        started = time.perf_counter()
+        try:
+            data = self.sample_fn()
+        except Exception as e:
+            print(f"监控电池状态时出错: {e}")
+            data = None
+        self.last_sample_duration = time.perf_counter() - started
+        self.total_sample_duration += self.last_sample_duration
+        if data is None:
+            self.failure_count += 1
+            return None
+        try:
+            self.callback(data)
+        except Exception as e:
+            print(f"监控电池状态时出错: {e}")
+        return data
+
+    def _record_drift(self, drift: float):
+        self.last_drift = drift
+        self.total_drift += drift
+        if drift > self.max_drift:
+            self.max_drift = drift
+
+    def get_stats(self) -> dict:
+        """获取调度统计信息"""
+        scheduled = self.tick_count - self.refresh_count
+        return {
+            'ticks': self.tick_count,
+            'interval': self.interval,
+            'refreshes': self.refresh_count,
+            'wakeups': self.wakeup_count,
+            'pauses': self.pause_count,
+            'paused': self._paused,
+            'failures': self.failure_count,
+            'last_sample_duration': self.last_sample_duration,
+            'total_sample_duration': self.total_sample_duration,
+            'last_drift': self.last_drift,
+            'max_drift': self.max_drift,
+            'mean_drift': self.total_drift / scheduled if scheduled else 0.0,
+        }
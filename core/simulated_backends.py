@@ -0,0 +1,221 @@
+"""
+模拟电池后端模块 - 合成充放电曲线与记录回放，用于加速的负载测试
+
+两种后端都有自己的时钟：
+  - 实时模式：后端时间 = 起始时间 + 经过的真实时间 × speed
+  - 步进模式(step)：每次读取后端时间前进固定的 step 秒，与真实时间无关，
+    可以按CPU能承受的最快速度驱动整个流程
+"""
+
+import bisect
+import csv
+import json
+import random
+import time
+from array import array
+from typing import Optional
+from core.battery_backends import (BatteryBackend, BatteryStatus,
+                                   POWER_TIME_UNKNOWN, POWER_TIME_UNLIMITED)
+
+
+class _BackendClock:
+    """模拟后端的时钟"""
+
+    def __init__(self, start: float, speed: float = 1.0, step: Optional[float] = None):
+        self.start = start
+        self.speed = speed
+        self.step = step
+        self._time = start
+        self._origin = time.monotonic()
+
+    def now(self) -> float:
+        """下一次读取将看到的时间"""
+        if self.step:
+            return self._time + self.step
+        return self.start + (time.monotonic() - self._origin) * self.speed
+
+    def advance(self) -> float:
+        """读取时推进时钟并返回当前时间"""
+        self._time = self.now()
+        return self._time
+
+
+class SimulatedBackend(BatteryBackend):
+    """
+    合成充放电曲线
+
+    放电到 low_mark 后自动接通电源，按恒流/恒压两段充电到100%，
+    保持 full_hold 秒后断开电源，如此循环。放电功率带有随机波动。
+    """
+
+    name = "sim"
+    simulated = True
+
+    def __init__(self, speed: float = 1.0, step: float = None, start: float = 80.0,
+                 discharge_rate: float = 12.0, charge_rate: float = 60.0,
+                 low_mark: float = 10.0, full_hold: float = 1800.0, plugged: bool = False,
+                 noise: float = 0.2, seed: int = None, start_time: float = None):
+        """
+        Args:
+            speed: 实时模式下的倍速
+            step: 步进模式下每次读取前进的秒数，为None时使用实时模式
+            start: 初始电量(百分比)
+            discharge_rate: 平均放电速率(百分比/小时)
+            charge_rate: 恒流阶段充电速率(百分比/小时)
+            low_mark: 放电到该电量后自动接通电源
+            full_hold: 充满后保持接通电源的时间(秒)
+            plugged: 初始是否接通电源
+            noise: 放电功率的相对波动幅度
+            seed: 随机数种子
+            start_time: 起始时间戳，默认为当前时间
+        """
+        self.clock = _BackendClock(start_time or time.time(), speed, step)
+        self.speed = speed if not step else 1.0
+        self.percent = float(start)
+        self.plugged = bool(plugged)
+        self.discharge_rate = discharge_rate / 3600.0
+        self.charge_rate = charge_rate / 3600.0
+        self.low_mark = low_mark
+        self.full_hold = full_hold
+        self.noise = noise
+        self.random = random.Random(seed)
+        self._last_time = self.clock.start
+        self._full_since = None
+        self._load = 1.0
+
+    def now(self) -> float:
+        return self.clock.now()
+
+    def read(self) -> BatteryStatus:
+        current = self.clock.advance()
+        self._advance(current - self._last_time, current)
+        self._last_time = current
+
+        if self.plugged:
+            secsleft = POWER_TIME_UNLIMITED
+        else:
+            rate = self.discharge_rate * self._load
+            secsleft = int(self.percent / rate) if rate > 0 else POWER_TIME_UNKNOWN
+        return BatteryStatus(self.percent, secsleft, self.plugged)
+
+    def _advance(self, dt: float, current: float):
+        """把电池模型推进 dt 秒"""
+        if dt <= 0:
+            return
+        if self.plugged:
+            # 80% 以下恒流充电，之后恒压阶段速率逐渐下降
+            taper = 1.0 if self.percent < 80 else max(0.05, (100 - self.percent) / 20)
+            self.percent = min(100.0, self.percent + self.charge_rate * taper * dt)
+            if self.percent >= 100:
+                if self._full_since is None:
+                    self._full_since = current
+                elif current - self._full_since >= self.full_hold:
+                    self.plugged = False
+                    self._full_since = None
+        else:
+            # 负载随机游走，围绕1.0波动
+            self._load += self.random.uniform(-self.noise, self.noise) * min(1.0, dt / 60)
+            self._load = min(1 + self.noise * 2, max(1 - self.noise * 2, self._load))
+            self.percent = max(0.0, self.percent - self.discharge_rate * self._load * dt)
+            if self.percent <= self.low_mark:
+                self.plugged = True
+
+
+class TraceReplayBackend(BatteryBackend):
+    """
+    回放记录的电池读数
+
+    支持无界面模式输出的JSON行文件、CSV文件(timestamp,percent,plugged[,secsleft])
+    以及历史记录二进制文件(.bin)。
+    """
+
+    name = "replay"
+    simulated = True
+
+    def __init__(self, path: str, speed: float = 1.0, step: bool = False, loop: bool = False):
+        """
+        Args:
+            path: 记录文件路径
+            speed: 实时模式下的回放倍速
+            step: 为True时每次读取前进一条记录
+            loop: 回放结束后是否从头开始
+        """
+        self.path = path
+        self.loop = loop
+        self.timestamps = array('d')
+        self.percents = array('f')
+        self.secsleft = array('i')
+        self.plugged = bytearray()
+        self._load(path)
+        if not self.timestamps:
+            raise ValueError(f"记录文件中没有读数: {path}")
+
+        self.step = bool(step)
+        self.speed = speed if not step else 1.0
+        self.duration = self.timestamps[-1] - self.timestamps[0]
+        self.clock = _BackendClock(self.timestamps[0], speed)
+        # 步进模式下已读取的记录数；循环回放时每轮的时间戳整体后移一个周期
+        self._position = 0
+        self._period = self.duration + (self.timestamps[1] - self.timestamps[0]
+                                        if len(self.timestamps) > 1 else 1.0)
+
+    def _append(self, timestamp, percent, plugged, secsleft):
+        self.timestamps.append(float(timestamp))
+        self.percents.append(float(percent))
+        self.plugged.append(1 if plugged else 0)
+        self.secsleft.append(int(secsleft) if secsleft is not None else POWER_TIME_UNKNOWN)
+
+    def _load(self, path: str):
+        if path.endswith('.bin'):
+            from core.history import HistoryView, iter_records
+            with HistoryView(path) as view:
+                records = view.range()
+                for record in iter_records(records):
+                    self._append(*record)
+                records.release()
+        elif path.endswith('.csv'):
+            with open(path, newline='') as f:
+                for row in csv.DictReader(f):
+                    self._append(row['timestamp'], row['percent'],
+                                 row['plugged'].strip().lower() in ('1', 'true'),
+                                 row.get('secsleft') or None)
+        else:
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._append(record['timestamp'], record['percent'],
+                                     record['plugged'], record.get('secsleft'))
+
+    def _next_index(self) -> Optional[int]:
+        """下一次读取对应的记录序号，回放结束且不循环时返回None"""
+        count = len(self.timestamps)
+        if self.step:
+            if self._position >= count and not self.loop:
+                return None
+            return self._position % count
+        elapsed = self.clock.now() - self.timestamps[0]
+        if self.loop and self.duration > 0:
+            elapsed %= self.duration
+        elif elapsed > self.duration:
+            return None
+        return max(0, bisect.bisect_right(self.timestamps, self.timestamps[0] + elapsed) - 1)
+
+    def now(self) -> float:
+        if self.step:
+            position = min(self._position, len(self.timestamps) - 1) if not self.loop else self._position
+            cycle, index = divmod(position, len(self.timestamps))
+            return self.timestamps[index] + cycle * self._period
+        return self.clock.now()
+
+    def read(self) -> Optional[BatteryStatus]:
+        index = self._next_index()
+        if index is None:
+            return None
+        self._position += 1
+        return BatteryStatus(self.percents[index], self.secsleft[index], bool(self.plugged[index]))
+
+    @property
+    def finished(self) -> bool:
+        """回放是否已结束"""
+        return self._next_index() is None
@@ -0,0 +1,136 @@
+"""
+Linux 内核 uevent 监听模块
+
+通过 NETLINK_KOBJECT_UEVENT 套接字接收内核广播的设备事件，
+电源接入/断开或电量变化时内核会发送 SUBSYSTEM=power_supply 的事件。
+只使用标准库，不依赖 udev。
+"""
+
+import selectors
+import socket
+import sys
+import threading
+from typing import Callable, Dict, Optional
+
+NETLINK_KOBJECT_UEVENT = 15
+KERNEL_GROUP = 1   # 内核直接发出的事件（udev 重新广播的在组2）
+
+
+def parse_uevent(data: bytes) -> Optional[Dict[str, str]]:
+    """
+    解析内核 uevent 消息
+
+    消息格式为 "action@devpath\\0KEY=VALUE\\0KEY=VALUE..."，
+    以 "libudev" 开头的是 udev 的二进制格式，不做处理。
+
+    Returns:
+        属性字典，无法解析时返回None
+    """
+    if not data or data.startswith(b'libudev'):
+        return None
+    parts = data.split(b'\0')
+    header = parts[0].decode('utf-8', 'replace')
+    if '@' not in header:
+        return None
+    event = {}
+    for part in parts[1:]:
+        key, sep, value = part.partition(b'=')
+        if sep:
+            event[key.decode('utf-8', 'replace')] = value.decode('utf-8', 'replace')
+    action, _, devpath = header.partition('@')
+    event.setdefault('ACTION', action)
+    event.setdefault('DEVPATH', devpath)
+    return event
+
+
+def build_uevent(action: str, devpath: str, **properties) -> bytes:
+    """按内核格式构造 uevent 消息（用于测试）"""
+    fields = [f"{action}@{devpath}", f"ACTION={action}", f"DEVPATH={devpath}"]
+    fields.extend(f"{key}={value}" for key, value in properties.items())
+    return '\0'.join(fields).encode('utf-8') + b'\0'
+
+
+class UeventListener:
+    """在后台线程中监听 uevent，并把匹配子系统的事件交给回调"""
+
+    def __init__(self, on_event: Callable[[Dict[str, str]], None],
+                 subsystem: str = 'power_supply', sock: Optional[socket.socket] = None):
+        """
+        Args:
+            on_event: 事件回调（在监听线程中调用）
+            subsystem: 只关心该子系统的事件
+            sock: 已创建的数据报套接字，默认创建内核 netlink 套接字
+        """
+        self.on_event = on_event
+        self.subsystem = subsystem
+        self.sock = sock
+        self.event_count = 0
+        self._thread = None
+        self._wakeup_r, self._wakeup_w = None, None
+
+    @staticmethod
+    def is_supported() -> bool:
+        """当前系统是否支持 netlink uevent"""
+        return sys.platform.startswith('linux') and hasattr(socket, 'AF_NETLINK')
+
+    def start(self) -> bool:
+        """
+        开始监听
+
+        Returns:
+            是否成功打开 netlink 套接字
+        """
+        if self.sock is None:
+            try:
+                self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM,
+                                          NETLINK_KOBJECT_UEVENT)
+                self.sock.bind((0, KERNEL_GROUP))
+            except (OSError, AttributeError) as e:
+                print(f"无法监听电源事件，改为定时采样: {e}")
+                self.sock = None
+                return False
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._thread = threading.Thread(target=self._loop, name="uevent-listener", daemon=True)
+        self._thread.start()
+        return True
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        """停止监听并关闭套接字"""
+        if self._wakeup_w is not None:
+            try:
+                self._wakeup_w.send(b'\0')
+            except OSError:
+                pass
+
+    def _loop(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self.sock, selectors.EVENT_READ)
+        selector.register(self._wakeup_r, selectors.EVENT_READ)
+        try:
+            while True:
+                for key, _ in selector.select():
+                    if key.fileobj is self._wakeup_r:
+                        return
+                    try:
+                        data = self.sock.recv(16384)
+                    except OSError:
+                        # 事件过多时接收缓冲区溢出(ENOBUFS)，丢弃后继续
+                        continue
+                    event = parse_uevent(data)
+                    if event is not None and event.get('SUBSYSTEM') == self.subsystem:
+                        self.event_count += 1
+                        try:
+                            self.on_event(event)
+                        except Exception as e:
+                            print(f"处理电源事件时出错: {e}")
+        finally:
+            selector.close()
+            self.sock.close()
+            self._wakeup_r.close()
+            self._wakeup_w.close()
+            self._wakeup_w = None
+
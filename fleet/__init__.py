@@ -0,0 +1,8 @@
+"""
+多机汇总
+
+各台机器上的电池监控作为代理，把读数分批压缩后发送给集中的收集服务：
+
+    python main.py --headless --fleet collector.example:9750
+    python -m fleet.collector --tcp :9750 --udp :9750 --report 60
+"""
@@ -0,0 +1,175 @@
+"""
+多机汇总代理 - 把本机读数分批发送给收集服务
+"""
+
+import collections
+import socket
+import threading
+import time
+from core.reading import ProcessedReading
+from fleet.protocol import LENGTH, encode_frame
+
+
+class FleetAgent:
+    """
+    读数攒够 batch_size 条或距第一条超过 max_delay 秒时压缩为一帧发送。
+
+    publish() 在采样线程中调用，只把读数放入队列；连接和发送都在代理自己的后台线程中进行，
+    收集服务不可用时不会拖慢采样。发送失败时保留最近的读数，按指数退避重新连接。
+    """
+
+    # 发送失败时最多保留的读数条数
+    MAX_PENDING = 1024
+    CONNECT_TIMEOUT = 2.0
+    # 发送失败后重新连接的最短/最长间隔(秒)
+    MIN_RETRY_DELAY = 1.0
+    MAX_RETRY_DELAY = 300.0
+
+    def __init__(self, address: str, host: str = None, batch_size: int = 10,
+                 max_delay: float = 60.0):
+        """
+        Args:
+            address: 收集服务地址，"host:port"、"tcp://host:port" 或 "udp://host:port"
+            host: 上报的主机名，默认为本机主机名
+            batch_size: 每帧的读数条数
+            max_delay: 第一条读数最多等待多少秒后发送
+        """
+        scheme, sep, rest = address.partition('://')
+        if not sep:
+            scheme, rest = 'tcp', address
+        if scheme not in ('tcp', 'udp'):
+            raise ValueError(f"不支持的传输方式: {scheme}")
+        server, _, port = rest.rpartition(':')
+        self.transport = scheme
+        self.address = (server or '127.0.0.1', int(port))
+        self.host = host or socket.gethostname()
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.pending = collections.deque(maxlen=self.MAX_PENDING)
+        self.sent_frames = 0
+        self.failure_count = 0
+        self._first_time = None
+        self._sock = None
+
+        self._lock = threading.Condition()
+        self._flush_requested = False
+        self._retry_at = 0.0
+        self._retry_delay = self.MIN_RETRY_DELAY
+        self._thread = None
+        self._closed = False
+
+    def publish(self, data: ProcessedReading):
+        """加入一条读数（DataProcessor 处理后的数据），不等待发送"""
+        if data.reading is None or data.percent is None:
+            return
+        with self._lock:
+            if self._closed:
+                return
+            self.pending.append((data.timestamp, data.percent, data.plugged, data.secsleft))
+            if self._first_time is None:
+                self._first_time = time.monotonic()
+                self._start_thread()
+                self._lock.notify()
+            elif len(self.pending) >= self.batch_size:
+                self._lock.notify()
+
+    def flush(self):
+        """请求后台线程立即发送所有待发送的读数（不等待发送完成）"""
+        with self._lock:
+            if self.pending:
+                self._flush_requested = True
+                self._start_thread()
+                self._lock.notify()
+
+    def stop(self, timeout: float = None):
+        """
+        发送剩余读数并关闭连接
+
+        Args:
+            timeout: 最多等待多少秒，默认为 CONNECT_TIMEOUT；收集服务不可用时丢弃剩余读数
+        """
+        with self._lock:
+            self._closed = True
+            self._lock.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(self.CONNECT_TIMEOUT if timeout is None else timeout)
+
+    def _start_thread(self):
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name="fleet-agent", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self):
+        """等待到可以发送的时候取出全部待发送的读数；已停止且没有读数时返回None"""
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                if not self.pending:
+                    if self._closed:
+                        return None
+                    self._lock.wait()
+                    continue
+                if now < self._retry_at:
+                    if self._closed:
+                        # 收集服务不可用，放弃剩余读数
+                        return None
+                    self._lock.wait(self._retry_at - now)
+                    continue
+                due = self._first_time + self.max_delay
+                if (self._closed or self._flush_requested
+                        or len(self.pending) >= self.batch_size or now >= due):
+                    break
+                self._lock.wait(due - now)
+            batch = list(self.pending)
+            self.pending.clear()
+            self._first_time = None
+            self._flush_requested = False
+            return batch
+
+    def _requeue(self, batch: list) -> float:
+        """发送失败：把读数放回队列前面（超出 MAX_PENDING 时丢弃最早的），返回推迟重试的秒数"""
+        with self._lock:
+            newer = list(self.pending)
+            self.pending.clear()
+            self.pending.extend(batch)
+            self.pending.extend(newer)
+            delay = self._retry_delay
+            self._first_time = time.monotonic()
+            self._retry_at = self._first_time + delay
+            self._retry_delay = min(delay * 2, self.MAX_RETRY_DELAY)
+            return delay
+
+    def _run(self):
+        """后台发送循环"""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                self._close_socket()
+                return
+            try:
+                self._send(encode_frame(self.host, batch))
+            except OSError as e:
+                self.failure_count += 1
+                self._close_socket()
+                delay = self._requeue(batch)
+                print(f"发送读数到收集服务失败，{delay:g}秒后重试: {e}")
+                continue
+            self.sent_frames += 1
+            self._retry_delay = self.MIN_RETRY_DELAY
+
+    def _send(self, frame: bytes):
+        if self.transport == 'udp':
+            if self._sock is None:
+                self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.sendto(frame, self.address)
+            return
+        if self._sock is None:
+            self._sock = socket.create_connection(self.address, timeout=self.CONNECT_TIMEOUT)
+        self._sock.sendall(LENGTH.pack(len(frame)) + frame)
+
+    def _close_socket(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
@@ -0,0 +1,332 @@
+"""
+多机收集服务
+
+基于 asyncio 在 TCP/UDP 上接收代理发送的读数帧，为每台主机保存最新状态和
+最近的读数（定长环形缓冲区），并维护按电量和按耗电速率排序的索引，
+"电量低于15%的主机"、"耗电最快的主机"等查询只做二分查找和切片，不遍历所有主机。
+超过 stale_after 秒没有发来读数的主机在查询前移出索引（按最后收到读数的时间排序，
+只处理过期的那些主机），重新发来读数后再加入。
+
+    python -m fleet.collector --tcp :9750 --udp :9750 --report 60
+"""
+
+import argparse
+import asyncio
+import bisect
+import socket
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from core.estimator import ChargeRateEstimator
+from core.history import SampleRing
+from core.metrics_server import parse_address
+from fleet.protocol import FrameError, decode_frame, iter_frame_records, split_stream
+
+
+class SortedIndex:
+    """按键排序的 (键, 主机序号) 列表，更新为一次二分删除加一次二分插入"""
+
+    def __init__(self):
+        self.entries: List[Tuple[float, int]] = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def set(self, host_id: int, old_key: Optional[float], new_key: Optional[float]):
+        """把主机的键从 old_key 改为 new_key，None 表示不在索引中"""
+        if old_key == new_key:
+            return
+        entries = self.entries
+        if old_key is not None:
+            i = bisect.bisect_left(entries, (old_key, host_id))
+            if i < len(entries) and entries[i] == (old_key, host_id):
+                del entries[i]
+        if new_key is not None:
+            bisect.insort(entries, (new_key, host_id))
+
+    def below(self, limit: float) -> List[Tuple[float, int]]:
+        """键小于 limit 的所有条目（按键升序）"""
+        return self.entries[:bisect.bisect_left(self.entries, (limit, -1))]
+
+    def lowest(self, count: int) -> List[Tuple[float, int]]:
+        return self.entries[:count]
+
+
+class HostState:
+    """单台主机的最新状态和最近读数"""
+
+    __slots__ = ('id', 'name', 'ring', 'estimator', 'timestamp', 'percent', 'plugged',
+                 'secsleft', 'rate', 'last_seen', 'stale')
+
+    def __init__(self, host_id: int, name: str, history: int):
+        self.id = host_id
+        self.name = name
+        self.ring = SampleRing(history)
+        self.estimator = ChargeRateEstimator()
+        self.timestamp = None
+        self.percent = None
+        self.plugged = None
+        self.secsleft = None
+        self.rate = None        # 放电速率(百分比/秒，负数)，不在放电或尚不可信时为None
+        self.last_seen = None
+        self.stale = False      # 已因长时间没有读数移出索引
+
+
+class FleetCollector:
+    """读数汇总：最新状态、最近历史和排序索引"""
+
+    # UDP 接收缓冲区大小（实际上限受系统 rmem_max 限制）
+    UDP_RECEIVE_BUFFER = 4 << 20
+
+    def __init__(self, history: int = 120, stale_after: Optional[float] = 1800):
+        """
+        Args:
+            history: 每台主机保留的最近读数条数
+            stale_after: 超过多少秒没有读数的主机不再出现在查询结果中，None表示不过期
+        """
+        self.history = history
+        self.stale_after = stale_after
+        self.hosts: Dict[str, HostState] = {}
+        self._by_id: List[HostState] = []
+        self.percent_index = SortedIndex()
+        self.drain_index = SortedIndex()
+        # 按最后收到读数的时间(time.monotonic())排序，用于找出过期的主机
+        self.seen_index = SortedIndex()
+
+        self.frame_count = 0
+        self.record_count = 0
+        self.error_count = 0
+
+        self._servers = []
+        self._transports = []
+
+    def _host(self, name: str) -> HostState:
+        host = self.hosts.get(name)
+        if host is None:
+            host = HostState(len(self._by_id), name, self.history)
+            self.hosts[name] = host
+            self._by_id.append(host)
+        return host
+
+    def ingest_frame(self, frame: bytes) -> int:
+        """
+        处理一帧
+
+        Returns:
+            帧中的读数条数，格式错误时为0
+        """
+        try:
+            name, payload, count = decode_frame(frame)
+        except FrameError:
+            self.error_count += 1
+            return 0
+        if not count:
+            return 0
+        host = self._host(name)
+        ring, estimator = host.ring, host.estimator
+        for timestamp, percent, secsleft, plugged in iter_frame_records(payload):
+            ring.append(timestamp, percent, plugged, secsleft)
+            estimator.update(timestamp, percent, bool(plugged))
+        self.frame_count += 1
+        self.record_count += count
+
+        # 每帧只更新一次最新状态和索引
+        timestamp, percent, plugged, secsleft = ring[-1]
+        if host.stale:
+            # 过期时已经移出索引
+            old_percent = old_rate = old_seen = None
+            host.stale = False
+        else:
+            old_percent, old_rate, old_seen = host.percent, host.rate, host.last_seen
+        host.timestamp, host.percent, host.plugged, host.secsleft = timestamp, percent, plugged, secsleft
+        host.last_seen = time.monotonic()
+        rate = estimator.rate
+        host.rate = rate if (not plugged and rate < 0 and estimator.confidence > 0) else None
+        self.percent_index.set(host.id, old_percent, percent)
+        self.drain_index.set(host.id, old_rate, host.rate)
+        self.seen_index.set(host.id, old_seen, host.last_seen)
+        return count
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        把超过 stale_after 秒没有读数的主机移出索引
+
+        Args:
+            now: 当前的 time.monotonic()，默认取当前值
+
+        Returns:
+            本次移出的主机数
+        """
+        if self.stale_after is None:
+            return 0
+        now = time.monotonic() if now is None else now
+        expired = self.seen_index.below(now - self.stale_after)
+        for last_seen, i in expired:
+            host = self._by_id[i]
+            self.percent_index.set(i, host.percent, None)
+            self.drain_index.set(i, host.rate, None)
+            host.stale = True
+        del self.seen_index.entries[:len(expired)]
+        return len(expired)
+
+    @property
+    def stale_count(self) -> int:
+        return len(self.hosts) - len(self.seen_index)
+
+    # 查询
+
+    def hosts_below(self, percent: float) -> List[Tuple[str, float]]:
+        """电量低于 percent 的主机，按电量升序（不含过期的主机）"""
+        self.expire()
+        return [(self._by_id[i].name, value) for value, i in self.percent_index.below(percent)]
+
+    def fastest_draining(self, count: int = 10) -> List[Tuple[str, float, float]]:
+        """
+        耗电最快的主机（不含过期的主机）
+
+        Returns:
+            [(主机名, 放电速率(百分比/小时), 预计耗尽时间(秒)), ...]
+        """
+        self.expire()
+        result = []
+        for rate, i in self.drain_index.lowest(count):
+            host = self._by_id[i]
+            result.append((host.name, rate * 3600, host.percent / -rate))
+        return result
+
+    def latest(self, name: str) -> Optional[dict]:
+        """主机的最新状态"""
+        host = self.hosts.get(name)
+        if host is None or host.timestamp is None:
+            return None
+        return {
+            'timestamp': host.timestamp,
+            'percent': host.percent,
+            'plugged': host.plugged,
+            'secsleft': host.secsleft,
+            'rate_per_hour': host.rate * 3600 if host.rate is not None else None,
+        }
+
+    def recent(self, name: str) -> list:
+        """主机的最近读数，按时间升序"""
+        host = self.hosts.get(name)
+        if host is None:
+            return []
+        return [host.ring[i] for i in range(len(host.ring))]
+
+    def format_report(self, low: float = 15, top: int = 10) -> str:
+        below = self.hosts_below(low)
+        lines = [f"主机 {len(self.hosts)} 台（过期 {self.stale_count} 台），帧 {self.frame_count}，"
+                 f"读数 {self.record_count}，错误帧 {self.error_count}"]
+        lines.append(f"电量低于 {low:g}%: {len(below)} 台")
+        lines.extend(f"  {name:<32} {percent:5.1f}%" for name, percent in below[:top])
+        draining = self.fastest_draining(top)
+        if draining:
+            lines.append("耗电最快:")
+            lines.extend(f"  {name:<32} {rate:6.1f}%/小时  约 {remaining / 60:.0f} 分钟耗尽"
+                         for name, rate, remaining in draining)
+        return "\n".join(lines)
+
+    # 网络
+
+    async def start(self, tcp: Optional[str] = None, udp: Optional[str] = None):
+        """在指定地址上开始接收（"port" 或 "host:port"）"""
+        loop = asyncio.get_running_loop()
+        if tcp is not None:
+            host, port = parse_address(tcp, '0.0.0.0')
+            # 大量代理同时重连时避免监听队列溢出（溢出的连接要等1秒后重试）
+            server = await loop.create_server(lambda: _StreamProtocol(self), host, port,
+                                              backlog=4096)
+            self._servers.append(server)
+        if udp is not None:
+            host, port = parse_address(udp, '0.0.0.0')
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _DatagramProtocol(self), local_addr=(host, port))
+            # 大量代理同时发送时用较大的接收缓冲区吸收突发，减少丢包
+            sock = transport.get_extra_info('socket')
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.UDP_RECEIVE_BUFFER)
+            self._transports.append(transport)
+
+    @property
+    def addresses(self) -> list:
+        """实际监听的地址，端口为0时由系统分配"""
+        result = [('tcp', sock.getsockname()) for server in self._servers for sock in server.sockets]
+        result.extend(('udp', transport.get_extra_info('sockname')) for transport in self._transports)
+        return result
+
+    async def stop(self):
+        for transport in self._transports:
+            transport.close()
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+        self._transports = []
+
+
+class _StreamProtocol(asyncio.Protocol):
+    """TCP 连接：按长度前缀拆分帧"""
+
+    def __init__(self, collector: FleetCollector):
+        self.collector = collector
+        self.buffer = bytearray()
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data: bytes):
+        self.buffer += data
+        try:
+            frames = split_stream(self.buffer)
+        except FrameError:
+            self.collector.error_count += 1
+            self.transport.close()
+            return
+        for frame in frames:
+            self.collector.ingest_frame(frame)
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    """UDP：每个数据报是一帧"""
+
+    def __init__(self, collector: FleetCollector):
+        self.collector = collector
+
+    def datagram_received(self, data: bytes, addr):
+        self.collector.ingest_frame(data)
+
+
+async def serve(args):
+    collector = FleetCollector(history=args.history, stale_after=args.stale or None)
+    await collector.start(tcp=args.tcp, udp=args.udp)
+    for kind, address in collector.addresses:
+        print(f"正在监听 {kind} {address[0]}:{address[1]}")
+    while True:
+        await asyncio.sleep(args.report or 3600)
+        if args.report:
+            print(collector.format_report(args.low), flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="电池读数收集服务")
+    parser.add_argument("--tcp", metavar="ADDRESS", help="TCP 监听地址（端口或 host:port）")
+    parser.add_argument("--udp", metavar="ADDRESS", help="UDP 监听地址（端口或 host:port）")
+    parser.add_argument("--history", type=int, default=120, help="每台主机保留的读数条数")
+    parser.add_argument("--report", type=float, default=60,
+                        help="每隔多少秒输出一次汇总，0表示不输出")
+    parser.add_argument("--low", type=float, default=15, help="汇总中低电量的阈值(百分比)")
+    parser.add_argument("--stale", type=float, default=1800,
+                        help="超过多少秒没有读数的主机不计入汇总，0表示不过期")
+    args = parser.parse_args(argv)
+    if args.tcp is None and args.udp is None:
+        parser.error("至少需要指定 --tcp 或 --udp")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
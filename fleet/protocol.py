@@ -0,0 +1,104 @@
+"""
+代理与收集服务之间的帧格式
+
+一帧包含一台主机的一批读数：
+
+    帧头 FRAME_HEADER | 主机名(UTF-8) | 读数（每条为 core.history.RECORD，可选 zlib 压缩）
+
+TCP 上每帧前加4字节长度，UDP 上每个数据报就是一帧。
+"""
+
+import struct
+import zlib
+from typing import Iterable, List, Tuple
+from core.history import RECORD, Sample
+
+# 帧头: 魔数, 版本, 标志, 主机名长度, 读数条数
+FRAME_HEADER = struct.Struct('<4sBBHH')
+MAGIC = b'BFLT'
+VERSION = 1
+FLAG_COMPRESSED = 0x01
+# TCP 帧长度前缀
+LENGTH = struct.Struct('<I')
+
+# 单帧最多的读数条数（UDP 数据报大小的限制由调用方保证）
+MAX_RECORDS = 4096
+MAX_FRAME = FRAME_HEADER.size + 255 + MAX_RECORDS * RECORD.size
+
+
+class FrameError(ValueError):
+    """帧格式错误"""
+
+
+def encode_frame(host: str, records: Iterable[Sample], compress: bool = True) -> bytes:
+    """
+    编码一帧
+
+    Args:
+        host: 主机名
+        records: (时间戳, 电量百分比, 是否接通电源, 剩余秒数) 列表
+        compress: 是否压缩读数部分
+    """
+    name = host.encode('utf-8')[:255]
+    payload = bytearray()
+    count = 0
+    for timestamp, percent, plugged, secsleft in records:
+        payload += RECORD.pack(timestamp, percent, secsleft, plugged)
+        count += 1
+    if count > MAX_RECORDS:
+        raise FrameError(f"单帧读数过多: {count}")
+    flags = 0
+    if compress:
+        packed = zlib.compress(bytes(payload), 1)
+        if len(packed) < len(payload):
+            payload, flags = packed, FLAG_COMPRESSED
+    return FRAME_HEADER.pack(MAGIC, VERSION, flags, len(name), count) + name + payload
+
+
+def decode_frame(frame: bytes) -> Tuple[str, memoryview, int]:
+    """
+    解码一帧
+
+    Returns:
+        (主机名, 未压缩的读数数据, 读数条数)，读数用 iter_frame_records() 遍历
+    """
+    if len(frame) < FRAME_HEADER.size:
+        raise FrameError("帧过短")
+    magic, version, flags, name_length, count = FRAME_HEADER.unpack_from(frame, 0)
+    if magic != MAGIC or version != VERSION:
+        raise FrameError("不支持的帧格式")
+    start = FRAME_HEADER.size + name_length
+    host = bytes(frame[FRAME_HEADER.size:start]).decode('utf-8', 'replace')
+    expected = count * RECORD.size
+    payload = memoryview(frame)[start:]
+    if flags & FLAG_COMPRESSED:
+        # 限制解压长度，防止压缩炸弹
+        decompressor = zlib.decompressobj()
+        payload = memoryview(decompressor.decompress(payload, expected))
+        if decompressor.unconsumed_tail:
+            raise FrameError("读数数据超过声明的长度")
+    if len(payload) != expected:
+        raise FrameError("读数数据长度与条数不一致")
+    return host, payload, count
+
+
+def iter_frame_records(payload: memoryview):
+    """遍历帧中的读数，产生 (时间戳, 电量百分比, 剩余秒数, 是否接通电源)"""
+    return RECORD.iter_unpack(payload)
+
+
+def split_stream(buffer: bytearray) -> List[bytes]:
+    """从 TCP 接收缓冲区中取出所有完整的帧，剩余部分留在缓冲区中"""
+    frames = []
+    offset = 0
+    while len(buffer) - offset >= LENGTH.size:
+        (length,) = LENGTH.unpack_from(buffer, offset)
+        if length > MAX_FRAME:
+            raise FrameError(f"帧过长: {length}")
+        end = offset + LENGTH.size + length
+        if end > len(buffer):
+            break
+        frames.append(bytes(buffer[offset + LENGTH.size:end]))
+        offset = end
+    del buffer[:offset]
+    return frames
@@ -0,0 +1,195 @@
+"""
+无界面运行模块 - 只运行 BatteryReader 和 DataProcessor，以JSON行输出读数
+
+本模块及其依赖不得导入 PyQt5。
+"""
+
+import json
+import os
+import signal
+import socket
+import sys
+from typing import Any, Dict, List, Optional
+from core.monitor import BatteryMonitor
+from core.reading import ProcessedReading
+from utils.diagnostics import diagnostics
+from utils.power import process_usage
+from utils.helpers import check_dependencies
+from utils.startup_profile import startup_profiler
+
+# 输出到JSON中的字段
+RECORD_FIELDS = ('timestamp', 'percent', 'plugged', 'secsleft', 'level',
+                 'time_to_empty', 'time_to_full', 'confidence')
+
+
+def to_record(data: ProcessedReading) -> Dict[str, Any]:
+    """将处理后的电池数据转换为输出记录"""
+    record = {field: getattr(data, field) for field in RECORD_FIELDS}
+    if data.view:
+        record['view'] = data.view
+    devices = data.devices
+    if devices:
+        record['devices'] = [
+            {'name': device.name, 'model': device.model, 'scope': device.scope,
+             'percent': round(device.percent, 1), 'plugged': device.power_plugged}
+            for device in devices
+        ]
+    return record
+
+
+class StreamSink:
+    """输出到文件流（标准输出或文件）"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def publish(self, line: bytes):
+        self.stream.write(line)
+        self.stream.flush()
+
+    def broken(self):
+        """读取端已关闭"""
+        if self.stream is sys.stdout.buffer:
+            # 退出时解释器还会刷新标准输出，指向 /dev/null 避免再次报错
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            os.close(devnull)
+        else:
+            self.close()
+
+    def close(self):
+        if self.stream not in (sys.stdout.buffer, sys.stderr.buffer):
+            self.stream.close()
+
+
+class SocketSink:
+    """
+    本地套接字广播
+
+    在 Unix 套接字路径或 host:port 上监听，每条读数发送给所有已连接的客户端，
+    发送失败的客户端直接断开。
+    """
+
+    def __init__(self, address: str):
+        self.address = address
+        self.clients: List[socket.socket] = []
+        host, sep, port = address.rpartition(':')
+        if sep and port.isdigit():
+            self.server = socket.create_server((host or '127.0.0.1', int(port)))
+            self.path = None
+        else:
+            if os.path.exists(address):
+                os.unlink(address)
+            self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server.bind(address)
+            self.server.listen()
+            self.path = address
+        self.server.setblocking(False)
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            client.setblocking(False)
+            self.clients.append(client)
+
+    def publish(self, line: bytes):
+        self._accept()
+        for client in list(self.clients):
+            try:
+                client.sendall(line)
+            except OSError:
+                self.clients.remove(client)
+                client.close()
+
+    def broken(self):
+        self.close()
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+        self.server.close()
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class HeadlessMonitor:
+    """无界面监控：采样、处理并把每条读数写入所有输出"""
+
+    def __init__(self, sinks: list, interval: Optional[float] = None, count: Optional[int] = None):
+        """
+        Args:
+            sinks: 输出列表
+            interval: 固定采样间隔(秒)，为None时按 settings 使用自适应采样
+            count: 输出指定条数后停止，为None时一直运行
+        """
+        self.sinks = sinks
+        self.remaining = count
+        self.monitor = BatteryMonitor(interval=interval)
+        self.monitor.subscribe(self.publish)
+
+    def publish(self, data: ProcessedReading):
+        line = (json.dumps(to_record(data), ensure_ascii=False) + "\n").encode('utf-8')
+        for sink in list(self.sinks):
+            try:
+                sink.publish(line)
+            except BrokenPipeError:
+                # 读取端已关闭（例如 "| head -1"），不再向该输出写入
+                self.sinks.remove(sink)
+                sink.broken()
+            except OSError as e:
+                print(f"输出读数时出错: {e}", file=sys.stderr)
+        if not self.sinks:
+            self.monitor.stop()
+            return
+        if not startup_profiler.reported:
+            startup_profiler.mark("首条读数输出")
+            startup_profiler.report()
+        if self.remaining is not None:
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self.monitor.stop()
+
+    def run(self):
+        """在当前线程中运行，直到收到中断信号或输出足够条数"""
+        try:
+            self.monitor.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for sink in self.sinks:
+                sink.close()
+
+
+def run_headless(args) -> int:
+    """
+    无界面模式入口
+
+    Args:
+        args: main.parse_args() 解析出的参数
+
+    Returns:
+        进程退出码
+    """
+    if not check_dependencies():
+        print("错误: 无法读取电池信息，请安装 psutil: pip install psutil", file=sys.stderr)
+        return 1
+
+    sinks = []
+    if args.output:
+        sinks.append(StreamSink(open(args.output, 'ab')))
+    if args.socket:
+        sinks.append(SocketSink(args.socket))
+    if not sinks:
+        sinks.append(StreamSink(sys.stdout.buffer))
+
+    monitor = HeadlessMonitor(sinks, interval=args.interval, count=args.count)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, lambda *_: monitor.monitor.stop())
+    monitor.run()
+    if args.diagnostics:
+        diagnostics.dump(args.diagnostics, {'sampler': monitor.monitor.sampler.get_stats(),
+                                            'process': process_usage.snapshot()})
+    return 0
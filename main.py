@@ -1,174 +1,100 @@
 """
 主程序入口 - 系统托盘版本
+
+    python main.py               启动悬浮窗和系统托盘
+    python main.py --headless    无界面模式，以JSON行输出读数（不导入PyQt5）
+    python main.py --metrics 9101  同时在本机端口上输出 Prometheus 指标
 """
 
 import sys
-import os
-from PyQt5.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QAction
-from PyQt5.QtGui import QIcon, QPixmap, QPainter, QColor, QFont
-from PyQt5.QtCore import QTimer, Qt
-from ui.qt_overlay import BatteryOverlay
-from ui.settings_window import SettingsWindow
-from config_manager import ConfigManager
+from utils.startup_profile import startup_profiler
 from utils.helpers import check_system_compatibility, check_dependencies, show_error_message
 
 
-class BatteryApp:
-    def __init__(self):
-        self.config_manager = ConfigManager()
-        self.overlay = BatteryOverlay(self.config_manager)
-        self.settings_window = None
-        
-        # 创建系统托盘图标
-        self.tray_icon = QSystemTrayIcon()
-        self.create_tray_icon()
-        
-        # 防止频繁切换的计时器
-        self.last_toggle_time = 0
-        self.toggle_cooldown = 300  # 300毫秒冷却时间
-        
-        # 启动时根据配置决定是否显示悬浮窗
-        if self.config_manager.get_show_overlay():
-            self.overlay.show()
-        else:
-            self.overlay.hide()
-
-    def create_tray_icon(self):
-        # 创建电池图标
-        icon = self.create_battery_icon()
-        self.tray_icon.setIcon(icon)
-        self.tray_icon.setToolTip("电池监控")
-        
-        # 创建托盘菜单
-        tray_menu = QMenu()
-        
-        # 显示/隐藏悬浮窗
-        show_overlay_action = QAction("显示/隐藏悬浮窗", self.tray_icon)
-        show_overlay_action.triggered.connect(self.toggle_overlay)
-        tray_menu.addAction(show_overlay_action)
-        
-        # 设置
-        settings_action = QAction("设置", self.tray_icon)
-        settings_action.triggered.connect(self.show_settings)
-        tray_menu.addAction(settings_action)
-        
-        tray_menu.addSeparator()
-        
-        # 退出
-        quit_action = QAction("退出", self.tray_icon)
-        quit_action.triggered.connect(self.quit_app)
-        tray_menu.addAction(quit_action)
-        
-        self.tray_icon.setContextMenu(tray_menu)
-        self.tray_icon.show()
-        
-        # 托盘图标点击事件
-        self.tray_icon.activated.connect(self.on_tray_activated)
-    
-    def create_battery_icon(self):
-        """创建电池图标"""
-        # 创建一个16x16的图标
-        pixmap = QPixmap(16, 16)
-        pixmap.fill(Qt.transparent)
-        
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # 绘制电池外框
-        painter.setPen(QColor(200, 200, 200))
-        painter.setBrush(QColor(240, 240, 240))
-        painter.drawRoundedRect(1, 4, 12, 8, 2, 2)
-        
-        # 绘制电池正极
-        painter.setBrush(QColor(200, 200, 200))
-        painter.drawRect(13, 6, 2, 4)
-        
-        # 获取电池电量
-        try:
-            import psutil
-            battery = psutil.sensors_battery()
-            if battery:
-                percent = battery.percent
-                
-                # 根据电量设置颜色
-                if percent > 70:
-                    color = QColor(0, 200, 0)  # 绿色
-                elif percent > 30:
-                    color = QColor(255, 200, 0)  # 黄色
-                elif percent > 15:
-                    color = QColor(255, 140, 0)  # 橙色
-                else:
-                    color = QColor(255, 0, 0)  # 红色
-                
-                # 绘制电量
-                width = max(1, int(10 * percent / 100))
-                painter.setBrush(color)
-                painter.setPen(Qt.NoPen)
-                painter.drawRoundedRect(2, 5, width, 6, 1, 1)
-        except:
-            pass
-        
-        painter.end()
-        
-        return QIcon(pixmap)
-    
-    def on_tray_activated(self, reason):
-        """托盘图标激活事件"""
-        if reason == QSystemTrayIcon.DoubleClick:
-            self.toggle_overlay()
-    
-    def toggle_overlay(self):
-        """切换悬浮窗显示状态 - 添加防抖处理"""
-        import time
-        current_time = int(time.time() * 1000)
-        
-        # 防止频繁切换
-        if current_time - self.last_toggle_time < self.toggle_cooldown:
-            return
-            
-        self.last_toggle_time = current_time
-        
-        try:
-            if self.overlay.isVisible():
-                self.overlay.hide()
-            else:
-                self.overlay.show()
-        except Exception as e:
-            print(f"切换悬浮窗时出错: {e}")
-    
-    def show_settings(self):
-        """显示设置窗口"""
-        if self.settings_window is None:
-            self.settings_window = SettingsWindow(self.config_manager)
-        self.settings_window.show()
-    
-    def quit_app(self):
-        """退出应用程序"""
-        self.overlay.monitoring = False
-        QApplication.quit()
+def parse_args(argv=None):
+    """解析命令行参数"""
+    import argparse
+    parser = argparse.ArgumentParser(description="电池电量监控")
+    parser.add_argument("--headless", action="store_true",
+                        help="无界面模式，只输出JSON格式的读数")
+    parser.add_argument("--output", metavar="PATH",
+                        help="无界面模式下将读数追加写入文件（默认输出到标准输出）")
+    parser.add_argument("--socket", metavar="ADDRESS",
+                        help="无界面模式下在本地套接字上广播读数（Unix套接字路径或 host:port）")
+    parser.add_argument("--interval", type=float,
+                        help="固定采样间隔(秒)，默认使用自适应采样")
+    parser.add_argument("--count", type=int,
+                        help="输出指定条数的读数后退出")
+    parser.add_argument("--backend", metavar="SPEC",
+                        help="电池数据后端，例如 sysfs、psutil、sim:speed=1000、replay:trace.jsonl,speed=3600")
+    parser.add_argument("--metrics", metavar="ADDRESS",
+                        help="在本地HTTP端口上输出 Prometheus 指标（端口或 host:port）")
+    parser.add_argument("--fleet", metavar="ADDRESS",
+                        help="把读数分批发送给多机汇总收集服务（host:port 或 udp://host:port）")
+    parser.add_argument("--battery", metavar="NAME",
+                        help="显示指定的电池设备（如 BAT1、hidpp_battery_0），默认显示系统电池合计")
+    parser.add_argument("--overlay", choices=("widget", "painted"),
+                        help="悬浮窗模式：widget 为标签窗口，painted 为占用更低的自绘窗口（默认使用设置中的模式）")
+    parser.add_argument("--diagnostics", metavar="PATH",
+                        help="无界面模式退出时把各阶段耗时统计导出为JSON文件")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="首次显示读数后输出启动耗时统计（含各模块导入耗时）")
+    # Qt 自带的参数（如 -platform）原样传给 QApplication
+    return parser.parse_known_args(argv)
+
+
+def run_gui(qt_argv):
+    """启动图形界面"""
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import Qt
+    from ui.app import BatteryApp
+    startup_profiler.mark("界面模块导入完成")
+
+    # 高分屏下使用高分辨率图标
+    QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
+
+    app = QApplication(qt_argv)
+    app.setQuitOnLastWindowClosed(False)
+
+    # 设置应用程序属性，避免在任务栏显示
+    app.setAttribute(Qt.AA_DontShowIconsInMenus, False)
+    startup_profiler.mark("QApplication 创建完成")
+
+    battery_app = BatteryApp()
+    startup_profiler.mark("BatteryApp 创建完成")
+
+    return app.exec_()
 
 
 def main():
+    args, qt_args = parse_args()
+    if args.startup_report:
+        startup_profiler.enable()
+    if args.backend or args.battery or args.metrics or args.fleet or args.overlay:
+        from config.settings import settings
+        if args.backend:
+            settings.battery_backend = args.backend
+        settings.battery_view = args.battery
+        settings.metrics_address = args.metrics
+        settings.fleet_address = args.fleet
+        settings.overlay_mode = args.overlay
+
+    if args.headless:
+        from headless import run_headless
+        sys.exit(run_headless(args))
+
     # 检查系统兼容性
     if not check_system_compatibility():
-        show_error_message("此程序仅支持Windows系统")
+        show_error_message("此程序仅支持Windows和Linux系统")
         return
-    
+
     # 检查依赖
     if not check_dependencies():
         show_error_message("缺少必要的依赖库，请安装 psutil: pip install psutil")
         return
-    
-    app = QApplication(sys.argv)
-    app.setQuitOnLastWindowClosed(False)
-    
-    # 设置应用程序属性，避免在任务栏显示
-    app.setAttribute(Qt.AA_DontShowIconsInMenus, False)
-    
-    battery_app = BatteryApp()
-    
-    sys.exit(app.exec_())
+
+    sys.exit(run_gui(sys.argv[:1] + qt_args))
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
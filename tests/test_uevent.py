@@ -0,0 +1,103 @@
+"""
+电源事件驱动采样的测试
+
+用一对本地数据报套接字模拟内核 netlink 套接字，不需要 root 权限和真实的电源设备。
+"""
+
+import socket
+import threading
+import time
+import unittest
+from config.settings import settings
+from core.battery_reader import BatteryReader
+from core.data_processor import DataProcessor
+from core.monitor import BatteryMonitor
+from core.simulated_backends import SimulatedBackend
+from core.uevent import build_uevent, parse_uevent
+
+
+class FakeUeventSender:
+    """模拟内核发送 uevent：通过一对本地数据报套接字把消息交给 UeventListener"""
+
+    def __init__(self):
+        self._send_sock, self.listener_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def send(self, action: str = 'change', devpath: str = '/devices/LNXSYSTM:00/ACPI0003:00/power_supply/AC',
+             subsystem: str = 'power_supply', **properties):
+        """发送一条事件"""
+        self._send_sock.send(build_uevent(action, devpath, SUBSYSTEM=subsystem, **properties))
+
+    def close(self):
+        self._send_sock.close()
+
+
+class ParseUeventTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        event = parse_uevent(build_uevent('change', '/devices/power_supply/BAT0',
+                                          SUBSYSTEM='power_supply', POWER_SUPPLY_CAPACITY='42'))
+        self.assertEqual(event['ACTION'], 'change')
+        self.assertEqual(event['SUBSYSTEM'], 'power_supply')
+        self.assertEqual(event['POWER_SUPPLY_CAPACITY'], '42')
+
+    def test_ignores_udev_messages(self):
+        self.assertIsNone(parse_uevent(b'libudev\0\xfe\xed'))
+
+
+class EventDrivenSamplingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sender = FakeUeventSender()
+        reader = BatteryReader(SimulatedBackend(step=60, seed=1))
+        self.monitor = BatteryMonitor(reader, DataProcessor(), interval=0.05,
+                                      uevent_socket=self.sender.listener_sock)
+        self.samples = []
+        self.received = threading.Event()
+        self.monitor.subscribe(self.on_sample)
+
+    def tearDown(self):
+        self.monitor.stop()
+        self.sender.close()
+
+    def on_sample(self, data):
+        self.samples.append(data)
+        self.received.set()
+
+    def wait_for_samples(self, count: int, timeout: float = 2.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while len(self.samples) < count:
+            self.received.clear()
+            if not self.received.wait(max(0.0, deadline - time.monotonic())):
+                return len(self.samples) >= count
+        return True
+
+    def test_event_triggers_one_immediate_refresh(self):
+        self.monitor.start()
+        self.assertTrue(self.wait_for_samples(1))
+        self.assertTrue(self.monitor.uevents.active)
+
+        # 监听电源事件时定时采样退为兜底间隔，远大于固定间隔 0.05 秒
+        self.assertGreaterEqual(self.monitor._next_interval(self.samples[-1]),
+                                settings.event_safety_interval)
+        time.sleep(0.3)
+        self.assertEqual(len(self.samples), 1)
+
+        # 一条事件只触发一次立即采样
+        self.sender.send(POWER_SUPPLY_ONLINE='1')
+        self.assertTrue(self.wait_for_samples(2))
+        time.sleep(0.3)
+        self.assertEqual(len(self.samples), 2)
+        self.assertEqual(self.monitor.uevents.event_count, 1)
+        self.assertEqual(self.monitor.sampler.get_stats()['refreshes'], 1)
+
+    def test_other_subsystems_are_ignored(self):
+        self.monitor.start()
+        self.assertTrue(self.wait_for_samples(1))
+        self.sender.send(subsystem='usb')
+        time.sleep(0.3)
+        self.assertEqual(len(self.samples), 1)
+        self.assertEqual(self.monitor.uevents.event_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+系统托盘应用模块
+"""
+
+from PyQt5.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QAction
+from PyQt5.QtCore import Qt, QTimer
+from config.settings import settings
+from ui.qt_overlay import BatteryOverlay
+from ui.tray_icon import TrayIconRenderer
+from config_manager import ConfigManager
+
+
+def create_overlay(config_manager: ConfigManager):
+    """按命令行或配置中的悬浮窗模式创建悬浮窗"""
+    mode = settings.overlay_mode or config_manager.get_overlay_mode()
+    if mode == "painted":
+        from ui.painted_overlay import PaintedOverlay
+        return PaintedOverlay(config_manager)
+    return BatteryOverlay(config_manager)
+
+
+class BatteryApp:
+    # 启动后多久在后台枚举字体（毫秒），避开首次采样和首次绘制
+    FONT_PREFETCH_DELAY = 5000
+    
+    def __init__(self):
+        self.config_manager = ConfigManager()
+        self.overlay = create_overlay(self.config_manager)
+        
+        # 创建系统托盘图标
+        self.tray_icon = QSystemTrayIcon()
+        self.tray_renderer = TrayIconRenderer()
+        self.tray_icon_key = None
+        self.tray_tooltip = "电池监控"
+        self.create_tray_icon()
+        
+        # 托盘图标与悬浮窗使用同一份采样数据；
+        # 首次采样可能早于连接，请求一次刷新（读取器缓存有效时不会重复读取硬件）
+        self.overlay.update_signal.connect(self.update_tray_icon)
+        self.overlay.manual_refresh()
+        
+        # 防止频繁切换的计时器
+        self.last_toggle_time = 0
+        self.toggle_cooldown = 300  # 300毫秒冷却时间
+        
+        # 启动时根据配置决定是否显示悬浮窗
+        if self.config_manager.get_show_overlay():
+            self.overlay.show()
+        else:
+            self.overlay.hide()
+        
+        # 提前准备设置窗口的字体列表，打开设置时无需等待
+        QTimer.singleShot(self.FONT_PREFETCH_DELAY, Qt.VeryCoarseTimer, self.prefetch_fonts)
+
+    def create_tray_icon(self):
+        # 创建电池图标
+        icon = self.create_battery_icon()
+        self.tray_icon.setIcon(icon)
+        self.tray_icon.setToolTip(self.tray_tooltip)
+        
+        # 创建托盘菜单
+        tray_menu = QMenu()
+        # 悬浮窗隐藏时采样间隔较长，打开菜单时刷新一次
+        tray_menu.aboutToShow.connect(self.overlay.monitor.refresh)
+        
+        # 显示/隐藏悬浮窗
+        show_overlay_action = QAction("显示/隐藏悬浮窗", self.tray_icon)
+        show_overlay_action.triggered.connect(self.toggle_overlay)
+        tray_menu.addAction(show_overlay_action)
+        
+        # 设置
+        settings_action = QAction("设置", self.tray_icon)
+        settings_action.triggered.connect(self.show_settings)
+        tray_menu.addAction(settings_action)
+        
+        tray_menu.addSeparator()
+        
+        # 退出
+        quit_action = QAction("退出", self.tray_icon)
+        quit_action.triggered.connect(self.quit_app)
+        tray_menu.addAction(quit_action)
+        
+        self.tray_icon.setContextMenu(tray_menu)
+        self.tray_icon.show()
+        
+        # 托盘图标点击事件
+        self.tray_icon.activated.connect(self.on_tray_activated)
+    
+    def create_battery_icon(self):
+        """创建电池图标 - 读数到达前只显示外框"""
+        self.tray_icon_key = self.tray_renderer.bucket(None, self.device_pixel_ratio())
+        return self.tray_renderer.get_icon(self.tray_icon_key)
+    
+    def device_pixel_ratio(self):
+        """当前屏幕的设备像素比"""
+        app = QApplication.instance()
+        return app.devicePixelRatio() if app else 1.0
+    
+    def update_tray_icon(self, data):
+        """根据最新读数更新托盘图标，图标桶不变时不做任何事"""
+        key = self.tray_renderer.bucket(data, self.device_pixel_ratio())
+        if key != self.tray_icon_key:
+            self.tray_icon_key = key
+            self.tray_icon.setIcon(self.tray_renderer.get_icon(key))
+        
+        tooltip = f"电池监控 - {data.percent_text}"
+        if tooltip != self.tray_tooltip:
+            self.tray_tooltip = tooltip
+            self.tray_icon.setToolTip(tooltip)
+    
+    def on_tray_activated(self, reason):
+        """托盘图标激活事件"""
+        if reason == QSystemTrayIcon.DoubleClick:
+            self.toggle_overlay()
+    
+    def toggle_overlay(self):
+        """切换悬浮窗显示状态 - 添加防抖处理"""
+        import time
+        current_time = int(time.time() * 1000)
+        
+        # 防止频繁切换
+        if current_time - self.last_toggle_time < self.toggle_cooldown:
+            return
+            
+        self.last_toggle_time = current_time
+        
+        try:
+            if self.overlay.isVisible():
+                self.overlay.hide()
+            else:
+                self.overlay.show()
+        except Exception as e:
+            print(f"切换悬浮窗时出错: {e}")
+    
+    def prefetch_fonts(self):
+        """在后台线程中枚举字体"""
+        from ui.settings_window import get_font_families
+        get_font_families().prefetch()
+    
+    def show_settings(self):
+        """显示设置窗口"""
+        # 设置窗口很少打开，第一次使用时才导入
+        from ui.settings_window import show_settings_window
+        show_settings_window(self.config_manager, self.overlay.history_source)
+    
+    def quit_app(self):
+        """退出应用程序"""
+        self.overlay.stop_monitoring()
+        self.config_manager.flush()
+        QApplication.quit()
@@ -0,0 +1,71 @@
+"""
+诊断窗口模块
+"""
+
+import time
+from typing import Callable
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit,
+                             QPushButton, QFileDialog)
+from PyQt5.QtGui import QFontDatabase
+from utils.diagnostics import diagnostics
+
+
+class DiagnosticsWindow(QWidget):
+    """显示各阶段的计数和耗时分布，可以导出为JSON"""
+
+    def __init__(self, extra_fn: Callable[[], dict]):
+        """
+        Args:
+            extra_fn: 返回附加统计信息的函数（采样调度、渲染缓存等）
+        """
+        super().__init__()
+        self.extra_fn = extra_fn
+        self.init_ui()
+        self.refresh()
+
+    def init_ui(self):
+        self.setWindowTitle("电池悬浮窗诊断")
+        self.resize(640, 480)
+
+        layout = QVBoxLayout()
+        self.report_view = QPlainTextEdit()
+        self.report_view.setReadOnly(True)
+        self.report_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        layout.addWidget(self.report_view)
+
+        button_layout = QHBoxLayout()
+        refresh_button = QPushButton("刷新")
+        refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(refresh_button)
+
+        reset_button = QPushButton("清零")
+        reset_button.clicked.connect(self.reset)
+        button_layout.addWidget(reset_button)
+
+        export_button = QPushButton("导出JSON...")
+        export_button.clicked.connect(self.export)
+        button_layout.addWidget(export_button)
+
+        button_layout.addStretch()
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+    def refresh(self):
+        self.report_view.setPlainText(diagnostics.format_report(self.extra_fn()))
+
+    def reset(self):
+        diagnostics.reset()
+        self.refresh()
+
+    def export(self):
+        default_name = time.strftime("battery_diagnostics_%Y%m%d_%H%M%S.json")
+        path, _ = QFileDialog.getSaveFileName(self, "导出诊断信息", default_name, "JSON (*.json)")
+        if path:
+            try:
+                diagnostics.dump(path, self.extra_fn())
+            except OSError as e:
+                print(f"导出诊断信息时出错: {e}")
@@ -0,0 +1,140 @@
+"""
+电量历史图表模块
+
+图表从 HistorySource 取得按控件像素宽度降采样的结果，每个像素列绘制一条
+最小~最大值竖线，再用折线连接各列的最后一个值，绘制开销与记录条数无关。
+"""
+
+import time
+from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout
+from PyQt5.QtCore import Qt, QLineF, QPointF, QRectF
+from PyQt5.QtGui import QColor, QPainter, QPen, QPolygonF
+from core.downsample import HistorySource
+from core.reading import format_duration
+from utils.diagnostics import diagnostics
+
+# 可选的时间范围: (秒, 名称)
+RANGES = (
+    (3600, "1小时"),
+    (6 * 3600, "6小时"),
+    (24 * 3600, "24小时"),
+    (7 * 24 * 3600, "7天"),
+)
+RANGE_NAMES = dict(RANGES)
+
+BACKGROUND = QColor(0, 0, 0, 180)
+GRID = QColor(255, 255, 255, 40)
+BAND = QColor(144, 238, 144, 90)
+LINE = QColor(144, 238, 144)
+CHARGING = QColor(255, 255, 0, 60)
+TEXT = QColor(255, 255, 255, 160)
+
+
+class HistoryChart(QWidget):
+    """电量历史曲线"""
+
+    # 图表内容四周的留白(像素)
+    MARGIN = 4
+
+    def __init__(self, source: HistorySource, span: float = 6 * 3600, parent=None):
+        """
+        Args:
+            source: 降采样历史数据
+            span: 显示的时间范围(秒)
+        """
+        super().__init__(parent)
+        self.source = source
+        self.span = span
+        self.setMinimumSize(120, 48)
+
+    def set_span(self, span: float):
+        if span != self.span:
+            self.span = span
+            self.update()
+
+    def showEvent(self, event):
+        # 只在可见时随新读数重绘
+        self.source.add_listener(self.update)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.source.remove_listener(self.update)
+        super().hideEvent(event)
+
+    def paintEvent(self, event):
+        started = time.perf_counter()
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(BACKGROUND)
+        painter.drawRoundedRect(QRectF(self.rect()), 4, 4)
+
+        margin = self.MARGIN
+        plot = QRectF(self.rect()).adjusted(margin, margin, -margin, -margin)
+        left, bottom, width, height = plot.left(), plot.bottom(), plot.width(), plot.height()
+
+        # 0%、50%、100% 参考线
+        painter.setPen(QPen(GRID, 1))
+        for fraction in (0.0, 0.5, 1.0):
+            y = bottom - fraction * height
+            painter.drawLine(QLineF(left, y, plot.right(), y))
+
+        now = time.time()
+        buckets = self.source.get(self.span, int(width), now)
+        painter.setPen(TEXT)
+        painter.drawText(plot, Qt.AlignRight | Qt.AlignTop,
+                         RANGE_NAMES.get(self.span) or format_duration(self.span))
+        if not len(buckets):
+            painter.drawText(plot, Qt.AlignCenter, "暂无记录")
+            painter.end()
+            return
+
+        def y_of(value):
+            return bottom - max(0.0, min(100.0, value)) / 100.0 * height
+
+        band = []
+        points = QPolygonF()
+        charging = []
+        for index, low, high, last, plugged in buckets.buckets:
+            x = left + max(0.0, min(width, buckets.x_of(index, now)))
+            if plugged:
+                charging.append(QLineF(x, plot.top(), x, bottom))
+            if high > low:
+                band.append(QLineF(x, y_of(low), x, y_of(high)))
+            points.append(QPointF(x, y_of(last)))
+
+        # 接通电源的时段用底色标出
+        if charging:
+            painter.setPen(QPen(CHARGING, 1))
+            painter.drawLines(charging)
+        if band:
+            painter.setPen(QPen(BAND, 1))
+            painter.drawLines(band)
+        painter.setPen(QPen(LINE, 1.5))
+        painter.drawPolyline(points)
+        painter.end()
+        diagnostics.record('chart.paint', time.perf_counter() - started)
+
+
+class HistoryPopup(QWidget):
+    """悬停在悬浮窗上时显示的提示：状态文字和最近的电量曲线"""
+
+    def __init__(self, source: HistorySource, span: float = 6 * 3600):
+        super().__init__(None, Qt.ToolTip | Qt.FramelessWindowHint)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+        self.label = QLabel()
+        self.label.setStyleSheet("color: white; background: rgba(0, 0, 0, 180); "
+                                 "border-radius: 3px; padding: 2px 6px;")
+        layout.addWidget(self.label)
+        self.chart = HistoryChart(source, span)
+        self.chart.setFixedSize(240, 72)
+        layout.addWidget(self.chart)
+
+    def set_text(self, text: str):
+        self.label.setText(text)
+        self.label.setVisible(bool(text))
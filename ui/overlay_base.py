@@ -0,0 +1,328 @@
+"""
+悬浮窗公共行为模块
+
+标签悬浮窗(BatteryOverlay)和自绘悬浮窗(PaintedOverlay)共用的
+采样订阅、拖动、滚轮调整透明度、右键菜单和诊断等功能。
+"""
+
+import time
+from PyQt5.QtWidgets import QMenu, QAction, QApplication
+from PyQt5.QtCore import Qt, QPoint, QTimer
+from PyQt5.QtGui import QCursor, QMouseEvent
+from config.settings import settings
+from ui.render_cache import StyleCache
+from utils.diagnostics import diagnostics
+from utils.power import process_usage
+
+
+class OverlayMixin:
+    """
+    悬浮窗公共行为，与 QWidget 子类一起继承
+
+    子类需要实现 update_font()、apply_transparency(transparency) 和 render_display(data)，
+    并定义 update_signal；鼠标进入、离开文字区域时调用 start_hover() / end_hover()。
+    """
+
+    # 鼠标悬停多久后显示历史曲线提示(毫秒)
+    HOVER_DELAY = 500
+
+    def init_overlay(self):
+        """初始化渲染状态并连接信号（子类创建完界面组件后调用）"""
+        # 渲染状态缓存：(百分比, 充电状态, 颜色级别, 字体, 文字区域高度, 配色版本)
+        self.style_cache = StyleCache()
+        self._render_state = None
+        self._last_data = None
+        self._font_key = None
+        self._tooltip = ""
+        self.render_hits = 0
+        self.render_misses = 0
+
+        # 诊断：最近一次发出信号、请求手动刷新的时间
+        self._emitted_at = None
+        self._refresh_requested_at = None
+        self.diagnostics_window = None
+
+        # 悬停提示：状态文字和电量历史曲线，第一次显示时才创建
+        self.history_popup = None
+        self._hover_timer = QTimer(self)
+        self._hover_timer.setSingleShot(True)
+        self._hover_timer.setInterval(self.HOVER_DELAY)
+        self._hover_timer.timeout.connect(self.show_history_popup)
+
+        # 连接信号
+        self.update_signal.connect(self.update_display)
+        self.config_manager.config_changed.connect(self.on_config_changed)
+
+    def start_overlay(self):
+        """开始采样，并根据配置初始化显示状态"""
+        # 尽早开始第一次采样
+        self.start_monitoring()
+
+        self.update_font()
+        self.update_transparency()
+        if self.config_manager.get_show_overlay():
+            self.show()
+        else:
+            self.hide()
+        self.start_session_monitor()
+
+    def start_session_monitor(self):
+        """锁屏时暂停采样"""
+        from ui.session_monitor import SessionMonitor
+        self.session_monitor = SessionMonitor(self)
+        self.session_monitor.locked_changed.connect(self.monitor.set_session_locked)
+
+    def on_config_changed(self, keys):
+        """配置改变时的回调，只处理发生变化的配置项"""
+        if 'battery_view' in keys:
+            self.update_battery_view()
+        if not self.config_manager.FONT_KEYS.isdisjoint(keys):
+            self.update_font()
+        if 'transparency' in keys:
+            self.update_transparency()
+        if 'window_position' in keys:
+            # 拖动结束时位置已经一致，只有外部修改配置文件时才需要移动
+            x, y = self.config_manager.get_window_position()
+            if (x, y) != (self.x(), self.y()):
+                self.move(x, y)
+        if 'show_overlay' in keys:
+            if self.config_manager.get_show_overlay():
+                self.show()
+            else:
+                self.hide()
+
+    def update_battery_view(self):
+        """切换显示的电池设备后立即重新采样"""
+        view = self.config_manager.get_battery_view()
+        if view != self._battery_view:
+            self._battery_view = view
+            self.monitor.processor.set_view(view)
+            self.monitor.refresh()
+
+    def update_transparency(self):
+        """更新透明度"""
+        self.apply_transparency(self.config_manager.get_transparency())
+
+    def start_monitoring(self):
+        """开始监控电池状态"""
+        # 数据模块在这里才导入，避免拖慢窗口模块的加载
+        from core.monitor import BatteryMonitor
+
+        from core.downsample import HistorySource
+
+        # 采样调度器是唯一的电池读取入口，结果通过信号交付给界面线程
+        self.monitor = BatteryMonitor()
+        # 历史曲线的降采样结果随读数增量更新
+        self.history_source = HistorySource(self.monitor.reader.history)
+        # 命令行指定的设备优先于配置
+        self._battery_view = self.config_manager.get_battery_view()
+        self.monitor.processor.set_view(settings.battery_view or self._battery_view)
+        # 悬浮窗隐藏时采样放慢，重新显示时立即刷新
+        self.monitor.set_consumer('overlay', self.config_manager.get_show_overlay())
+        self.monitor.subscribe(self.emit_reading)
+        self.monitor.start()
+
+    def stop_monitoring(self):
+        """停止监控电池状态"""
+        self.monitor.stop()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        monitor = getattr(self, 'monitor', None)
+        if monitor is not None:
+            monitor.set_consumer('overlay', True)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        monitor = getattr(self, 'monitor', None)
+        if monitor is not None:
+            monitor.set_consumer('overlay', False)
+
+    def emit_reading(self, data):
+        """把读数交给界面线程（在采样线程中调用）"""
+        self._emitted_at = time.perf_counter()
+        self.update_signal.emit(data)
+
+    def update_display(self, data):
+        """更新显示，并记录信号送达和渲染的耗时"""
+        started = time.perf_counter()
+        emitted_at, self._emitted_at = self._emitted_at, None
+        if emitted_at is not None:
+            diagnostics.record('signal.delivery', started - emitted_at)
+            if self._refresh_requested_at is not None:
+                diagnostics.record('refresh.latency', started - self._refresh_requested_at)
+                self._refresh_requested_at = None
+        self.render_display(data)
+        reading = data.reading
+        if reading is not None and reading.percent is not None:
+            self.history_source.add(reading.timestamp, reading.percent, reading.plugged)
+        diagnostics.record('display.update', time.perf_counter() - started)
+
+    def set_tooltip_text(self, text: str):
+        """更新悬停提示中的状态文字"""
+        self._tooltip = text
+        if self.history_popup is not None:
+            self.history_popup.set_text(text)
+
+    def start_hover(self):
+        self._hover_timer.start()
+
+    def end_hover(self):
+        self._hover_timer.stop()
+        if self.history_popup is not None:
+            self.history_popup.hide()
+
+    def show_history_popup(self):
+        """在鼠标旁显示状态文字和最近的电量曲线"""
+        if self.history_popup is None:
+            from ui.history_chart import HistoryPopup
+            self.history_popup = HistoryPopup(self.history_source)
+        self.history_popup.set_text(self._tooltip)
+        self.history_popup.adjustSize()
+        self.history_popup.move(QCursor.pos() + QPoint(12, 16))
+        self.history_popup.show()
+
+    def get_render_stats(self) -> dict:
+        """获取渲染缓存命中统计"""
+        total = self.render_hits + self.render_misses
+        return {
+            'hits': self.render_hits,
+            'misses': self.render_misses,
+            'hit_rate': self.render_hits / total if total else 0.0,
+        }
+
+    def manual_refresh(self):
+        """手动刷新 - 合并到采样调度器的下一次节拍"""
+        diagnostics.count('refresh.requests')
+        if self._refresh_requested_at is None:
+            self._refresh_requested_at = time.perf_counter()
+        self.monitor.refresh()
+
+    def set_transparency(self, transparency: int):
+        """设置透明度"""
+        self.apply_transparency(transparency)
+        self.config_manager.set_transparency(transparency)
+
+    def quit_app(self):
+        """退出应用程序"""
+        self.stop_monitoring()
+        self.config_manager.flush()
+        QApplication.quit()
+
+    # 鼠标事件处理
+    def mousePressEvent(self, event: QMouseEvent):
+        """鼠标按下事件"""
+        self.end_hover()
+        if event.button() == Qt.LeftButton:
+            self.drag_position = event.globalPos() - self.frameGeometry().topLeft()
+            event.accept()
+        elif event.button() == Qt.RightButton:
+            self.show_context_menu(event.globalPos())
+
+    def mouseMoveEvent(self, event: QMouseEvent):
+        """鼠标移动事件"""
+        if event.buttons() == Qt.LeftButton and hasattr(self, 'drag_position'):
+            new_pos = event.globalPos() - self.drag_position
+            self.move(new_pos)
+            event.accept()
+
+    def mouseReleaseEvent(self, event: QMouseEvent):
+        """鼠标释放事件 - 拖动结束后才保存位置"""
+        if event.button() == Qt.LeftButton and hasattr(self, 'drag_position'):
+            del self.drag_position
+            self.config_manager.set_window_position(self.pos())
+            event.accept()
+
+    def wheelEvent(self, event):
+        """鼠标滚轮事件 - 调整透明度"""
+        delta = event.angleDelta().y()
+        current_transparency = self.config_manager.get_transparency()
+
+        if delta > 0:  # 向上滚动
+            new_transparency = min(100, current_transparency + 10)
+        else:  # 向下滚动
+            new_transparency = max(10, current_transparency - 10)
+
+        self.set_transparency(new_transparency)
+
+    def show_context_menu(self, pos):
+        """显示右键菜单 - 删除透明度选项"""
+        menu = QMenu(self)
+        menu.setStyleSheet("""
+            QMenu {
+                background-color: rgba(0, 0, 0, 200);
+                color: white;
+                border: 1px solid #555;
+                border-radius: 3px;
+            }
+            QMenu::item {
+                padding: 5px 20px;
+            }
+            QMenu::item:selected {
+                background-color: rgba(255, 255, 255, 50);
+            }
+        """)
+
+        refresh_action = QAction("刷新", self)
+        refresh_action.triggered.connect(self.manual_refresh)
+        menu.addAction(refresh_action)
+
+        # 有多个电池设备（多块电池或外设）时可以选择显示哪一个
+        devices = self._last_data.devices if self._last_data else ()
+        if len(devices) > 1:
+            self.add_battery_menu(menu, devices)
+
+        menu.addSeparator()
+
+        settings_action = QAction("设置", self)
+        settings_action.triggered.connect(self.show_settings)
+        menu.addAction(settings_action)
+
+        diagnostics_action = QAction("诊断", self)
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        menu.addAction(diagnostics_action)
+
+        quit_action = QAction("退出", self)
+        quit_action.triggered.connect(self.quit_app)
+        menu.addAction(quit_action)
+
+        menu.exec_(pos)
+
+    def add_battery_menu(self, menu: QMenu, devices):
+        """添加选择电池设备的子菜单"""
+        battery_menu = menu.addMenu("电池")
+        current = self._last_data.view
+        choices = [(None, "合计")]
+        choices.extend((device.name, f"{device.model} {device.percent:.0f}%")
+                       for device in devices)
+        for name, text in choices:
+            action = QAction(text, self)
+            action.setCheckable(True)
+            action.setChecked(name == current)
+            action.triggered.connect(lambda checked, name=name: self.config_manager.set_battery_view(name))
+            battery_menu.addAction(action)
+
+    def get_diagnostics_extra(self) -> dict:
+        """诊断窗口中显示的附加统计信息"""
+        extra = {'render_cache': self.get_render_stats()}
+        monitor = getattr(self, 'monitor', None)
+        if monitor is not None:
+            extra['sampler'] = dict(monitor.sampler.get_stats(), demand=monitor.demand)
+        extra['process'] = process_usage.snapshot()
+        return extra
+
+    def show_diagnostics(self):
+        """显示诊断窗口"""
+        from ui.diagnostics_window import DiagnosticsWindow
+        if self.diagnostics_window is None:
+            self.diagnostics_window = DiagnosticsWindow(self.get_diagnostics_extra)
+        else:
+            self.diagnostics_window.refresh()
+        self.diagnostics_window.show()
+        self.diagnostics_window.raise_()
+
+    def show_settings(self):
+        """显示设置窗口"""
+        # 设置窗口很少打开，第一次使用时才导入
+        from ui.settings_window import show_settings_window
+        show_settings_window(self.config_manager, self.history_source)
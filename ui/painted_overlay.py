@@ -0,0 +1,167 @@
+"""
+自绘悬浮窗模块 - 低占用的悬浮窗模式
+
+整个悬浮窗只有一个无边框窗口，在 paintEvent 中用 QStaticText 直接绘制电量文字，
+不使用布局、标签和样式表。窗口大小贴合文字；透明度通过绘制时的不透明度实现，
+不再使用 setWindowOpacity，窗口只合成一次。读数变化时只重绘文字所在的矩形。
+"""
+
+import time
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QRect, QRectF, QTimer, pyqtSignal
+from PyQt5.QtGui import QFontMetrics, QPainter, QPalette, QPen, QStaticText, QTransform
+from config.settings import settings
+from config_manager import ConfigManager
+from ui.overlay_base import OverlayMixin
+from utils.diagnostics import diagnostics
+from utils.startup_profile import startup_profiler
+
+
+class PaintedOverlay(OverlayMixin, QWidget):
+    # 携带不可修改的 ProcessedReading，跨线程传递时只传引用
+    update_signal = pyqtSignal(object)
+
+    # 文字四周的留白(像素)，斜体等超出字形边界的部分也在其中
+    MARGIN = 4
+
+    def __init__(self, config_manager: ConfigManager):
+        super().__init__()
+        self.config_manager = config_manager
+
+        # 每种文字("0%"~"100%")的 QStaticText 只排版一次，字体变化时清空
+        self._static_texts = {}
+        self._font = None
+        self._text = "---%"
+        self._text_rect = QRect()
+        self._pen = QPen(self.palette().color(QPalette.WindowText))
+        self._opacity = 1.0
+
+        self.setup_window()
+        self.init_overlay()
+        self._first_paint_pending = startup_profiler.enabled
+        self.start_overlay()
+
+    def setup_window(self):
+        """设置窗口属性"""
+        self.setWindowTitle("电池电量显示器")
+        pos = self.config_manager.get_window_position()
+        self.move(pos[0], pos[1])
+        self.setWindowFlags(
+            Qt.FramelessWindowHint |
+            Qt.WindowStaysOnTopHint |
+            Qt.Tool
+        )
+        # 背景透明，只绘制文字
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_NoSystemBackground)
+        # 窗口大小贴合文字，整个窗口都可以拖动
+        self.setCursor(Qt.SizeAllCursor)
+
+    def update_font(self):
+        font = self.config_manager.get_font()
+        font_key = font.key()
+        if font_key == self._font_key:
+            return
+        self._font_key = font_key
+        self._font = font
+        self._static_texts.clear()
+
+        # 按最宽的文字确定窗口大小
+        metrics = QFontMetrics(font)
+        width = metrics.horizontalAdvance("100%") + 2 * self.MARGIN
+        height = metrics.height() + 2 * self.MARGIN
+        self.setFixedSize(width, height)
+        self._text_rect = self._layout_text(self._text)
+
+        # 窗口尺寸变化，按新状态重新渲染
+        if self._last_data is not None:
+            self.render_display(self._last_data)
+        self.update()
+
+    def enterEvent(self, event):
+        self.start_hover()
+        super().enterEvent(event)
+
+    def leaveEvent(self, event):
+        self.end_hover()
+        super().leaveEvent(event)
+
+    def apply_transparency(self, transparency: int):
+        """应用透明度（绘制文字时的不透明度）"""
+        opacity = transparency / 100.0
+        if opacity != self._opacity:
+            self._opacity = opacity
+            self.update(self._text_rect)
+
+    def _static_text(self, text: str) -> QStaticText:
+        """获取排版好的文字"""
+        static = self._static_texts.get(text)
+        if static is None:
+            static = QStaticText(text)
+            static.setTextFormat(Qt.PlainText)
+            static.prepare(QTransform(), self._font)
+            self._static_texts[text] = static
+        return static
+
+    def _layout_text(self, text: str) -> QRect:
+        """文字在窗口中居中后所占的矩形（含留白）"""
+        if self._font is None:
+            return QRect()
+        size = self._static_text(text).size()
+        rect = QRectF((self.width() - size.width()) / 2, (self.height() - size.height()) / 2,
+                      size.width(), size.height())
+        margin = self.MARGIN
+        return rect.toAlignedRect().adjusted(-margin, -margin, margin, margin)
+
+    def render_display(self, data):
+        """更新显示 - 只重绘与上次渲染状态不同的部分"""
+        self._last_data = data
+        tooltip = f"{data.label} {data.status_text} {data.time_text}".strip()
+        if tooltip != self._tooltip:
+            self.set_tooltip_text(tooltip)
+
+        state = (data.percent, data.plugged, data.level,
+                 self._font_key, self.height(), settings.revision)
+        last = self._render_state
+        if last is None:
+            startup_profiler.mark("收到首个读数")
+        if state == last:
+            self.render_hits += 1
+            return
+        self.render_misses += 1
+        self._render_state = state
+        percent, plugged, level, font_key, height, revision = state
+        dirty = QRect(self._text_rect)
+
+        # 根据充电状态选择画笔（充电时为上半纯色渐变至白色的渐变画笔）
+        if last is None or last[1:] != state[1:]:
+            self._pen = self.style_cache.get(level, plugged, height, font_key).pen
+
+        # 更新百分比文本，重绘区域包括旧文字和新文字
+        if last is None or last[0] != percent:
+            self._text = data.percent_text
+            self._text_rect = self._layout_text(self._text)
+            dirty = dirty.united(self._text_rect)
+
+        self.update(dirty)
+
+    def paintEvent(self, event):
+        if self._font is None:
+            return
+        started = time.perf_counter()
+        painter = QPainter(self)
+        painter.setOpacity(self._opacity)
+        painter.setFont(self._font)
+        painter.setPen(self._pen)
+        margin = self.MARGIN
+        painter.drawStaticText(self._text_rect.left() + margin, self._text_rect.top() + margin,
+                               self._static_text(self._text))
+        painter.end()
+        diagnostics.record('display.paint', time.perf_counter() - started)
+
+        # 记录第一次绘制出读数的时间
+        if self._first_paint_pending and self._render_state is not None:
+            self._first_paint_pending = False
+            startup_profiler.mark("首次绘制读数")
+            # 绘制完成后再输出报告
+            QTimer.singleShot(0, startup_profiler.report)
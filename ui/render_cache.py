@@ -0,0 +1,75 @@
+"""
+渲染样式缓存模块
+"""
+
+from collections import namedtuple
+from PyQt5.QtGui import QBrush, QColor, QLinearGradient, QPen
+from config.settings import settings
+
+# 颜色名称对应的 QColor
+COLOR_MAP = {
+    'lightgreen': QColor(144, 238, 144),
+    'yellow': QColor(255, 255, 0),
+    'orange': QColor(255, 165, 0),
+    'red': QColor(255, 0, 0),
+    'white': QColor(255, 255, 255)
+}
+WHITE = QColor(255, 255, 255)
+
+# stylesheet: 标签样式表；brush: 充电时的渐变文字画刷，不充电时为None；
+# pen: 自绘悬浮窗绘制文字用的画笔（纯色或渐变）
+TextStyle = namedtuple('TextStyle', ['stylesheet', 'brush', 'pen'])
+
+
+def to_qcolor(color: str) -> QColor:
+    """将颜色名称或十六进制颜色转换为QColor"""
+    if color.startswith('#'):
+        return QColor(color)
+    return COLOR_MAP.get(color, WHITE)
+
+
+class StyleCache:
+    """
+    文字样式缓存
+
+    每个 (级别, 充电状态, 标签高度) 的样式表和渐变画刷只构建一次，
+    颜色、阈值(settings.revision)或字体变化时整体失效。
+    """
+
+    def __init__(self):
+        self._styles = {}
+        self._key = None
+
+    def get(self, level: str, plugged: bool, height: int, font_key: str = None) -> TextStyle:
+        """获取样式，必要时构建并缓存"""
+        key = (settings.revision, font_key)
+        if key != self._key:
+            self._styles.clear()
+            self._key = key
+
+        style_key = (level, plugged, height if plugged else 0)
+        style = self._styles.get(style_key)
+        if style is None:
+            # 没有系统电池(level为None)时使用中性的次要文字颜色
+            color = settings.colors['level_' + level] if level else settings.colors['text_secondary']
+            style = self._build(color, plugged, height)
+            self._styles[style_key] = style
+        return style
+
+    def _build(self, color: str, plugged: bool, height: int) -> TextStyle:
+        if not plugged:
+            # 不充电状态：纯色，亮度100%
+            return TextStyle(f"color: {color}; background: transparent;", None,
+                             QPen(to_qcolor(color)))
+
+        # 充电状态：顶部为纯色，渐变至70%处为白色，下方保持白色
+        gradient = QLinearGradient(0, 0, 0, height)
+        gradient.setColorAt(0.0, to_qcolor(color))
+        gradient.setColorAt(0.7, WHITE)
+        gradient.setColorAt(1.0, WHITE)
+        # 清除纯色样式表，否则会覆盖调色板中的渐变
+        brush = QBrush(gradient)
+        return TextStyle("background: transparent;", brush, QPen(brush, 0))
+
+    def __len__(self):
+        return len(self._styles)
@@ -0,0 +1,132 @@
+"""
+会话锁定监视模块
+
+Linux 下通过 D-Bus 监听 logind 会话的 Lock/Unlock 信号和桌面屏保的 ActiveChanged 信号，
+Windows 下通过 WTSRegisterSessionNotification 接收会话锁定消息。
+都不可用时不会发出信号，采样不受影响。
+"""
+
+import os
+import sys
+from PyQt5.QtCore import QAbstractNativeEventFilter, QCoreApplication, QObject, pyqtSignal, pyqtSlot
+
+# Windows 会话通知
+WM_WTSSESSION_CHANGE = 0x02B1
+WTS_SESSION_LOCK = 0x7
+WTS_SESSION_UNLOCK = 0x8
+NOTIFY_FOR_THIS_SESSION = 0
+
+# 发出 ActiveChanged(bool) 信号的屏保服务: (对象路径, 接口)
+SCREENSAVER_INTERFACES = (
+    ('/org/freedesktop/ScreenSaver', 'org.freedesktop.ScreenSaver'),
+    ('/org/gnome/ScreenSaver', 'org.gnome.ScreenSaver'),
+)
+
+
+class _SessionMessageFilter(QAbstractNativeEventFilter):
+    """从 Windows 消息中取出会话锁定/解锁通知"""
+
+    def __init__(self, callback):
+        super().__init__()
+        self.callback = callback
+
+    def nativeEventFilter(self, event_type, message):
+        if event_type == b'windows_generic_MSG':
+            from ctypes import wintypes
+            msg = wintypes.MSG.from_address(int(message))
+            if msg.message == WM_WTSSESSION_CHANGE:
+                if msg.wParam == WTS_SESSION_LOCK:
+                    self.callback(True)
+                elif msg.wParam == WTS_SESSION_UNLOCK:
+                    self.callback(False)
+        return False, 0
+
+
+class SessionMonitor(QObject):
+    """监视会话是否锁定"""
+
+    # 会话锁定(True)或解锁(False)
+    locked_changed = pyqtSignal(bool)
+
+    def __init__(self, window=None):
+        """
+        Args:
+            window: 接收 Windows 会话通知的窗口
+        """
+        super().__init__()
+        self.locked = False
+        self.backend = None
+        self._filter = None
+        try:
+            if sys.platform.startswith('win'):
+                if window is not None and self._start_windows(window):
+                    self.backend = 'wts'
+            elif sys.platform.startswith('linux'):
+                if self._start_dbus():
+                    self.backend = 'dbus'
+        except Exception as e:
+            print(f"无法监视会话锁定状态: {e}")
+
+    def set_locked(self, locked: bool):
+        if locked != self.locked:
+            self.locked = locked
+            self.locked_changed.emit(locked)
+
+    def _start_windows(self, window) -> bool:
+        import ctypes
+        hwnd = int(window.winId())
+        if not ctypes.windll.wtsapi32.WTSRegisterSessionNotification(hwnd, NOTIFY_FOR_THIS_SESSION):
+            return False
+        self._filter = _SessionMessageFilter(self.set_locked)
+        QCoreApplication.instance().installNativeEventFilter(self._filter)
+        return True
+
+    def _start_dbus(self) -> bool:
+        try:
+            from PyQt5.QtDBus import QDBusConnection
+        except ImportError:
+            return False
+        connected = False
+
+        system_bus = QDBusConnection.systemBus()
+        if system_bus.isConnected():
+            path = self._logind_session_path(system_bus)
+            if path:
+                for name, slot in (('Lock', self.on_lock), ('Unlock', self.on_unlock)):
+                    connected |= system_bus.connect('org.freedesktop.login1', path,
+                                                    'org.freedesktop.login1.Session', name, slot)
+
+        session_bus = QDBusConnection.sessionBus()
+        if session_bus.isConnected():
+            for path, interface in SCREENSAVER_INTERFACES:
+                connected |= session_bus.connect('', path, interface, 'ActiveChanged',
+                                                 self.on_screensaver_changed)
+        return connected
+
+    def _logind_session_path(self, bus):
+        """当前会话在 logind 中的对象路径"""
+        from PyQt5.QtDBus import QDBusInterface, QDBusMessage
+        session_id = os.environ.get('XDG_SESSION_ID')
+        if not session_id:
+            return None
+        manager = QDBusInterface('org.freedesktop.login1', '/org/freedesktop/login1',
+                                 'org.freedesktop.login1.Manager', bus)
+        if not manager.isValid():
+            return None
+        reply = manager.call('GetSession', session_id)
+        if reply.type() != QDBusMessage.ReplyMessage or not reply.arguments():
+            return None
+        path = reply.arguments()[0]
+        return path.path() if hasattr(path, 'path') else str(path)
+
+    @pyqtSlot()
+    def on_lock(self):
+        self.set_locked(True)
+
+    @pyqtSlot()
+    def on_unlock(self):
+        self.set_locked(False)
+
+    @pyqtSlot(bool)
+    def on_screensaver_changed(self, active):
+        self.set_locked(active)
@@ -1,25 +1,102 @@
 """
 设置窗口模块
+
+设置窗口只创建一次并在关闭后保留，再次打开时只需要同步当前配置。
+字体列表在后台线程中枚举一次后缓存，不阻塞启动和窗口的打开。
 """
 
+import threading
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QComboBox, QCheckBox, QSpinBox, QPushButton, 
-                             QApplication, QFontComboBox, QGroupBox, QSlider)
-from PyQt5.QtCore import Qt, QSettings
-from PyQt5.QtGui import QFont
+                             QApplication, QGroupBox, QSlider)
+from PyQt5.QtCore import Qt, QObject, QSettings, pyqtSignal
+from PyQt5.QtGui import QFont, QFontDatabase
 from config_manager import ConfigManager
 
 
+class FontFamilies(QObject):
+    """已安装的字体列表，后台线程枚举一次后缓存"""
+    
+    # 枚举完成，携带字体名称列表（在界面线程中送达）
+    loaded = pyqtSignal(list)
+    
+    def __init__(self):
+        super().__init__()
+        self.families = None
+        self._thread = None
+    
+    def prefetch(self):
+        """在后台线程中开始枚举（Qt5 的字体数据库内部有锁，可以在其他线程中访问）"""
+        if self.families is None and self._thread is None:
+            self._thread = threading.Thread(target=self._load, name="font-enumeration", daemon=True)
+            self._thread.start()
+    
+    def _load(self):
+        try:
+            families = QFontDatabase().families()
+        except Exception as e:
+            print(f"枚举字体时出错: {e}")
+            families = []
+        self.families = families
+        self.loaded.emit(families)
+
+
+_font_families = None
+_settings_window = None
+
+
+def get_font_families() -> FontFamilies:
+    """获取全局字体列表缓存"""
+    global _font_families
+    if _font_families is None:
+        _font_families = FontFamilies()
+    return _font_families
+
+
+def get_settings_window(config_manager: ConfigManager, history_source=None) -> 'SettingsWindow':
+    """获取共用的设置窗口，第一次使用时才创建"""
+    global _settings_window
+    if _settings_window is None:
+        _settings_window = SettingsWindow(config_manager, history_source)
+    return _settings_window
+
+
+def show_settings_window(config_manager: ConfigManager, history_source=None):
+    """显示设置窗口，控件内容与当前配置同步"""
+    window = get_settings_window(config_manager, history_source)
+    if not window.isVisible():
+        window.load_values(config_manager.config)
+    window.show()
+    window.raise_()
+    window.activateWindow()
+
+
 class SettingsWindow(QWidget):
-    def __init__(self, config_manager: ConfigManager):
+    def __init__(self, config_manager: ConfigManager, history_source=None):
+        """
+        Args:
+            history_source: 电量历史数据(HistorySource)，为None时不显示历史曲线
+        """
         super().__init__()
         self.config_manager = config_manager
+        self.history_source = history_source
         self.init_ui()
         self.setup_theme()
+        self.load_values(self.config_manager.config)
+        
+        # 字体列表就绪前只显示当前字体。先连接信号再检查结果：
+        # 后台线程恰好在两者之间完成时也不会漏掉，两条路径都到达时由槽函数去重
+        self._font_families_set = False
+        font_families = get_font_families()
+        font_families.loaded.connect(self.set_font_families)
+        if font_families.families is not None:
+            self.set_font_families(font_families.families)
+        else:
+            font_families.prefetch()
         
     def init_ui(self):
         self.setWindowTitle("电池悬浮窗设置")
-        self.setFixedSize(450, 450)
+        self.setFixedSize(450, 640 if self.history_source is not None else 480)
         
         layout = QVBoxLayout()
         
@@ -30,8 +107,10 @@ class SettingsWindow(QWidget):
         # 字体选择
         font_family_layout = QHBoxLayout()
         font_family_layout.addWidget(QLabel("字体:"))
-        self.font_combo = QFontComboBox()
-        self.font_combo.setCurrentFont(QFont(self.config_manager.config["font_family"]))
+        self.font_combo = QComboBox()
+        # 不按所有字体名称的宽度计算控件尺寸
+        self.font_combo.setSizeAdjustPolicy(QComboBox.AdjustToMinimumContentsLengthWithIcon)
+        self.font_combo.setMinimumContentsLength(20)
         font_family_layout.addWidget(self.font_combo)
         font_layout.addLayout(font_family_layout)
         
@@ -40,18 +119,15 @@ class SettingsWindow(QWidget):
         font_size_layout.addWidget(QLabel("字体大小:"))
         self.font_size_spin = QSpinBox()
         self.font_size_spin.setRange(10, 72)
-        self.font_size_spin.setValue(self.config_manager.config["font_size"])
         font_size_layout.addWidget(self.font_size_spin)
         font_layout.addLayout(font_size_layout)
         
         # 粗体和斜体
         style_layout = QHBoxLayout()
         self.bold_check = QCheckBox("粗体")
-        self.bold_check.setChecked(self.config_manager.config["font_bold"])
         style_layout.addWidget(self.bold_check)
         
         self.italic_check = QCheckBox("斜体")
-        self.italic_check.setChecked(self.config_manager.config["font_italic"])
         style_layout.addWidget(self.italic_check)
         style_layout.addStretch()
         font_layout.addLayout(style_layout)
@@ -59,7 +135,6 @@ class SettingsWindow(QWidget):
         # 预览
         self.preview_label = QLabel("预览: 88%")
         self.preview_label.setAlignment(Qt.AlignCenter)
-        self.update_preview()
         font_layout.addWidget(self.preview_label)
         
         font_group.setLayout(font_layout)
@@ -74,12 +149,11 @@ class SettingsWindow(QWidget):
         
         self.transparency_slider = QSlider(Qt.Horizontal)
         self.transparency_slider.setRange(10, 100)
-        self.transparency_slider.setValue(self.config_manager.get_transparency())
         self.transparency_slider.setTickPosition(QSlider.TicksBelow)
         self.transparency_slider.setTickInterval(10)
         transparency_slider_layout.addWidget(self.transparency_slider)
         
-        self.transparency_label = QLabel(f"{self.config_manager.get_transparency()}%")
+        self.transparency_label = QLabel()
         self.transparency_label.setFixedWidth(40)
         transparency_slider_layout.addWidget(self.transparency_label)
         
@@ -97,11 +171,16 @@ class SettingsWindow(QWidget):
         display_group = QGroupBox("显示设置")
         display_layout = QVBoxLayout()
         self.show_overlay_check = QCheckBox("显示电量悬浮窗")
-        self.show_overlay_check.setChecked(self.config_manager.config["show_overlay"])
         display_layout.addWidget(self.show_overlay_check)
+        self.painted_overlay_check = QCheckBox("低占用绘制模式（重启后生效）")
+        display_layout.addWidget(self.painted_overlay_check)
         display_group.setLayout(display_layout)
         layout.addWidget(display_group)
         
+        # 电量历史
+        if self.history_source is not None:
+            layout.addWidget(self.create_history_group())
+        
         # 按钮
         button_layout = QHBoxLayout()
         self.apply_btn = QPushButton("应用")
@@ -121,12 +200,69 @@ class SettingsWindow(QWidget):
         self.setLayout(layout)
         
         # 连接信号
-        self.font_combo.currentFontChanged.connect(self.update_preview)
+        self.font_combo.currentTextChanged.connect(self.update_preview)
         self.font_size_spin.valueChanged.connect(self.update_preview)
         self.bold_check.stateChanged.connect(self.update_preview)
         self.italic_check.stateChanged.connect(self.update_preview)
         self.transparency_slider.valueChanged.connect(self.on_transparency_changed)
     
+    def create_history_group(self):
+        """电量历史曲线和时间范围选择"""
+        from ui.history_chart import HistoryChart, RANGES
+        history_group = QGroupBox("电量历史")
+        history_layout = QVBoxLayout()
+        
+        range_layout = QHBoxLayout()
+        range_layout.addWidget(QLabel("时间范围:"))
+        self.history_range_combo = QComboBox()
+        for span, name in RANGES:
+            self.history_range_combo.addItem(name, span)
+        self.history_range_combo.setCurrentIndex(2)
+        range_layout.addWidget(self.history_range_combo)
+        range_layout.addStretch()
+        history_layout.addLayout(range_layout)
+        
+        self.history_chart = HistoryChart(self.history_source, RANGES[2][0])
+        self.history_chart.setFixedHeight(110)
+        history_layout.addWidget(self.history_chart)
+        self.history_range_combo.currentIndexChanged.connect(
+            lambda index: self.history_chart.set_span(self.history_range_combo.itemData(index)))
+        
+        history_group.setLayout(history_layout)
+        return history_group
+    
+    def load_values(self, config):
+        """按配置设置各控件的值"""
+        self.select_font_family(config["font_family"])
+        self.font_size_spin.setValue(config["font_size"])
+        self.bold_check.setChecked(config["font_bold"])
+        self.italic_check.setChecked(config["font_italic"])
+        self.show_overlay_check.setChecked(config["show_overlay"])
+        self.painted_overlay_check.setChecked(config["overlay_mode"] == "painted")
+        self.transparency_slider.setValue(config["transparency"])
+        self.transparency_label.setText(f"{config['transparency']}%")
+        self.update_preview()
+    
+    def select_font_family(self, family):
+        """选中字体，不在列表中时添加到最前面"""
+        index = self.font_combo.findText(family)
+        if index < 0:
+            self.font_combo.insertItem(0, family)
+            index = 0
+        self.font_combo.setCurrentIndex(index)
+    
+    def set_font_families(self, families):
+        """字体列表就绪后填充下拉框，保持当前选择（只填充一次）"""
+        if self._font_families_set:
+            return
+        self._font_families_set = True
+        current = self.font_combo.currentText()
+        self.font_combo.blockSignals(True)
+        self.font_combo.clear()
+        self.font_combo.addItems(families)
+        self.select_font_family(current)
+        self.font_combo.blockSignals(False)
+    
     def on_transparency_changed(self, value):
         """透明度滑块值改变"""
         self.transparency_label.setText(f"{value}%")
@@ -306,7 +442,7 @@ class SettingsWindow(QWidget):
     def update_preview(self):
         """更新预览"""
         font = QFont()
-        font.setFamily(self.font_combo.currentFont().family())
+        font.setFamily(self.font_combo.currentText())
         font.setPointSize(self.font_size_spin.value())
         font.setBold(self.bold_check.isChecked())
         font.setItalic(self.italic_check.isChecked())
@@ -315,30 +451,27 @@ class SettingsWindow(QWidget):
     
     def apply_settings(self):
         """应用设置"""
-        # 保存字体设置
-        font_family = self.font_combo.currentFont().family()
-        font_size = self.font_size_spin.value()
-        bold = self.bold_check.isChecked()
-        italic = self.italic_check.isChecked()
-        self.config_manager.set_font(font_family, font_size, bold, italic)
-        
-        # 保存透明度设置
-        transparency = self.transparency_slider.value()
-        self.config_manager.set_transparency(transparency)
-        
-        # 保存显示设置
-        show_overlay = self.show_overlay_check.isChecked()
-        self.config_manager.set_show_overlay(show_overlay)
+        # 所有设置合并为一次写入和一次刷新
+        with self.config_manager.transaction():
+            # 保存字体设置
+            font_family = self.font_combo.currentText()
+            font_size = self.font_size_spin.value()
+            bold = self.bold_check.isChecked()
+            italic = self.italic_check.isChecked()
+            self.config_manager.set_font(font_family, font_size, bold, italic)
+            
+            # 保存透明度设置
+            transparency = self.transparency_slider.value()
+            self.config_manager.set_transparency(transparency)
+            
+            # 保存显示设置
+            show_overlay = self.show_overlay_check.isChecked()
+            self.config_manager.set_show_overlay(show_overlay)
+            overlay_mode = "painted" if self.painted_overlay_check.isChecked() else "widget"
+            self.config_manager.set_overlay_mode(overlay_mode)
         
         self.close()
     
     def reset_settings(self):
         """重置设置"""
-        self.font_combo.setCurrentFont(QFont(self.config_manager.default_config["font_family"]))
-        self.font_size_spin.setValue(self.config_manager.default_config["font_size"])
-        self.bold_check.setChecked(self.config_manager.default_config["font_bold"])
-        self.italic_check.setChecked(self.config_manager.default_config["font_italic"])
-        self.show_overlay_check.setChecked(self.config_manager.default_config["show_overlay"])
-        self.transparency_slider.setValue(self.config_manager.default_config["transparency"])
-        self.transparency_label.setText(f"{self.config_manager.default_config['transparency']}%")
-        self.update_preview()
\ No newline at end of file
+        self.load_values(self.config_manager.default_config)
@@ -0,0 +1,82 @@
+"""
+托盘图标渲染模块
+"""
+
+from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtGui import QIcon, QPixmap, QPainter, QColor, QPolygonF
+
+# 各电量级别在托盘图标中的填充颜色
+LEVEL_COLORS = {
+    'high': QColor(0, 200, 0),        # 绿色
+    'medium': QColor(255, 200, 0),    # 黄色
+    'low': QColor(255, 140, 0),       # 橙色
+    'critical': QColor(255, 0, 0),    # 红色
+}
+
+
+class TrayIconRenderer:
+    """
+    托盘电池图标渲染器
+
+    图标按 (填充宽度, 颜色级别, 充电状态, 设备像素比) 分桶，
+    每个桶只用 QPainter 绘制一次，之后直接复用缓存的 QIcon。
+    """
+
+    SIZE = 16        # 逻辑尺寸(像素)
+    FILL_WIDTH = 10  # 满电时的填充宽度
+
+    def __init__(self):
+        self._icons = {}
+        self.render_count = 0
+
+    def bucket(self, data, dpr: float = 1.0) -> tuple:
+        """计算电池数据对应的图标桶，没有数据或没有系统电池时只绘制外框"""
+        if not data or data.percent is None:
+            return (0, None, False, dpr)
+        width = max(1, int(self.FILL_WIDTH * data.percent / 100))
+        return (width, data.level, bool(data.plugged), dpr)
+
+    def get_icon(self, key: tuple) -> QIcon:
+        """获取桶对应的图标，未缓存时绘制"""
+        icon = self._icons.get(key)
+        if icon is None:
+            icon = QIcon(self._render(*key))
+            self._icons[key] = icon
+        return icon
+
+    def _render(self, width: int, level: str, charging: bool, dpr: float) -> QPixmap:
+        """绘制电池图标"""
+        self.render_count += 1
+        size = int(round(self.SIZE * dpr))
+        pixmap = QPixmap(size, size)
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # 绘制电池外框
+        painter.setPen(QColor(200, 200, 200))
+        painter.setBrush(QColor(240, 240, 240))
+        painter.drawRoundedRect(1, 4, 12, 8, 2, 2)
+
+        # 绘制电池正极
+        painter.setBrush(QColor(200, 200, 200))
+        painter.drawRect(13, 6, 2, 4)
+
+        # 绘制电量
+        if level is not None:
+            painter.setBrush(LEVEL_COLORS.get(level, LEVEL_COLORS['critical']))
+            painter.setPen(Qt.NoPen)
+            painter.drawRoundedRect(2, 5, width, 6, 1, 1)
+
+        # 充电时绘制闪电标记
+        if charging:
+            bolt = QPolygonF([QPointF(8, 4), QPointF(5, 8.5), QPointF(7, 8.5),
+                              QPointF(6, 12), QPointF(9.5, 7.5), QPointF(7.5, 7.5)])
+            painter.setPen(QColor(60, 60, 60))
+            painter.setBrush(QColor(255, 255, 255))
+            painter.drawPolygon(bolt)
+
+        painter.end()
+        return pixmap
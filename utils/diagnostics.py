@@ -0,0 +1,145 @@
+"""
+运行诊断模块 - 各处理阶段的计数和耗时直方图
+
+记录一次耗时只做一次字典查找、一次整数运算和几次加法，不分配内存，
+可以常驻开启；只有查看或导出时才计算分位数。
+"""
+
+import time
+from array import array
+from typing import Dict, Optional
+
+# 直方图桶：第 i 个桶的上界为 2^i 微秒，最后一个桶收集更长的耗时（约34秒以上）
+BUCKETS = 26
+
+
+def _pad(text: str, width: int) -> str:
+    """按显示宽度左对齐（中文字符占两列）"""
+    used = sum(2 if ord(char) > 0x2E80 else 1 for char in text)
+    return text + ' ' * max(0, width - used)
+
+
+class LatencyHistogram:
+    """按2的幂分桶的耗时直方图"""
+
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets = array('Q', bytes(8 * BUCKETS))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        micros = int(seconds * 1e6)
+        index = micros.bit_length() if micros > 0 else 0
+        self.buckets[index if index < BUCKETS else BUCKETS - 1] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """按桶估算分位数(秒)，取所在桶的上界"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return min(self.max, (1 << index) / 1e6)
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1e3 if self.count else 0.0,
+            'p50_ms': self.percentile(0.50) * 1e3,
+            'p90_ms': self.percentile(0.90) * 1e3,
+            'p99_ms': self.percentile(0.99) * 1e3,
+            'max_ms': self.max * 1e3,
+            'total_ms': self.total * 1e3,
+        }
+
+
+class Diagnostics:
+    """各阶段的耗时直方图和计数器"""
+
+    # 阶段名称及说明，按显示顺序排列
+    STAGES = {
+        'sample.read': '读取电池',
+        'sample.process': '处理读数',
+        'sample.publish': '分发读数',
+        'signal.delivery': '信号送达界面',
+        'display.update': '更新显示',
+        'display.paint': '绘制文字',
+        'chart.paint': '绘制历史图表',
+        'refresh.latency': '手动刷新到显示',
+        'config.save': '提交配置',
+        'config.write': '写入配置文件',
+    }
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages: Dict[str, LatencyHistogram] = {name: LatencyHistogram() for name in self.STAGES}
+        self.counters: Dict[str, int] = {}
+
+    def record(self, stage: str, seconds: float):
+        """记录一次耗时(秒)"""
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def count(self, name: str, amount: int = 1):
+        """计数器加一"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        self.__init__()
+
+    def snapshot(self, extra: Optional[dict] = None) -> dict:
+        """
+        生成诊断快照
+
+        Args:
+            extra: 附加信息（例如采样调度统计、渲染缓存命中率）
+        """
+        result = {
+            'uptime_seconds': time.time() - self.started,
+            'stages': {name: histogram.snapshot() for name, histogram in self.stages.items()},
+            'counters': dict(self.counters),
+        }
+        if extra:
+            result.update(extra)
+        return result
+
+    def format_report(self, extra: Optional[dict] = None) -> str:
+        """格式化为文本表格"""
+        snapshot = self.snapshot()
+        lines = [f"{_pad('阶段', 18)}{'次数':>8}{'平均(ms)':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'最大':>7}"]
+        for name, stats in snapshot['stages'].items():
+            label = self.STAGES.get(name, name)
+            lines.append(f"{_pad(label, 18)}{stats['count']:>10}{stats['mean_ms']:>10.3f}"
+                         f"{stats['p50_ms']:>9.3f}{stats['p90_ms']:>9.3f}"
+                         f"{stats['p99_ms']:>9.3f}{stats['max_ms']:>9.2f}")
+        if snapshot['counters']:
+            lines.append("")
+            lines.extend(f"{name:<28}{value:>10}" for name, value in sorted(snapshot['counters'].items()))
+        for section, values in (extra or {}).items():
+            lines.append("")
+            lines.append(f"[{section}]")
+            lines.extend(f"  {key:<26}{value:>12.4g}" if isinstance(value, float)
+                         else f"  {key:<26}{value!s:>12}" for key, value in values.items())
+        return "\n".join(lines)
+
+    def dump(self, path: str, extra: Optional[dict] = None):
+        """导出为JSON文件"""
+        # persistence 也会记录耗时，在这里才导入以避免循环导入
+        from utils.persistence import atomic_write_json
+        atomic_write_json(path, self.snapshot(extra), indent=2)
+
+
+# 全局诊断实例
+diagnostics = Diagnostics()
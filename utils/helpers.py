@@ -2,6 +2,7 @@
 工具函数模块
 """
 
+import importlib.util
 import platform
 import sys
 
@@ -13,7 +14,7 @@ def check_system_compatibility():
     Returns:
         bool: 如果系统兼容返回True，否则返回False
     """
-    return platform.system() == "Windows"
+    return platform.system() in ("Windows", "Linux")
 
 
 def check_dependencies():
@@ -23,11 +24,16 @@ def check_dependencies():
     Returns:
         bool: 如果所有依赖都可用返回True，否则返回False
     """
-    try:
-        import psutil
+    # 只查找不导入，避免拖慢启动
+    if importlib.util.find_spec("psutil") is not None:
+        return True
+    from config.settings import settings
+    from core.battery_backends import SysfsBackend, is_simulated_spec
+    # 模拟和回放后端不需要电池硬件
+    if is_simulated_spec(settings.battery_backend):
         return True
-    except ImportError:
-        return False
+    # Linux 下可以直接读取 sysfs，不依赖 psutil
+    return SysfsBackend.is_supported()
 
 
 def show_error_message(message):
@@ -0,0 +1,175 @@
+"""
+持久化工具模块 - 原子写入与延迟合并写入
+"""
+
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+from utils.diagnostics import diagnostics
+
+
+def atomic_write_json(path, data, indent=4):
+    """
+    原子写入JSON文件：先写临时文件，再重命名覆盖目标文件
+
+    Args:
+        path: 目标文件路径
+        data: 可序列化为JSON的数据
+        indent: 缩进
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=".%s." % os.path.basename(path), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class DebouncedJsonWriter:
+    """
+    延迟合并的后台JSON写入器
+
+    每次 schedule() 只记录最新的数据快照并重新计时，
+    在 delay 秒内没有新的写入请求时，由后台线程执行一次原子写入。
+    写入失败时，如果没有更新的快照，就把快照放回队列，按指数退避重试。
+    """
+
+    # 写入失败后的最长重试间隔(秒)
+    MAX_RETRY_DELAY = 60.0
+
+    def __init__(self, path, delay=0.5):
+        self.path = path
+        self.delay = delay
+        self.write_count = 0
+        self.failure_count = 0
+
+        self._lock = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._pending = None
+        self._generation = 0
+        self._written_generation = 0
+        self._deadline = 0.0
+        self._retry_delay = delay
+        # 最近一次写入失败，快照正在等待重试
+        self._failed = False
+        self._thread = None
+        self._closed = False
+
+    def schedule(self, data):
+        """记录待写入的数据快照，并推迟写入时间"""
+        snapshot = copy.deepcopy(data)
+        with self._lock:
+            self._pending = snapshot
+            self._generation += 1
+            self._deadline = time.monotonic() + self.delay
+            self._failed = False
+            self._start_thread()
+            self._lock.notify()
+
+    def _start_thread(self):
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(
+                target=self._run, name="config-writer", daemon=True
+            )
+            self._thread.start()
+
+    def has_pending(self) -> bool:
+        """
+        是否有尚未落盘（包括正在写入）的数据
+
+        写入失败、等待重试期间返回False：此时磁盘上的文件才是最新的有效配置，
+        外部修改可以照常加载（加载后应调用 discard() 放弃等待重试的快照）。
+        """
+        with self._lock:
+            return self._generation > self._written_generation and not self._failed
+
+    def discard(self):
+        """放弃尚未落盘的快照（例如已经加载了文件中更新的外部修改）"""
+        with self._lock:
+            self._pending = None
+            self._written_generation = self._generation
+            self._failed = False
+            self._retry_delay = self.delay
+
+    def flush(self):
+        """立即写入尚未落盘的数据（在调用线程中执行）"""
+        with self._lock:
+            data, self._pending = self._pending, None
+            generation = self._generation
+            self._failed = False
+        if data is not None:
+            self._write(data, generation)
+
+    def close(self):
+        """写入剩余数据并停止后台线程"""
+        with self._lock:
+            self._closed = True
+            self._lock.notify()
+        self.flush()
+
+    def _run(self):
+        """后台写入循环"""
+        while True:
+            with self._lock:
+                while self._pending is None and not self._closed:
+                    self._lock.wait()
+                if self._closed:
+                    return
+                # 等待写入请求静止 delay 秒
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._lock.wait(remaining)
+                    continue
+                data, self._pending = self._pending, None
+                generation = self._generation
+                self._failed = False
+            self._write(data, generation)
+
+    def _write(self, data, generation):
+        with self._io_lock:
+            # 已有更新的快照落盘时，丢弃旧快照
+            if generation <= self._written_generation:
+                return
+            try:
+                started = time.perf_counter()
+                atomic_write_json(self.path, data)
+                diagnostics.record('config.write', time.perf_counter() - started)
+                self._written_generation = generation
+                self.write_count += 1
+                self._retry_delay = self.delay
+            except Exception as e:
+                self.failure_count += 1
+                if self._requeue(data, generation):
+                    print(f"保存配置文件时出错，{self._retry_delay:g}秒后重试: {e}")
+                else:
+                    print(f"保存配置文件时出错: {e}")
+
+    def _requeue(self, data, generation) -> bool:
+        """写入失败：没有更新的快照时放回队列，推迟后重试"""
+        with self._lock:
+            if (generation != self._generation or self._pending is not None
+                    or generation <= self._written_generation):
+                return False
+            self._pending = data
+            self._failed = True
+            if self._closed:
+                # 已经停止后台线程，留给之后的 flush()
+                return False
+            self._retry_delay = min(self._retry_delay * 2, self.MAX_RETRY_DELAY)
+            self._deadline = time.monotonic() + self._retry_delay
+            self._start_thread()
+            self._lock.notify()
+            return True
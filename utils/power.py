@@ -0,0 +1,91 @@
+"""
+功耗工具模块 - 定时器松弛，以及进程自身的唤醒次数和CPU时间统计
+"""
+
+import ctypes
+import os
+import sys
+import time
+from typing import Optional
+
+# prctl(PR_SET_TIMERSLACK)：允许内核把本线程的定时唤醒推迟并与其他唤醒合并
+PR_SET_TIMERSLACK = 29
+
+
+def set_timer_slack(seconds: float) -> bool:
+    """
+    设置当前线程的定时器松弛时间（仅 Linux）
+
+    Returns:
+        是否设置成功
+    """
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        return libc.prctl(PR_SET_TIMERSLACK, ctypes.c_ulong(int(seconds * 1e9)), 0, 0, 0) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+def cpu_seconds() -> float:
+    """进程累计使用的CPU时间(秒，用户态+内核态)"""
+    times = os.times()
+    return times.user + times.system
+
+
+def context_switches() -> Optional[int]:
+    """
+    进程所有线程的主动上下文切换次数之和（仅 Linux）
+
+    线程每次进入睡眠后被唤醒都会计一次，可以近似看作唤醒次数。
+    """
+    total = 0
+    try:
+        tasks = os.listdir('/proc/self/task')
+    except OSError:
+        return None
+    for task in tasks:
+        try:
+            with open(f'/proc/self/task/{task}/status') as f:
+                for line in f:
+                    if line.startswith('voluntary_ctxt_switches:'):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            # 线程已经退出
+            continue
+    return total
+
+
+class ProcessUsage:
+    """统计进程自身的唤醒频率和CPU占用，每次快照计算与上次快照之间的速率"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self._start_counts = (cpu_seconds(), context_switches())
+        self._last = (self.started,) + self._start_counts
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        cpu, wakeups = cpu_seconds(), context_switches()
+        last_time, last_cpu, last_wakeups = self._last
+        self._last = (now, cpu, wakeups)
+        window = now - last_time
+        uptime = now - self.started
+        result = {
+            'cpu_seconds': cpu,
+            'cpu_percent': (cpu - last_cpu) / window * 100 if window > 0 else 0.0,
+            'cpu_percent_average': (cpu - self._start_counts[0]) / uptime * 100 if uptime > 0 else 0.0,
+            'window_seconds': window,
+        }
+        if wakeups is not None:
+            result['wakeups'] = wakeups
+            result['wakeups_per_minute'] = (wakeups - last_wakeups) / window * 60 if window > 0 else 0.0
+            result['wakeups_per_minute_average'] = (
+                (wakeups - self._start_counts[1]) / uptime * 60 if uptime > 0 else 0.0)
+        return result
+
+
+# 全局统计实例
+process_usage = ProcessUsage()
@@ -0,0 +1,113 @@
+"""
+启动耗时统计模块
+
+记录启动过程中的关键时间点，并可选地统计每个模块的导入耗时
+（类似 python -X importtime 的 self/cumulative 分解）。
+"""
+
+import sys
+import time
+
+
+class _ImportTimer:
+    """sys.meta_path 查找器：为每个新导入的模块计时，本身不负责查找"""
+
+    def __init__(self, records: list):
+        self.records = records
+        self._stack = []   # 正在导入的模块的子模块累计耗时
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                self._wrap(spec)
+                return spec
+        return None
+
+    def _wrap(self, spec):
+        loader = spec.loader
+        # 内置/冻结模块的加载器是共享的类对象，不做包装
+        if loader is None or isinstance(loader, type) or not hasattr(loader, 'exec_module'):
+            return
+        timer = self
+        create_module = getattr(loader, 'create_module', None)
+        exec_module = loader.exec_module
+
+        def timed(func, name):
+            def wrapper(*args):
+                timer._stack.append(0.0)
+                start = time.perf_counter()
+                try:
+                    return func(*args)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    children = timer._stack.pop()
+                    if timer._stack:
+                        timer._stack[-1] += elapsed
+                    timer.records.append((name, elapsed - children, elapsed, len(timer._stack)))
+            return wrapper
+
+        # 扩展模块在 create_module 中加载动态库，Python 模块在 exec_module 中执行代码
+        if create_module is not None:
+            loader.create_module = timed(create_module, spec.name + " [load]")
+        loader.exec_module = timed(exec_module, spec.name)
+
+
+class StartupProfiler:
+    """启动耗时统计"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.enabled = False
+        self.marks = []
+        self.imports = []   # (模块名, 自身耗时, 累计耗时, 嵌套深度)
+        self.reported = False
+        self._timer = None
+
+    def enable(self, trace_imports: bool = True):
+        """开启统计；trace_imports 为True时记录之后所有模块的导入耗时"""
+        self.enabled = True
+        if trace_imports and self._timer is None:
+            self._timer = _ImportTimer(self.imports)
+            sys.meta_path.insert(0, self._timer)
+
+    def mark(self, name: str):
+        """记录一个时间点"""
+        if self.enabled:
+            self.marks.append((name, time.perf_counter() - self.origin))
+
+    def stop_tracing(self):
+        """停止记录导入耗时"""
+        if self._timer is not None:
+            sys.meta_path.remove(self._timer)
+            self._timer = None
+
+    def format_report(self, top: int = 20) -> str:
+        """生成文本报告"""
+        lines = ["启动耗时统计 (毫秒，从 main 模块加载开始计时):"]
+        for name, elapsed in self.marks:
+            lines.append(f"  {elapsed * 1000:9.1f}  {name}")
+        if self.imports:
+            total = sum(self_time for _, self_time, _, _ in self.imports)
+            lines.append(f"导入耗时 (共 {len(self.imports)} 个模块, 合计 {total * 1000:.1f} ms), "
+                         f"按累计耗时排序前 {top} 项:")
+            lines.append("      自身 |      累计 | 模块")
+            ranked = sorted(self.imports, key=lambda record: record[2], reverse=True)[:top]
+            for name, self_time, cumulative, depth in ranked:
+                lines.append(f"  {self_time * 1000:8.1f} | {cumulative * 1000:9.1f} | "
+                             f"{'  ' * depth}{name}")
+        return "\n".join(lines)
+
+    def report(self, stream=None):
+        """输出报告（只输出一次）"""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        self.stop_tracing()
+        print(self.format_report(), file=stream or sys.stderr)
+
+
+# 全局启动耗时统计实例
+startup_profiler = StartupProfiler()